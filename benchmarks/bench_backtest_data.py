@@ -0,0 +1,59 @@
+import os
+import sys
+import time
+import tracemalloc
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trading_bot.backtest_manager import BacktestManager
+from trading_bot.synthetic_data import generate_candles
+
+
+def legacy_pipeline(historical_data):
+    """Fluxo antigo: iterrows -> lista de dicionários -> DataFrame em run_simulation"""
+    data = []
+    for _, row in historical_data.iterrows():
+        data.append({
+            'timestamp': row['timestamp'],
+            'open': float(row['open']),
+            'high': float(row['high']),
+            'low': float(row['low']),
+            'close': float(row['close']),
+            'volume': float(row['volume'])
+        })
+    return pd.DataFrame(data)
+
+
+def columnar_pipeline(backtest):
+    """Fluxo atual: DataFrame colunar repassado direto para a simulação"""
+    return backtest.prepare_backtest_data().copy(deep=False)
+
+
+def measure(func, *args):
+    """Retorna (tempo em segundos, pico de memória em MB)"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    func(*args)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak / 1024 / 1024
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10_000, 100_000]
+    backtest = BacktestManager('BTCUSDT', use_cache=False)
+    
+    print(f"{'candles':>10} | {'fluxo':<10} | {'tempo (s)':>10} | {'pico (MB)':>10}")
+    for n in sizes:
+        backtest.historical_data = generate_candles(n)
+        legacy_time, legacy_peak = measure(legacy_pipeline, backtest.historical_data)
+        columnar_time, columnar_peak = measure(columnar_pipeline, backtest)
+        print(f"{n:>10} | {'iterrows':<10} | {legacy_time:>10.4f} | {legacy_peak:>10.2f}")
+        print(f"{n:>10} | {'colunar':<10} | {columnar_time:>10.4f} | {columnar_peak:>10.2f}")
+        print(f"{'':>10} | {'ganho':<10} | {legacy_time / columnar_time:>9.0f}x | {legacy_peak / max(columnar_peak, 1e-6):>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Mede o tempo de inicialização do pacote em processos novos
+
+Cada cenário roda em um interpretador separado (sem cache de módulos) e
+informa o tempo até ficar pronto e quais bibliotecas pesadas foram importadas:
+    
+    python benchmarks/bench_import_time.py [--repeat 5]
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['pandas', 'numpy', 'plotly', 'binance', 'telegram', 'websockets']
+
+# Cenário -> código executado no processo novo
+SCENARIOS = {
+    'import trading_bot': "import trading_bot",
+    'from trading_bot import Logger': "from trading_bot import Logger; Logger('bench')",
+    'backtest sem gráfico': (
+        "from trading_bot.trading_manager import TradingManager\n"
+        "TradingManager(is_backtest=True, enable_chart=False)"
+    ),
+    'backtest com gráfico': (
+        "from trading_bot.trading_manager import TradingManager\n"
+        "TradingManager(is_backtest=True)"
+    ),
+    'live runner (imports)': (
+        "from trading_bot.trading_manager import TradingManager\n"
+        "from trading_bot.live_runner import LiveRunner"
+    ),
+}
+
+PROBE = """
+import sys, time, json, os, tempfile
+os.chdir(tempfile.mkdtemp())
+start = time.perf_counter()
+exec({code!r})
+elapsed = time.perf_counter() - start
+print(json.dumps({{'seconds': elapsed, 'modules': [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def run_scenario(code, repeat):
+    env = dict(os.environ, PYTHONPATH=ROOT, LOG_QUEUE='false')
+    times, modules = [], []
+    for _ in range(repeat):
+        output = subprocess.check_output(
+            [sys.executable, '-c', PROBE.format(code=code, heavy=HEAVY_MODULES)],
+            env=env, text=True, stderr=subprocess.DEVNULL
+        )
+        result = json.loads(output.strip().splitlines()[-1])
+        times.append(result['seconds'])
+        modules = result['modules']
+    return statistics.median(times), modules
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help='Processos por cenário (vale a mediana)')
+    args = parser.parse_args()
+    
+    print(f"{'cenário':<32} | {'tempo (ms)':>10} | módulos pesados carregados")
+    for name, code in SCENARIOS.items():
+        seconds, modules = run_scenario(code, args.repeat)
+        print(f"{name:<32} | {seconds * 1000:>10.1f} | {', '.join(modules) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
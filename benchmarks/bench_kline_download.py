@@ -0,0 +1,138 @@
+"""Compara o download de klines sequencial e paralelo contra um servidor local
+
+O servidor imita /api/v3/klines da Binance: serve páginas de candles
+sintéticos com latência configurável, informa o peso usado no cabeçalho
+X-MBX-USED-WEIGHT-1M e pode injetar erros 500 e respostas 429, para conferir
+que o resultado chega completo e em ordem:
+    
+    python benchmarks/bench_kline_download.py [--days 30] [--latency 0.05] [--workers 1 4 8]
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.chdir(tempfile.mkdtemp())
+
+import numpy as np
+from trading_bot.kline_cache import interval_to_ms
+from trading_bot.kline_downloader import KlineDownloader
+
+START_MS = 1_704_067_200_000  # 2024-01-01
+
+
+def expected_klines(start_ms, end_ms, interval_ms):
+    """Candles determinísticos: o preço depende só do horário de abertura"""
+    timestamps = np.arange(start_ms, end_ms + 1, interval_ms, dtype=np.int64)
+    close = 30000 + 1000 * np.sin(timestamps / 3.6e9)
+    return timestamps, close
+
+
+class KlineStandIn:
+    def __init__(self, latency=0.05, error_rate=0.0, throttle_every=0, seed=0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_every = throttle_every
+        self.random = random.Random(seed)
+        self.requests = 0
+        self.weight = 0
+        self.lock = threading.Lock()
+        self.server = None
+
+    def start(self):
+        stand_in = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                with stand_in.lock:
+                    stand_in.requests += 1
+                    stand_in.weight += 5
+                    count, weight = stand_in.requests, stand_in.weight
+                    fail = stand_in.random.random() < stand_in.error_rate
+                time.sleep(stand_in.latency)
+                
+                if stand_in.throttle_every and count % stand_in.throttle_every == 0:
+                    return self._reply(429, b'{"code":-1003}', weight, {'Retry-After': '1'})
+                if fail:
+                    return self._reply(500, b'{"code":-1000}', weight)
+                
+                interval_ms = interval_to_ms(query['interval'])
+                start_ms = -(-int(query['startTime']) // interval_ms) * interval_ms
+                end_ms = min(int(query['endTime']), start_ms + (int(query['limit']) - 1) * interval_ms)
+                timestamps, close = expected_klines(start_ms, end_ms, interval_ms)
+                rows = [
+                    [int(t), f"{c:.2f}", f"{c + 5:.2f}", f"{c - 5:.2f}", f"{c:.2f}", "1.0", int(t) + interval_ms - 1,
+                     "0", 10, "0", "0", "0"]
+                    for t, c in zip(timestamps, close)
+                ]
+                self._reply(200, json.dumps(rows).encode(), weight)
+            
+            def _reply(self, status, body, weight, headers=None):
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                self.send_header('X-MBX-USED-WEIGHT-1M', str(weight))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--days', type=int, default=30, help='Dias de candles de 1m')
+    parser.add_argument('--latency', type=float, default=0.05, help='Latência simulada por requisição (s)')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8])
+    parser.add_argument('--error-rate', type=float, default=0.02, help='Fração de respostas 500')
+    parser.add_argument('--throttle-every', type=int, default=0, help='Responde 429 a cada N requisições')
+    args = parser.parse_args()
+    
+    interval = '1m'
+    interval_ms = interval_to_ms(interval)
+    end_ms = START_MS + args.days * 86_400_000 - 1
+    timestamps, close = expected_klines(START_MS, end_ms, interval_ms)
+    
+    print(f"{'workers':>8} | {'requisições':>11} | {'tempo (s)':>10} | {'candles/s':>12} | resultado")
+    for workers in args.workers:
+        stand_in = KlineStandIn(args.latency, args.error_rate, args.throttle_every)
+        base_url = stand_in.start()
+        downloader = KlineDownloader(base_url=base_url, max_workers=workers, backoff=0.05, max_weight=10**9)
+        try:
+            start = time.perf_counter()
+            data = downloader.download('BTCUSDT', interval, START_MS, end_ms)
+            elapsed = time.perf_counter() - start
+        finally:
+            downloader.close()
+            stand_in.stop()
+        
+        complete = np.array_equal(data['timestamp'], timestamps) and np.allclose(data['close'], np.round(close, 2))
+        print(f"{workers:>8} | {stand_in.requests:>11} | {elapsed:>10.3f} | {len(data) / elapsed:>12,.0f} | "
+              f"{'ok' if complete else 'DIVERGENTE'}")
+
+
+if __name__ == "__main__":
+    main()
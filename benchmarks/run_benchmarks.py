@@ -0,0 +1,204 @@
+"""Suíte de benchmarks do backtest com candles sintéticos
+
+Mede tempo, pico de memória e candles/s de cada etapa e grava o resultado em
+benchmarks/results/<commit>.json, para comparar commits:
+    
+    python benchmarks/run_benchmarks.py                      # 10k, 100k e 1M candles
+    python benchmarks/run_benchmarks.py --sizes 10000 --regimes trending
+    python benchmarks/run_benchmarks.py --compare benchmarks/results/abc1234.json
+"""
+import os
+import sys
+import gc
+import json
+import time
+import logging
+import argparse
+import platform
+import subprocess
+import tempfile
+import tracemalloc
+from datetime import datetime
+from contextlib import contextmanager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import numpy as np
+from trading_bot.synthetic_data import generate_candles, REGIMES
+from trading_bot.trading_manager import TradingManager
+from trading_bot.chart_manager import ChartManager
+from trading_bot.order_manager import OrderManager
+from trading_bot.logger import Logger
+
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+
+
+def bench_calculate_indicators(df):
+    trading_manager = TradingManager(is_backtest=True, enable_chart=False)
+    return lambda: trading_manager.calculate_indicators(df.copy(deep=False))
+
+
+def bench_run_simulation(df):
+    def run():
+        trading_manager = TradingManager(is_backtest=True, enable_chart=False)
+        trading_manager.run_simulation(df)
+    return run
+
+
+def bench_chart_update_data(df):
+    columns = [df[col].to_numpy() for col in ('close', 'open', 'high', 'low')]
+    ma = df['close'].rolling(9).mean().to_numpy()
+    timestamps = df['timestamp'].to_numpy()
+
+    def run():
+        chart_manager = ChartManager(prefix='bench', render_every=0, render_interval=0)
+        for close, open_price, high, low, ma_value, timestamp in zip(*columns, ma, timestamps):
+            chart_manager.update_data(close, ma_value, ma_value, open_price, high, low, timestamp=timestamp)
+    return run
+
+
+def bench_order_save(df):
+    prices = df['close'].to_numpy()
+
+    def run():
+        order_manager = OrderManager(prefix='bench', fsync='never')
+        for i, price in enumerate(prices):
+            order_manager.save_order({
+                'orderId': i,
+                'symbol': 'BTCUSDT',
+                'side': 'BUY' if i % 2 == 0 else 'SELL',
+                'executedQty': '0.01',
+                'cummulativeQuoteQty': str(price * 0.01),
+                'status': 'FILLED'
+            })
+        order_manager.close()
+    return run
+
+
+# Etapa -> função que prepara o callable medido (a preparação fica fora da medição)
+STAGES = {
+    'calculate_indicators': bench_calculate_indicators,
+    'run_simulation': bench_run_simulation,
+    'chart_update_data': bench_chart_update_data,
+    'order_save': bench_order_save,
+}
+
+
+def measure(func, repeat):
+    """Retorna (melhor tempo em segundos, pico de memória em MB)
+    
+    O tempo é medido sem o tracemalloc (que deixa tudo mais lento); o pico de
+    memória vem de uma execução extra com o tracemalloc ligado.
+    """
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    
+    gc.collect()
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return min(times), peak / 1024 / 1024
+
+
+def git_revision():
+    try:
+        revision = subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, text=True).strip()
+        dirty = subprocess.check_output(['git', 'status', '--porcelain', '--untracked-files=no'], cwd=ROOT, text=True).strip()
+        return revision + ('-dirty' if dirty else '')
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+@contextmanager
+def scratch_directory():
+    """Executa em um diretório temporário (gráficos e ordens não sujam o repositório)"""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as path:
+        os.chdir(path)
+        try:
+            yield path
+        finally:
+            os.chdir(cwd)
+
+
+def run_suite(sizes, regimes, stages, repeat):
+    results = []
+    with scratch_directory():
+        # Os logs por trade distorcem a medida
+        Logger('backtest').logger.setLevel(logging.WARNING)
+        
+        for regime in regimes:
+            for n in sizes:
+                df = generate_candles(n, regime=regime)
+                for stage in stages:
+                    elapsed, peak = measure(STAGES[stage](df), repeat)
+                    row = {
+                        'stage': stage,
+                        'regime': regime,
+                        'candles': n,
+                        'seconds': elapsed,
+                        'peak_mb': peak,
+                        'candles_per_second': n / elapsed if elapsed else float('inf')
+                    }
+                    results.append(row)
+                    print(f"{stage:<22} | {regime:<15} | {n:>9} | {elapsed:>10.4f} | {peak:>10.2f} | {row['candles_per_second']:>14,.0f}")
+    return results
+
+
+def compare(results, baseline_path):
+    """Mostra a variação de tempo em relação a um resultado salvo anteriormente"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {(r['stage'], r['regime'], r['candles']): r for r in baseline['results']}
+    
+    print(f"\nComparação com {baseline['revision']}:")
+    for row in results:
+        old = previous.get((row['stage'], row['regime'], row['candles']))
+        if old is None:
+            continue
+        ratio = row['seconds'] / old['seconds']
+        flag = '  <-- regressão' if ratio > 1.2 else ''
+        print(f"{row['stage']:<22} | {row['regime']:<15} | {row['candles']:>9} | {old['seconds']:>10.4f} -> {row['seconds']:>10.4f} ({ratio:.2f}x){flag}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--regimes', nargs='+', choices=list(REGIMES), default=['random_walk'])
+    parser.add_argument('--stages', nargs='+', choices=list(STAGES), default=list(STAGES))
+    parser.add_argument('--repeat', type=int, default=3, help='Execuções por medida (vale a melhor)')
+    parser.add_argument('--compare', help='Arquivo de resultado usado como referência')
+    parser.add_argument('--no-save', action='store_true', help='Não grava benchmarks/results/<commit>.json')
+    args = parser.parse_args()
+    
+    print(f"{'etapa':<22} | {'regime':<15} | {'candles':>9} | {'tempo (s)':>10} | {'pico (MB)':>10} | {'candles/s':>14}")
+    results = run_suite(args.sizes, args.regimes, args.stages, args.repeat)
+    
+    revision = git_revision()
+    if not args.no_save:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{revision}.json")
+        with open(path, 'w') as f:
+            json.dump({
+                'revision': revision,
+                'date': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'numpy': np.__version__,
+                'machine': platform.machine(),
+                'results': results
+            }, f, indent=2)
+        print(f"\nResultados salvos em {os.path.relpath(path, ROOT)}")
+    
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+import sys
+from dotenv import load_dotenv
+from trading_bot.kline_cache import KlineCache
+import os
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+def main():
+    # Uso: python import_klines.py BTCUSDT 15m arquivo1.csv [arquivo2.zip ...]
+    if len(sys.argv) < 4:
+        print("Uso: python import_klines.py SYMBOL INTERVALO ARQUIVO [ARQUIVO ...]")
+        sys.exit(1)
+    
+    symbol, interval, files = sys.argv[1], sys.argv[2], sys.argv[3:]
+    cache = KlineCache(cache_dir=os.getenv('KLINE_CACHE_DIR', 'data/klines'), offline=True)
+    
+    for path in files:
+        count = cache.import_file(path, symbol, interval)
+        print(f"{path}: {count} candles importados para {symbol} {interval}")
+
+if __name__ == "__main__":
+    main()
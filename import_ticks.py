@@ -0,0 +1,33 @@
+import sys
+from dotenv import load_dotenv
+from trading_bot.kline_cache import KlineCache
+from trading_bot.tick_replay import TickStore
+import os
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+def main():
+    # Uso: python import_ticks.py BTCUSDT aggTrades1.zip [aggTrades2.csv ...]
+    #      python import_ticks.py BTCUSDT --klines 1m   (sub-candles já no cache de klines)
+    if len(sys.argv) < 3:
+        print("Uso: python import_ticks.py SYMBOL ARQUIVO [ARQUIVO ...]")
+        print("     python import_ticks.py SYMBOL --klines INTERVALO")
+        sys.exit(1)
+    
+    symbol = sys.argv[1].upper()
+    store = TickStore(os.path.join(os.getenv('TICK_DIR', 'data/ticks'), symbol))
+    
+    if sys.argv[2] == '--klines':
+        interval = sys.argv[3]
+        cache = KlineCache(cache_dir=os.getenv('KLINE_CACHE_DIR', 'data/klines'), offline=True)
+        count = store.import_klines(cache.load(symbol, interval))
+        print(f"{count} ticks gerados a partir dos candles de {interval} de {symbol}")
+        return
+    
+    for path in sys.argv[2:]:
+        count = store.import_aggtrades(path)
+        print(f"{path}: {count} ticks importados para {symbol}")
+
+if __name__ == "__main__":
+    main()
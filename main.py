@@ -1,8 +1,9 @@
 import os
-import time
 from dotenv import load_dotenv
 from trading_bot.trading_manager import TradingManager
+from trading_bot.live_runner import LiveRunner
 from trading_bot.logger import Logger
+from trading_bot.instrumentation import instrumentation
 
 def main():
     # Load environment variables
@@ -10,23 +11,45 @@ def main():
     
     # Initialize logger
     logger = Logger()
-    logger.log_info("Starting trading bot...")
+    logger.info("Starting trading bot...")
     
-    # Initialize trading manager
-    trading_manager = TradingManager()
+    # Per-stage latency exposed at http://METRICS_HOST:METRICS_PORT/metrics (Prometheus text)
+    metrics_port = os.getenv('METRICS_PORT')
+    if metrics_port:
+        metrics_host = os.getenv('METRICS_HOST', '127.0.0.1')
+        instrumentation.enable()
+        instrumentation.serve_prometheus(int(metrics_port), host=metrics_host)
+        logger.info(f"Metrics available on {metrics_host}:{metrics_port}")
+    
+    # Initialize trading manager (LIVE_CHART=false skips the chart and never loads Plotly)
+    trading_manager = TradingManager(enable_chart=os.getenv('LIVE_CHART', 'true').lower() in ('1', 'true', 'yes'))
+    
+    # Live dashboard at http://localhost:CHART_SERVER_PORT/ (candles and orders pushed as deltas)
+    chart_server = None
+    chart_port = os.getenv('CHART_SERVER_PORT')
+    if chart_port and trading_manager.chart_manager is not None:
+        from trading_bot.chart_server import ChartServer
+        chart_server = ChartServer(port=int(chart_port)).attach(trading_manager.chart_manager).start()
+    
+    # Event-driven runner: closed candles from the kline stream trigger check_signals
+    runner = LiveRunner(trading_manager, interval=os.getenv('INTERVAL', '15m'))
     
     try:
-        while True:
-            # Check trading signals
-            trading_manager.check_signals()
-            
-            # Wait 1 minute before next check
-            time.sleep(10)
+        runner.start()
             
     except KeyboardInterrupt:
-        logger.log_info("Bot stopped by user")
+        logger.info("Bot stopped by user")
     except Exception as e:
-        logger.log_error(f"Unexpected error: {str(e)}")
+        logger.error(f"Unexpected error: {str(e)}")
+    finally:
+        # Enviar notificações pendentes antes de sair
+        trading_manager.telegram.close()
+        if trading_manager.chart_manager is not None:
+            trading_manager.chart_manager.save_chart()
+        if chart_server is not None:
+            chart_server.stop()
+        if instrumentation.enabled:
+            logger.info("Time per stage:\n" + instrumentation.format_summary())
         
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    main() 
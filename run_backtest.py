@@ -2,7 +2,7 @@ from datetime import datetime, timedelta
 from dotenv import load_dotenv
 from trading_bot.backtest_manager import BacktestManager
 from trading_bot.trading_manager import TradingManager
-from binance.client import Client
+from trading_bot.results_store import ResultsStore
 
 # Carregar variáveis de ambiente
 load_dotenv()
@@ -17,14 +17,15 @@ def main():
         symbol="BTCUSDT",
         start_date=start_date,
         end_date=end_date,
-        interval=Client.KLINE_INTERVAL_15MINUTE  # candles de 15 minutos
+        interval="15m"  # candles de 15 minutos
     )
     
     # Criar instância do TradingManager em modo backtest
     trading = TradingManager(is_backtest=True)
     
-    # Executar backtest
-    results = backtest.run_backtest(trading)
+    # Executar backtest (execução gravada no banco de resultados, RESULTS_DB)
+    with ResultsStore() as store:
+        results = backtest.run_backtest(trading, store=store)
     
     # Os resultados (orders e metrics) já foram logados pelo BacktestManager
     # e o gráfico foi salvo pelo TradingManager
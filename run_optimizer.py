@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from trading_bot.backtest_manager import BacktestManager
+from trading_bot.optimizer import ParameterOptimizer
+from trading_bot.results_store import ResultsStore
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+def main():
+    # Configurar período do backtest
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=90)
+    
+    # Obter candles (do cache local quando disponíveis)
+    backtest = BacktestManager(
+        symbol="BTCUSDT",
+        start_date=start_date,
+        end_date=end_date,
+        interval="15m"
+    )
+    data = backtest.prepare_backtest_data()
+    
+    # Grid de parâmetros da estratégia
+    param_grid = {
+        'ma_short_period': [5, 7, 9, 12],
+        'ma_long_period': [21, 26, 30, 50],
+        'stop_loss_percent': [0.01, 0.02, 0.03],
+        'take_profit_percent': [0.02, 0.03, 0.05],
+    }
+    
+    # Configs com prejuízo maior que 5% no primeiro terço do período são descartadas cedo;
+    # as demais são gravadas no banco de resultados (RESULTS_DB) com ordens e métricas
+    with ResultsStore() as store:
+        optimizer = ParameterOptimizer(
+            data,
+            prune_fraction=0.33,
+            prune_min_profit=-5.0,
+            store=store,
+            symbol=backtest.symbol,
+            interval=backtest.interval
+        )
+        results = optimizer.grid_search(param_grid, rank_by='net_profit')
+    
+    print(results.head(20).to_string())
+    
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from trading_bot.portfolio_backtest import PortfolioBacktestManager
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+def main():
+    # Configurar período do backtest
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=90)
+    
+    # Pares do portfólio (os candles são obtidos em paralelo e guardados no cache)
+    portfolio = PortfolioBacktestManager(
+        symbols=["BTCUSDT", "ETHUSDT", "BNBUSDT", "SOLUSDT", "XRPUSDT", "ADAUSDT"],
+        start_date=start_date,
+        end_date=end_date,
+        interval="15m",
+        initial_balance=1000.0,
+        max_positions=3
+    )
+    
+    # Executar backtest (os resultados já são logados pelo PortfolioBacktestManager)
+    results = portfolio.run_backtest()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Replay acelerado de candles históricos pelo caminho ao vivo
+
+Os candles passam pelo LiveRunner como eventos do WebSocket, com relógio
+simulado, a API REST da Binance servida pelos próprios candles e o Telegram
+substituído por um bot local, sem acesso à rede:
+    
+    python run_replay.py                          # cache local (SYMBOL/INTERVAL, últimos 30 dias)
+    python run_replay.py --file klines.csv        # CSV no formato de import_klines.py
+    python run_replay.py --synthetic 100000       # candles sintéticos
+"""
+import os
+import logging
+import argparse
+import asyncio
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from trading_bot.kline_cache import KLINE_DTYPE, KlineCache, read_kline_file, to_milliseconds
+from trading_bot.replay import SimulatedClock, ReplayClient, RecordingBot, ReplayRunner
+from trading_bot.telegram_notifier import TelegramNotifier
+from trading_bot.trading_manager import TradingManager
+from trading_bot.logger import Logger
+from trading_bot.instrumentation import instrumentation
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+
+def load_candles(args, symbol, interval):
+    """Candles do replay (KLINE_DTYPE) a partir do arquivo, do gerador sintético ou do cache"""
+    if args.file:
+        return read_kline_file(args.file)
+    if args.synthetic:
+        import numpy as np
+        from trading_bot.synthetic_data import generate_candles
+        df = generate_candles(args.synthetic, regime=args.regime, freq=interval.replace('m', 'min'))
+        data = np.empty(len(df), dtype=KLINE_DTYPE)
+        data['timestamp'] = df['timestamp'].astype('datetime64[ms]').astype('int64')
+        for col in ('open', 'high', 'low', 'close', 'volume'):
+            data[col] = df[col].to_numpy()
+        return data
+    end = datetime.now()
+    cache = KlineCache(cache_dir=os.getenv('KLINE_CACHE_DIR', 'data/klines'), offline=True)
+    return cache.get_array(symbol, interval, to_milliseconds(end - timedelta(days=args.days)), to_milliseconds(end))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--file', help='CSV de klines (data.binance.vision ou timestamp,open,high,low,close,volume)')
+    parser.add_argument('--synthetic', type=int, default=0, help='Número de candles sintéticos')
+    parser.add_argument('--regime', default='random_walk', help='Regime dos candles sintéticos')
+    parser.add_argument('--days', type=int, default=30, help='Dias lidos do cache local')
+    parser.add_argument('--interval', default=os.getenv('INTERVAL', '15m'))
+    parser.add_argument('--chart', action='store_true', help='Atualiza o gráfico como ao vivo')
+    parser.add_argument('--quiet', action='store_true', help='Só avisos e erros no log')
+    args = parser.parse_args()
+    
+    symbol = os.getenv('SYMBOL', 'BTCUSDT')
+    data = load_candles(args, symbol, args.interval)
+    if not len(data):
+        print("Nenhum candle para reproduzir")
+        return
+    
+    logger = Logger()
+    if args.quiet:
+        logger.logger.setLevel(logging.WARNING)
+    
+    # Binance e Telegram substituídos por stubs locais
+    clock = SimulatedClock()
+    client = ReplayClient(data, args.interval, clock)
+    bot = RecordingBot()
+    notifier = TelegramNotifier(bot=bot, max_queue_size=len(data), coalesce_window=0, min_interval=0)
+    trading_manager = TradingManager(enable_chart=args.chart, client=client, notifier=notifier)
+    runner = ReplayRunner(trading_manager, interval=args.interval, client=client)
+    
+    try:
+        asyncio.run(runner.run())
+    finally:
+        notifier.close()
+        if trading_manager.chart_manager is not None:
+            trading_manager.chart_manager.save_chart()
+    
+    stats = runner.stats()
+    metrics = trading_manager.calculate_metrics()
+    print(f"Candles reproduzidos: {stats['candles']} em {stats['elapsed']:.2f}s "
+          f"({stats['candles_per_second']:,.0f} candles/s)")
+    print(f"Requisições REST: {stats['rest_requests']} | Mensagens do Telegram: {len(bot.messages)}")
+    if metrics:
+        print(f"Trades: {metrics['general']['total_trades']} | "
+              f"Win rate: {metrics['general']['win_rate']:.2f}% | "
+              f"Lucro líquido: ${metrics['profit_loss']['net_profit']:.2f}")
+    if instrumentation.enabled:
+        print("Tempo por etapa:\n" + instrumentation.format_summary())
+
+
+if __name__ == "__main__":
+    main()
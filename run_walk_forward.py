@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+from trading_bot.backtest_manager import BacktestManager
+from trading_bot.walk_forward import WalkForwardManager
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+# Candles de 15 minutos por dia
+CANDLES_PER_DAY = 96
+
+def main():
+    # Configurar período do backtest
+    end_date = datetime.now()
+    start_date = end_date - timedelta(days=365)
+    
+    # Obter candles (do cache local quando disponíveis)
+    backtest = BacktestManager(
+        symbol="BTCUSDT",
+        start_date=start_date,
+        end_date=end_date,
+        interval="15m"
+    )
+    data = backtest.prepare_backtest_data()
+    
+    # Grid de parâmetros da estratégia
+    param_grid = {
+        'ma_short_period': [5, 7, 9, 12],
+        'ma_long_period': [21, 26, 30, 50],
+        'stop_loss_percent': [0.01, 0.02, 0.03],
+        'take_profit_percent': [0.02, 0.03, 0.05],
+    }
+    
+    # Treino de 90 dias, teste fora da amostra nos 30 dias seguintes
+    walk_forward = WalkForwardManager(
+        data,
+        train_size=90 * CANDLES_PER_DAY,
+        test_size=30 * CANDLES_PER_DAY
+    )
+    results = walk_forward.grid_search(param_grid, rank_by='net_profit')
+    
+    print(results['folds'].to_string())
+    equity = results['equity_curve']
+    print(f"\nPatrimônio final: ${equity.iloc[-1]:.2f} ({(equity.iloc[-1] / equity.iloc[0] - 1) * 100:.2f}%)")
+
+if __name__ == "__main__":
+    main()
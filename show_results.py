@@ -0,0 +1,37 @@
+"""Consulta o banco de resultados (RESULTS_DB) sem reprocessar candles
+    
+    python show_results.py                                  # 20 melhores por profit factor
+    python show_results.py --by net_profit --top 50 --symbol BTCUSDT --interval 15m
+    python show_results.py --run 42                         # métricas e ordens de uma execução
+"""
+import json
+import argparse
+from dotenv import load_dotenv
+from trading_bot.results_store import ResultsStore, METRIC_COLUMNS
+
+# Carregar variáveis de ambiente
+load_dotenv()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--by', default='profit_factor', choices=METRIC_COLUMNS)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--symbol')
+    parser.add_argument('--interval')
+    parser.add_argument('--min-trades', type=int, default=10, help='Mínimo de trades por execução')
+    parser.add_argument('--run', type=int, help='Mostra as métricas e ordens de uma execução')
+    parser.add_argument('--db', help='Arquivo do banco (padrão: RESULTS_DB)')
+    args = parser.parse_args()
+    
+    with ResultsStore(args.db) as store:
+        if args.run is not None:
+            print(json.dumps(store.metrics(args.run), indent=2))
+            print(store.orders(args.run).to_string())
+            return
+        results = store.top(args.top, by=args.by, symbol=args.symbol, interval=args.interval, min_trades=args.min_trades)
+        print(results.to_string())
+
+
+if __name__ == "__main__":
+    main()
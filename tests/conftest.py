@@ -0,0 +1,25 @@
+import numpy as np
+import pytest
+from trading_bot.kline_cache import KLINE_DTYPE
+
+
+@pytest.fixture(autouse=True)
+def _run_in_tmp_path(tmp_path, monkeypatch):
+    # Logs, ordens e gráficos gerados pelos testes ficam fora do repositório
+    monkeypatch.chdir(tmp_path)
+
+
+@pytest.fixture
+def make_klines():
+    """Candles determinísticos (KLINE_DTYPE) a partir de start_ms"""
+    def make(n, interval_ms=60_000, start_ms=1_704_067_200_000):
+        data = np.empty(n, dtype=KLINE_DTYPE)
+        data['timestamp'] = start_ms + np.arange(n, dtype=np.int64) * interval_ms
+        close = 30000 + 500 * np.sin(np.arange(n) / 7)
+        data['open'] = close - 5
+        data['high'] = close + 10
+        data['low'] = close - 10
+        data['close'] = close
+        data['volume'] = 1.0
+        return data
+    return make
@@ -0,0 +1,61 @@
+import numpy as np
+import pandas as pd
+import pytest
+from trading_bot.equity import YEAR_MS, equity_curve, equity_metrics
+from trading_bot.trade_ledger import TradeLedger
+
+DAY = pd.Timedelta(days=1)
+START = pd.Timestamp('2024-01-01')
+
+
+def daily(n):
+    return pd.date_range(START, periods=n, freq='D')
+
+
+def test_drawdown_inside_open_position():
+    # Compra 1 unidade a 100 no candle 1 (fill intrabar), vende a 120 no candle 4
+    timestamps = daily(5)
+    close = np.array([100.0, 100.0, 80.0, 90.0, 120.0])
+    ledger = TradeLedger()
+    ledger.record_buy(START + DAY + pd.Timedelta(hours=3), 100.0, 1.0, 100.0, 1000.0, 95.0, 130.0)
+    ledger.record_sell(START + 4 * DAY, 120.0, 1.0, 120.0, 20.0, 20.0, 'Take Profit', 900.0)
+    
+    equity, exposed = equity_curve(ledger, timestamps, close, 1000.0)
+    assert equity.tolist() == [1000.0, 1000.0, 980.0, 990.0, 1020.0]
+    assert exposed.tolist() == [False, True, True, True, False]
+    
+    metrics = equity_metrics(timestamps, equity, exposed)
+    # Único trade é vencedor, mas o patrimônio caiu 2% com a posição aberta
+    assert metrics['max_drawdown'] == pytest.approx(2.0)
+    # Abaixo do topo do candle 1 até o candle 3
+    assert metrics['max_drawdown_duration'] == str(2 * DAY)
+    assert metrics['exposure_time'] == pytest.approx(60.0)
+    assert metrics['final_equity'] == 1020.0
+
+
+def test_cagr():
+    timestamps = pd.to_datetime([0, YEAR_MS, 2 * YEAR_MS], unit='ms')
+    metrics = equity_metrics(timestamps, np.array([1000.0, 1100.0, 1210.0]), np.array([True, True, True]))
+    assert metrics['cagr'] == pytest.approx(10.0)
+    assert metrics['max_drawdown'] == 0.0
+    assert metrics['exposure_time'] == 100.0
+
+
+def test_portfolio_ignores_nan_close_of_pairs_without_position():
+    timestamps = daily(3)
+    # Colunas na ordem de ledger.symbols; B não tem candle no dia 1
+    close = np.array([
+        [10.0, 5.0],
+        [12.0, np.nan],
+        [11.0, 6.0],
+    ])
+    ledger = TradeLedger(symbols=['A', 'B'])
+    ledger.record_buy(START, 10.0, 10.0, 100.0, 1000.0, 9.0, 13.0, symbol='A')
+    
+    equity, exposed = equity_curve(ledger, timestamps, close, 1000.0)
+    assert equity.tolist() == [1000.0, 1020.0, 1010.0]
+    assert exposed.all()
+    
+    metrics = equity_metrics(timestamps, equity, exposed)
+    assert metrics['max_drawdown'] == pytest.approx(10 / 1020 * 100)
+    assert metrics['max_drawdown_duration'] == str(DAY)
@@ -0,0 +1,159 @@
+import json
+import threading
+import pytest
+import requests
+from requests.structures import CaseInsensitiveDict
+from trading_bot import kline_downloader
+from trading_bot.kline_downloader import KlineDownloader, KlineDownloadError, WEIGHT_HEADER
+
+INTERVAL = '1m'
+INTERVAL_MS = 60_000
+
+
+class FakeClock:
+    """Substitui o módulo time do downloader: sleep só avança o relógio"""
+
+    def __init__(self, now=1_700_000_010.0):
+        self.now = now
+        self.sleeps = []
+        self.lock = threading.Lock()
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        with self.lock:
+            self.sleeps.append(seconds)
+            self.now += seconds
+
+
+def make_response(status_code, body, headers=None):
+    response = requests.Response()
+    response.status_code = status_code
+    response._content = body if isinstance(body, bytes) else json.dumps(body).encode()
+    response.headers = CaseInsensitiveDict(headers or {})
+    return response
+
+
+class FakeSession:
+    """Imita /api/v3/klines sobre `data`; `script` define as primeiras respostas (status, corpo, cabeçalhos)"""
+
+    def __init__(self, data, clock, script=(), weight_step=5):
+        self.data = data
+        self.clock = clock
+        self.script = list(script)
+        self.weight_step = weight_step
+        self.weight = 0
+        self.calls = []
+        self.lock = threading.Lock()
+
+    def get(self, url, params=None, timeout=None):
+        with self.lock:
+            self.calls.append((self.clock.time(), params['startTime']))
+            self.weight += self.weight_step
+            headers = {WEIGHT_HEADER: str(self.weight)}
+            if self.script:
+                status_code, body, extra = self.script.pop(0)
+                if status_code is not None:
+                    return make_response(status_code, body, dict(headers, **extra))
+
+        timestamps = self.data['timestamp']
+        rows = self.data[(timestamps >= params['startTime']) & (timestamps <= params['endTime'])][:params['limit']]
+        body = [
+            [int(r['timestamp']), str(r['open']), str(r['high']), str(r['low']), str(r['close']), str(r['volume']),
+             int(r['timestamp']) + INTERVAL_MS - 1, "0", 1, "0", "0", "0"]
+            for r in rows
+        ]
+        return make_response(200, body, headers)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(kline_downloader, 'time', clock)
+    return clock
+
+
+def make_downloader(session, **kwargs):
+    kwargs.setdefault('max_workers', 1)
+    kwargs.setdefault('max_weight', 6000)
+    return KlineDownloader(base_url='http://binance.test', session=session, **kwargs)
+
+
+def download_all(downloader, data):
+    return downloader.download('BTCUSDT', INTERVAL, int(data['timestamp'][0]), int(data['timestamp'][-1]))
+
+
+def test_chunks_are_reassembled_in_order(clock, make_klines):
+    data = make_klines(2500)
+    session = FakeSession(data, clock)
+    downloader = make_downloader(session, max_workers=4)
+
+    result = download_all(downloader, data)
+
+    assert len(session.calls) == 3
+    assert (result == data).all()
+
+
+def test_retry_after_is_respected(clock, make_klines):
+    data = make_klines(500)
+    session = FakeSession(data, clock, script=[(429, {'code': -1003}, {'Retry-After': '7'})])
+    downloader = make_downloader(session)
+
+    result = download_all(downloader, data)
+
+    (first, _), (second, _) = session.calls
+    assert second - first >= 7
+    assert (result == data).all()
+
+
+def test_waits_for_next_minute_when_weight_is_used_up(clock, make_klines):
+    data = make_klines(2000)
+    # Cada resposta informa peso 10: a segunda requisição (peso 5) passaria de max_weight
+    session = FakeSession(data, clock, weight_step=10)
+    downloader = make_downloader(session, max_weight=10)
+
+    result = download_all(downloader, data)
+
+    (first, _), (second, _) = session.calls
+    assert int(second // 60) == int(first // 60) + 1
+    assert (result == data).all()
+
+
+def test_server_errors_are_retried_with_exponential_backoff(clock, make_klines):
+    data = make_klines(500)
+    session = FakeSession(data, clock, script=[
+        (500, {'code': -1000}, {}),
+        (503, b'Service Unavailable', {}),
+        (200, b'{"truncated": ', {}),
+    ])
+    downloader = make_downloader(session, backoff=0.5)
+
+    result = download_all(downloader, data)
+
+    assert len(session.calls) == 4
+    assert clock.sleeps == [0.5, 1.0, 2.0]
+    assert (result == data).all()
+
+
+def test_gives_up_after_max_retries(clock, make_klines):
+    data = make_klines(10)
+    session = FakeSession(data, clock, script=[(500, {'code': -1000}, {})] * 3)
+    downloader = make_downloader(session, max_retries=3)
+
+    with pytest.raises(KlineDownloadError):
+        download_all(downloader, data)
+    assert len(session.calls) == 3
+
+
+def test_client_errors_are_not_retried(clock, make_klines):
+    data = make_klines(10)
+    session = FakeSession(data, clock, script=[(400, {'code': -1121, 'msg': 'Invalid symbol.'}, {})])
+    downloader = make_downloader(session)
+
+    with pytest.raises(KlineDownloadError):
+        download_all(downloader, data)
+    assert len(session.calls) == 1
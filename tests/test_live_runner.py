@@ -0,0 +1,170 @@
+import json
+import asyncio
+from http import HTTPStatus
+import requests
+from websockets.asyncio.server import serve
+from trading_bot.live_runner import LiveRunner
+from trading_bot.replay import SimulatedClock, ReplayClient, RecordingBot
+from trading_bot.telegram_notifier import TelegramNotifier
+from trading_bot.trading_manager import TradingManager
+
+INTERVAL = '1m'
+INTERVAL_MS = 60_000
+WARMUP = 30
+
+
+class FailingOnceClient(ReplayClient):
+    """ReplayClient cuja primeira chamada a get_klines falha como uma queda da API REST"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.failed = False
+
+    def get_klines(self, *args, **kwargs):
+        if not self.failed:
+            self.failed = True
+            raise requests.ConnectionError("REST down")
+        return super().get_klines(*args, **kwargs)
+
+
+def kline_message(row, symbol='BTCUSDT', closed=True):
+    open_time = int(row['timestamp'])
+    return json.dumps({
+        'e': 'kline',
+        's': symbol,
+        'k': {
+            't': open_time, 'T': open_time + INTERVAL_MS - 1, 's': symbol, 'i': INTERVAL,
+            'o': str(row['open']), 'c': str(row['close']), 'h': str(row['high']),
+            'l': str(row['low']), 'v': str(row['volume']), 'x': closed
+        }
+    })
+
+
+def make_runner(data, client_cls=ReplayClient, **kwargs):
+    clock = SimulatedClock()
+    client = client_cls(data, INTERVAL, clock)
+    notifier = TelegramNotifier(bot=RecordingBot(), coalesce_window=0, min_interval=0)
+    trading_manager = TradingManager(enable_chart=False, client=client, notifier=notifier)
+    runner = LiveRunner(trading_manager, interval=INTERVAL, client=client, warmup_candles=WARMUP,
+                        clock=clock, **kwargs)
+    
+    # Horário de abertura de cada candle que chega aos indicadores
+    processed = []
+    update = runner.indicators.update
+
+    def recording_update(candle):
+        processed.append(candle['open_time'])
+        return update(candle)
+    runner.indicators.update = recording_update
+    return runner, clock, processed
+
+
+def close_ms(data, i):
+    return int(data['timestamp'][i]) + INTERVAL_MS
+
+
+def warm_up(runner, clock, data):
+    # Como na Binance, o limit inclui o candle ainda aberto: o aquecimento usa WARMUP - 1 candles
+    clock.advance_to(close_ms(data, WARMUP - 1))
+    runner.warm_up()
+
+
+def processed_open_times(data, start, stop=None):
+    return [int(t) for t in data['timestamp'][start:stop]]
+
+
+def test_duplicate_candle_is_processed_once(make_klines):
+    data = make_klines(WARMUP + 5)
+    runner, clock, processed = make_runner(data)
+    warm_up(runner, clock, data)
+    
+    clock.advance_to(close_ms(data, WARMUP))
+    runner.handle_message(kline_message(data[WARMUP]))
+    runner.handle_message(kline_message(data[WARMUP]))
+    
+    assert processed.count(int(data['timestamp'][WARMUP])) == 1
+    assert runner.last_open_time == int(data['timestamp'][WARMUP])
+
+
+def test_open_candle_is_ignored(make_klines):
+    data = make_klines(WARMUP + 1)
+    runner, clock, processed = make_runner(data)
+    warm_up(runner, clock, data)
+    
+    runner.handle_message(kline_message(data[WARMUP], closed=False))
+    assert processed == processed_open_times(data, 1, WARMUP)
+
+
+def test_gap_is_backfilled_in_order(make_klines):
+    data = make_klines(WARMUP + 4)
+    runner, clock, processed = make_runner(data)
+    warm_up(runner, clock, data)
+    
+    # Candles WARMUP..WARMUP+2 perdidos no stream; o próximo evento dispara o backfill via REST
+    clock.advance_to(close_ms(data, WARMUP + 3))
+    runner.handle_message(kline_message(data[WARMUP + 3]))
+    
+    assert processed == processed_open_times(data, 1)
+
+
+def test_malformed_messages_are_ignored(make_klines):
+    data = make_klines(WARMUP + 1)
+    runner, clock, processed = make_runner(data)
+    warm_up(runner, clock, data)
+    
+    for message in ('not json', '[]', '{"e": "kline"}', '{"e": "kline", "k": {"x": true}}',
+                    '{"e": "kline", "k": {"x": true, "t": "bad"}}'):
+        runner.handle_message(message)
+    assert processed == processed_open_times(data, 1, WARMUP)
+
+
+def test_reconnects_after_rejection_rest_error_and_server_close(make_klines):
+    data = make_klines(WARMUP + 20)
+    runner, clock, processed = make_runner(data, client_cls=FailingOnceClient, reconnect_delay=0.01)
+    clock.advance_to(close_ms(data, WARMUP - 1))
+    attempts = []
+
+    def process_request(connection, request):
+        attempts.append(request.path)
+        # Primeira tentativa: handshake recusado como em um 503 da Binance
+        if len(attempts) == 1:
+            return connection.respond(HTTPStatus.SERVICE_UNAVAILABLE, "busy\n")
+
+    async def handler(ws):
+        connection = len(attempts)
+        if connection == 2:
+            segment = range(WARMUP, WARMUP + 8)
+        else:
+            # Candles WARMUP+8..WARMUP+11 fecharam com o stream fora do ar (recuperados no backfill)
+            segment = range(WARMUP + 12, len(data))
+        for i in segment:
+            clock.advance_to(close_ms(data, i))
+            await ws.send(kline_message(data[i]))
+        if connection == 2:
+            clock.advance_to(close_ms(data, WARMUP + 11))
+        # Encerramento limpo pelo servidor
+    
+    last_open_time = int(data['timestamp'][-1])
+    update = runner.indicators.update
+
+    def stop_at_end(candle):
+        result = update(candle)
+        if candle['open_time'] == last_open_time:
+            runner.stop()
+        return result
+    runner.indicators.update = stop_at_end
+
+    async def scenario():
+        async with serve(handler, '127.0.0.1', 0, process_request=process_request) as server:
+            port = server.sockets[0].getsockname()[1]
+            runner.stream_url = f"ws://127.0.0.1:{port}"
+            await asyncio.wait_for(runner.run(), timeout=10)
+    
+    asyncio.run(scenario())
+    
+    # Warm-up falhou uma vez (REST), o handshake foi recusado uma vez, e depois de
+    # duas conexões todos os candles foram processados uma única vez e em ordem
+    assert runner.client.failed
+    assert len(attempts) == 3
+    assert processed == processed_open_times(data, 1)
+
@@ -0,0 +1,69 @@
+import os
+import time
+import logging
+import pytest
+from trading_bot.logger import Logger, _BatchedRotatingFileHandler
+
+
+def record(message):
+    return logging.LogRecord('test', logging.INFO, __file__, 0, message, None, None)
+
+
+def wait_written(listener, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not listener.queue.empty() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    time.sleep(0.05)
+    listener.flush()
+
+
+def test_rotation_counts_encoded_bytes(tmp_path):
+    path = tmp_path / 'bytes.log'
+    handler = _BatchedRotatingFileHandler(str(path), max_bytes=100, backup_count=10)
+    handler.setFormatter(logging.Formatter('%(message)s'))
+    for _ in range(20):
+        # 20 caracteres, 40 bytes em UTF-8
+        handler.emit(record('ç' * 20))
+    handler.close()
+
+    files = list(tmp_path.glob('bytes.log*'))
+    assert len(files) > 1
+    assert all(f.stat().st_size <= 100 for f in files)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason="requer os.fork")
+def test_forked_child_does_not_reemit_parent_records(monkeypatch):
+    monkeypatch.setenv('LOG_QUEUE', 'true')
+    monkeypatch.setenv('LOG_LEVEL', 'INFO')
+    logger = Logger('fork_test')
+    listener = Logger._listeners[-1]
+    file_handler = next(h for h in listener.handlers if isinstance(h, _BatchedRotatingFileHandler))
+
+    # Com o arquivo travado os registros do pai ficam na fila no momento do fork
+    file_handler.acquire()
+    try:
+        for i in range(3):
+            logger.info("parent %d", i)
+        time.sleep(0.05)
+        pid = os.fork()
+        if pid == 0:
+            try:
+                logger.info("child")
+                wait_written(Logger._listeners[-1])
+            finally:
+                os._exit(0)
+    finally:
+        file_handler.release()
+    os.waitpid(pid, 0)
+    wait_written(listener)
+
+    root, ext = os.path.splitext(file_handler.baseFilename)
+    with open(file_handler.baseFilename, encoding='utf-8') as f:
+        parent_log = f.read()
+    with open(f"{root}_{pid}{ext}", encoding='utf-8') as f:
+        child_log = f.read()
+
+    assert [parent_log.count(f"parent {i}") for i in range(3)] == [1, 1, 1]
+    assert "child" not in parent_log
+    assert "parent" not in child_log
+    assert "child" in child_log
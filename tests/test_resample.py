@@ -0,0 +1,68 @@
+import numpy as np
+import pandas as pd
+import pytest
+from trading_bot.resample import bar_open_times, resample_klines
+
+# Quarta-feira, 2024-01-03 00:07 UTC: começa no meio de um candle de 15m, 4h e 1w
+START_MS = int(pd.Timestamp('2024-01-03 00:07', tz='UTC').value // 1_000_000)
+
+
+def ms(text):
+    return int(pd.Timestamp(text, tz='UTC').value // 1_000_000)
+
+
+def expected_bars(data, interval):
+    """Agregação de referência com pandas; as semanas da Binance começam na segunda-feira"""
+    times = pd.to_datetime(data['timestamp'], unit='ms', utc=True)
+    if interval == '1w':
+        opens = times.normalize() - pd.to_timedelta(times.dayofweek, unit='D')
+    else:
+        opens = times.floor({'15m': '15min', '4h': '4h'}[interval])
+    df = pd.DataFrame({name: data[name] for name in ('open', 'high', 'low', 'close', 'volume')})
+    df['bar'] = (opens - pd.Timestamp(0, tz='UTC')) // pd.Timedelta(milliseconds=1)
+    bars = df.groupby('bar').agg(
+        open=('open', 'first'), high=('high', 'max'), low=('low', 'min'),
+        close=('close', 'last'), volume=('volume', 'sum'), count=('open', 'size')
+    )
+    # Sem lacunas na série: só as barras das pontas ficam incompletas
+    bar_minutes = {'15m': 15, '4h': 240, '1w': 7 * 24 * 60}[interval]
+    return bars[bars['count'] == bar_minutes]
+
+
+def test_bar_open_times_follow_binance_alignment():
+    timestamps = [ms('2024-01-03 00:29:59'), ms('2024-01-03 05:30'), ms('2024-01-07 23:59'), ms('2024-01-08 00:00')]
+    assert bar_open_times(timestamps, '15m').tolist() == [
+        ms('2024-01-03 00:15'), ms('2024-01-03 05:30'), ms('2024-01-07 23:45'), ms('2024-01-08 00:00')
+    ]
+    assert bar_open_times(timestamps, '4h').tolist() == [
+        ms('2024-01-03 00:00'), ms('2024-01-03 04:00'), ms('2024-01-07 20:00'), ms('2024-01-08 00:00')
+    ]
+    # Semana de segunda a domingo (o epoch foi uma quinta-feira)
+    assert bar_open_times(timestamps, '1w').tolist() == [
+        ms('2024-01-01'), ms('2024-01-01'), ms('2024-01-01'), ms('2024-01-08')
+    ]
+
+
+@pytest.mark.parametrize('interval, first_open, last_open', [
+    ('15m', '2024-01-03 00:15', '2024-01-22 23:45'),
+    ('4h', '2024-01-03 04:00', '2024-01-22 20:00'),
+    ('1w', '2024-01-08', '2024-01-15'),
+])
+def test_resample_aggregates_and_drops_partial_edge_bars(make_klines, interval, first_open, last_open):
+    # 20 dias de 1m: termina em 2024-01-23 00:06, no meio da última barra de cada intervalo
+    data = make_klines(20 * 24 * 60, start_ms=START_MS)
+    data['volume'] = np.arange(len(data)) % 97 + 1.0
+    
+    bars = resample_klines(data, interval)
+    expected = expected_bars(data, interval)
+    
+    assert bars['timestamp'][0] == ms(first_open)
+    assert bars['timestamp'][-1] == ms(last_open)
+    assert bars['timestamp'].tolist() == expected.index.tolist()
+    for column in ('open', 'high', 'low', 'close', 'volume'):
+        np.testing.assert_allclose(bars[column], expected[column].to_numpy())
+
+
+def test_interval_must_be_a_multiple_of_the_base(make_klines):
+    with pytest.raises(ValueError):
+        resample_klines(make_klines(10), '15m', base_interval='4h')
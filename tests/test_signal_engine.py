@@ -0,0 +1,43 @@
+import functools
+import pytest
+import pandas as pd
+from trading_bot import trading_manager as trading_manager_module
+from trading_bot.signal_engine import find_trades
+from trading_bot.synthetic_data import generate_candles
+from trading_bot.trading_manager import TradingManager
+
+PARAMS = [
+    {},
+    {'ma_short_period': 5, 'ma_long_period': 30, 'stop_loss_percent': 0.005, 'take_profit_percent': 0.01},
+    {'ma_short_period': 12, 'ma_long_period': 26, 'stop_loss_percent': 0.03, 'take_profit_percent': 0.05},
+]
+
+# Blocos pequenos fazem as posições atravessarem várias fronteiras de bloco do find_trades
+CHUNK_SIZES = [64, 1, 3]
+
+
+def simulate(data, params, vectorized):
+    trading_manager = TradingManager(is_backtest=True, params=params, enable_chart=False)
+    result = trading_manager.run_simulation(data, vectorized=vectorized)
+    return trading_manager, result
+
+
+@pytest.mark.parametrize('regime', ['random_walk', 'trending', 'high_volatility'])
+@pytest.mark.parametrize('seed', [1, 7, 42])
+@pytest.mark.parametrize('params', PARAMS, ids=['default', 'tight', 'wide'])
+def test_vectorized_engine_matches_candle_loop(regime, seed, params, monkeypatch):
+    data = generate_candles(1500, regime=regime, seed=seed)
+    loop_manager, loop_result = simulate(data, params, vectorized=False)
+    assert len(loop_manager.ledger) > 0
+    
+    for chunk_size in CHUNK_SIZES:
+        monkeypatch.setattr(trading_manager_module, 'find_trades', functools.partial(find_trades, chunk_size=chunk_size))
+        vectorized_manager, vectorized_result = simulate(data, params, vectorized=True)
+        
+        pd.testing.assert_frame_equal(vectorized_manager.ledger.to_dataframe(), loop_manager.ledger.to_dataframe())
+        assert vectorized_result['metrics'] == loop_result['metrics']
+        
+        # Posição aberta no fim do histórico: mesmos stops (já movidos pelo trailing)
+        assert vectorized_manager.current_position == loop_manager.current_position
+        assert vectorized_manager.stop_loss_price == loop_manager.stop_loss_price
+        assert vectorized_manager.take_profit_price == loop_manager.take_profit_price
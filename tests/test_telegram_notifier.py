@@ -0,0 +1,168 @@
+import time
+import asyncio
+import threading
+from telegram.error import RetryAfter
+from trading_bot.telegram_notifier import TelegramNotifier
+from trading_bot.replay import RecordingBot
+
+
+class FlakyBot(RecordingBot):
+    """Raises RetryAfter on the first calls"""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+        self.calls = 0
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise RetryAfter(0)
+        await super().send_message(chat_id, text, parse_mode)
+
+
+class StalledBot(RecordingBot):
+    """Blocks inside send_message until release is set"""
+
+    def __init__(self):
+        super().__init__()
+        self.release = threading.Event()
+        self.sending = threading.Event()
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        self.sending.set()
+        while not self.release.is_set():
+            await asyncio.sleep(0.01)
+        await super().send_message(chat_id, text, parse_mode)
+
+
+class FailingOnceBot(RecordingBot):
+    """Raises a non-Telegram error on the first send"""
+
+    def __init__(self):
+        super().__init__()
+        self.failed = False
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        if not self.failed:
+            self.failed = True
+            raise ValueError("unexpected")
+        await super().send_message(chat_id, text, parse_mode)
+
+
+class BrokenInitBot(RecordingBot):
+    """initialize fails (bad token, no network) on the first attempts"""
+
+    def __init__(self, failures):
+        super().__init__()
+        self.failures = failures
+        self.attempts = 0
+
+    async def initialize(self):
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise RuntimeError("network down")
+
+    async def shutdown(self):
+        pass
+
+
+def make_notifier(bot, **kwargs):
+    kwargs.setdefault('coalesce_window', 0)
+    kwargs.setdefault('min_interval', 0)
+    return TelegramNotifier(bot=bot, **kwargs)
+
+
+def test_burst_is_coalesced_into_one_message():
+    bot = RecordingBot()
+    notifier = make_notifier(bot, coalesce_window=0.3)
+    for i in range(3):
+        notifier.send_message(f"order {i}")
+    assert notifier.flush(timeout=5)
+    notifier.close()
+    
+    assert bot.messages == ["order 0\n\norder 1\n\norder 2"]
+
+
+def test_coalesced_message_respects_telegram_limit():
+    parts = TelegramNotifier._coalesce(['a' * 3000, 'b' * 3000, 'c' * 5000])
+    assert all(len(text) <= 4096 for text, _ in parts)
+    assert ''.join(text.replace('\n\n', '') for text, _ in parts) == 'a' * 3000 + 'b' * 3000 + 'c' * 5000
+    # A line over the limit can only be cut anywhere: those pieces go out as plain text
+    assert [parse_mode for text, parse_mode in parts if 'c' in text] == [None, None]
+
+
+def test_oversized_message_is_split_on_line_boundaries():
+    message = "\n".join(f"<b>Order {i}</b> &amp; fill" for i in range(500))
+    parts = TelegramNotifier._coalesce([message])
+    
+    assert len(parts) > 1
+    assert all(len(text) <= 4096 and parse_mode == 'HTML' for text, parse_mode in parts)
+    assert all(text.count('<b>') == text.count('</b>') for text, _ in parts)
+    assert "\n".join(text for text, _ in parts) == message
+
+
+def test_retry_after_is_respected_and_message_delivered():
+    bot = FlakyBot(failures=2)
+    notifier = make_notifier(bot)
+    notifier.send_message("buy")
+    assert notifier.flush(timeout=5)
+    notifier.close()
+    
+    assert bot.calls == 3
+    assert bot.messages == ["buy"]
+
+
+def test_send_message_never_blocks_when_queue_is_full():
+    bot = StalledBot()
+    notifier = make_notifier(bot, max_queue_size=1)
+    notifier.send_message("first")
+    assert bot.sending.wait(5)
+    notifier.send_message("second")
+    
+    start = time.monotonic()
+    notifier.send_message("third")
+    assert time.monotonic() - start < 0.5
+    assert notifier.dropped_messages == 1
+    bot.release.set()
+    notifier.close()
+
+
+def test_close_returns_with_stalled_sender_and_full_queue():
+    bot = StalledBot()
+    notifier = make_notifier(bot, max_queue_size=1)
+    notifier.send_message("first")
+    assert bot.sending.wait(5)
+    notifier.send_message("second")
+    
+    start = time.monotonic()
+    notifier.close(timeout=0.2)
+    assert time.monotonic() - start < 2
+    bot.release.set()
+
+
+def test_unexpected_bot_error_does_not_kill_sender():
+    bot = FailingOnceBot()
+    notifier = make_notifier(bot)
+    notifier.send_message("a")
+    assert notifier.flush(timeout=5)
+    assert notifier.dropped_messages == 1
+    
+    notifier.send_message("b")
+    assert notifier.flush(timeout=5)
+    notifier.close()
+    assert bot.messages == ["b"]
+
+
+def test_failed_initialize_drops_messages_and_is_retried():
+    bot = BrokenInitBot(failures=1)
+    notifier = make_notifier(bot)
+    notifier.send_message("lost")
+    assert notifier.flush(timeout=5)
+    assert notifier.dropped_messages == 1
+    
+    notifier.send_message("delivered")
+    assert notifier.flush(timeout=5)
+    notifier.close()
+    assert bot.attempts == 2
+    assert bot.messages == ["delivered"]
@@ -0,0 +1,24 @@
+import numpy as np
+from trading_bot.tick_replay import TickStore
+
+
+def test_interrupted_append_is_discarded(tmp_path):
+    store = TickStore(str(tmp_path / 'ticks'))
+    store.append([1000, 2000, 3000], [10.0, 20.0, 30.0], [1.0, 1.0, 1.0])
+    
+    # Import interrompido: só timestamp.bin recebeu os novos ticks (e meio valor de price.bin)
+    with open(store._column_path('timestamp'), 'ab') as f:
+        np.array([4000, 5000], dtype='<i8').tofile(f)
+    with open(store._column_path('price'), 'ab') as f:
+        f.write(b'\x00' * 4)
+    
+    reopened = TickStore(store.path)
+    assert len(reopened) == 3
+    timestamps, prices = reopened.window(0, 10_000)
+    assert list(timestamps) == [1000, 2000, 3000]
+    assert list(prices) == [10.0, 20.0, 30.0]
+    
+    reopened.append([4000], [40.0], [2.0])
+    timestamps, prices = reopened.window(0, 10_000)
+    assert list(timestamps) == [1000, 2000, 3000, 4000]
+    assert list(prices) == [10.0, 20.0, 30.0, 40.0]
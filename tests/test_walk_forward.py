@@ -0,0 +1,35 @@
+import pytest
+from trading_bot.synthetic_data import generate_candles
+from trading_bot.trading_manager import TradingManager
+from trading_bot.walk_forward import WalkForwardManager, walk_forward_folds
+
+
+def test_test_windows_do_not_overlap():
+    folds = walk_forward_folds(100, train_size=50, test_size=10, step=20)
+    assert folds == [(0, 50, 50, 60), (20, 70, 70, 80), (40, 90, 90, 100)]
+    assert all(prev[3] <= nxt[2] for prev, nxt in zip(folds, folds[1:]))
+
+
+def test_step_smaller_than_test_size_is_rejected():
+    with pytest.raises(ValueError):
+        walk_forward_folds(100, train_size=50, test_size=10, step=5)
+
+
+def test_indicators_are_computed_once_per_period_group(tmp_path, monkeypatch):
+    # Os workers (fork) herdam o patch e anotam cada cálculo em um arquivo
+    calls = tmp_path / 'calls'
+    calculate_indicators = TradingManager.calculate_indicators
+
+    def counted(self, df):
+        with open(calls, 'a') as f:
+            f.write(f"{self.ma_short_period},{self.ma_long_period}\n")
+        return calculate_indicators(self, df)
+    monkeypatch.setattr(TradingManager, 'calculate_indicators', counted)
+    
+    data = generate_candles(3000, seed=1)
+    walk_forward = WalkForwardManager(data, train_size=1200, test_size=300, max_workers=2)
+    grid = {'ma_short_period': [5, 9], 'ma_long_period': [21, 30], 'stop_loss_percent': [0.01, 0.02]}
+    results = walk_forward.grid_search(grid)
+    
+    assert len(results['reports']) == len(walk_forward.folds) == 6
+    assert sorted(calls.read_text().split()) == ['5,21', '5,30', '9,21', '9,30']
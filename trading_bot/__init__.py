@@ -1,6 +1,23 @@
-from .trading_manager import TradingManager
-from .order_manager import OrderManager
-from .telegram_notifier import TelegramNotifier
-from .logger import Logger
+# Os módulos são carregados sob demanda (PEP 562): importar o pacote não traz
+# pandas, Plotly, Binance nem Telegram até que a classe correspondente seja usada
+_LAZY_ATTRS = {
+    'TradingManager': '.trading_manager',
+    'OrderManager': '.order_manager',
+    'TelegramNotifier': '.telegram_notifier',
+    'Logger': '.logger',
+}
 
-__all__ = ['TradingManager', 'OrderManager', 'TelegramNotifier', 'Logger'] 
\ No newline at end of file
+__all__ = ['TradingManager', 'OrderManager', 'TelegramNotifier', 'Logger']
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        import importlib
+        value = getattr(importlib.import_module(_LAZY_ATTRS[name], __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
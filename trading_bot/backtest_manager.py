@@ -1,15 +1,17 @@
 import os
 import pandas as pd
+import numpy as np
 from datetime import datetime, timedelta
-from dotenv import load_dotenv
-from binance.client import Client
+from .config import load_env
 from .logger import Logger
+from .kline_cache import KlineCache, array_to_frame, to_milliseconds
+from .instrumentation import timed, instrumentation
 
 # Carregar variáveis de ambiente
-load_dotenv()
+load_env()
 
 class BacktestManager:
-    def __init__(self, symbol, start_date=None, end_date=None, interval=Client.KLINE_INTERVAL_15MINUTE):
+    def __init__(self, symbol, start_date=None, end_date=None, interval='15m', use_cache=True, offline=None, base_interval=None):
         """Inicializa o BacktestManager
         
         Args:
@@ -17,12 +19,16 @@ class BacktestManager:
             start_date (datetime, opcional): Data inicial do backtest. Se None, usa 7 dias atrás
             end_date (datetime, opcional): Data final do backtest. Se None, usa data atual
             interval (str, opcional): Intervalo dos candles. Padrão: 15 minutos
+            use_cache (bool, opcional): Usa o cache local de candles (KLINE_CACHE_DIR). Padrão: True
+            offline (bool, opcional): Usa apenas o cache, sem acessar a Binance.
+                Se None, usa BACKTEST_OFFLINE do .env
+            base_interval (str, opcional): Intervalo base (ex: '1m') do qual os demais são
+                derivados, sem baixar nem armazenar cada intervalo. Requer o cache.
+                Se None, usa KLINE_BASE_INTERVAL do .env (vazio: baixa o próprio intervalo)
         """
-        # Configurar cliente Binance
-        self.client = Client(
-            os.getenv('BINANCE_API_KEY'),
-            os.getenv('BINANCE_API_SECRET')
-        )
+        # Cliente Binance e downloader são criados apenas quando for necessário buscar dados
+        self._client = None
+        self._downloader = None
         self.symbol = symbol
         self.interval = interval
         
@@ -39,9 +45,54 @@ class BacktestManager:
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         self.logger = Logger("backtest")
         
+        # Configurar cache local de candles
+        if offline is None:
+            offline = os.getenv('BACKTEST_OFFLINE', 'false').lower() in ('1', 'true', 'yes')
+        self.offline = offline
+        self.cache = None
+        if use_cache or offline:
+            self.cache = KlineCache(
+                cache_dir=os.getenv('KLINE_CACHE_DIR', 'data/klines'),
+                fetcher=self._fetch_klines,
+                offline=offline
+            )
+        
+        # Intervalos maiores derivados de uma única série base
+        if base_interval is None:
+            base_interval = os.getenv('KLINE_BASE_INTERVAL', '')
+        self.resampler = None
+        if base_interval and self.cache is not None:
+            from .resample import TimeframeResampler
+            self.resampler = TimeframeResampler(self.cache, base_interval)
+        
         # Obter dados históricos
         self.historical_data = None
 
+    @property
+    def client(self):
+        """Cliente Binance, criado na primeira utilização"""
+        if self._client is None:
+            from binance.client import Client
+            self._client = Client(
+                os.getenv('BINANCE_API_KEY'),
+                os.getenv('BINANCE_API_SECRET')
+            )
+        return self._client
+
+    @property
+    def downloader(self):
+        """Downloader de klines (requisições paralelas, respeitando o peso da Binance)"""
+        if self._downloader is None:
+            from .kline_downloader import KlineDownloader
+            self._downloader = KlineDownloader()
+        return self._downloader
+
+    def _fetch_klines(self, symbol, interval, start_ms, end_ms):
+        """Busca na Binance os klines de um trecho (usado pelo cache)"""
+        self.logger.info(f"Baixando candles faltantes: {pd.to_datetime(start_ms, unit='ms')} até {pd.to_datetime(end_ms, unit='ms')}")
+        return self.downloader.download(symbol, interval, start_ms, end_ms)
+
+    @timed('data_fetch')
     def get_historical_data(self):
         """Obtém dados históricos da Binance
         
@@ -53,28 +104,22 @@ class BacktestManager:
             self.logger.info(f"Período: {self.start_date} até {self.end_date}")
             self.logger.info(f"Intervalo: {self.interval}")
             
-            # Obter dados da Binance
-            klines = self.client.get_historical_klines(
+            if self.cache is not None:
+                # Com intervalo base, o intervalo pedido é derivado da série base em cache
+                source = self.resampler if self.resampler is not None else self.cache
+                df = source.get_klines(self.symbol, self.interval, self.start_date, self.end_date)
+                self.historical_data = df
+                self.logger.info(f"Dados obtidos com sucesso: {len(df)} candles")
+                return df
+            
+            # Obter dados da Binance (blocos baixados em paralelo, já em formato colunar)
+            data = self.downloader.download(
                 self.symbol,
                 self.interval,
-                self.start_date.strftime("%d %b %Y %H:%M:%S"),
-                self.end_date.strftime("%d %b %Y %H:%M:%S")
+                to_milliseconds(self.start_date),
+                to_milliseconds(self.end_date)
             )
-            
-            # Criar DataFrame
-            df = pd.DataFrame(klines, columns=[
-                'timestamp', 'open', 'high', 'low', 'close', 'volume',
-                'close_time', 'quote_av', 'trades', 'tb_base_av',
-                'tb_quote_av', 'ignore'
-            ])
-            
-            # Converter tipos de dados
-            df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
-            for col in ['open', 'high', 'low', 'close', 'volume']:
-                df[col] = pd.to_numeric(df[col], errors='coerce')
-            
-            # Remover colunas desnecessárias
-            df = df[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+            df = array_to_frame(data)
             
             self.historical_data = df
             self.logger.info(f"Dados obtidos com sucesso: {len(df)} candles")
@@ -85,38 +130,39 @@ class BacktestManager:
             self.logger.error(f"Erro ao obter dados históricos: {str(e)}")
             raise e
 
+    @timed('data_prepare')
     def prepare_backtest_data(self):
         """Prepara os dados para o backtest
         
         Returns:
-            list: Lista de dicionários com os dados dos candles
+            pd.DataFrame: Candles em formato colunar (preços em float64 e timestamp em datetime64)
         """
         if self.historical_data is None:
             self.get_historical_data()
             
-        data = []
-        
-        for _, row in self.historical_data.iterrows():
-            candle = {
-                'timestamp': row['timestamp'],
-                'open': float(row['open']),
-                'high': float(row['high']),
-                'low': float(row['low']),
-                'close': float(row['close']),
-                'volume': float(row['volume'])
-            }
-            data.append(candle)
+        df = self.historical_data[['timestamp', 'open', 'high', 'low', 'close', 'volume']]
+        
+        # Converter apenas as colunas que ainda não estão em float64 (sem cópias desnecessárias)
+        conversions = {
+            col: np.float64 for col in ['open', 'high', 'low', 'close', 'volume']
+            if df[col].dtype != np.float64
+        }
+        if conversions:
+            df = df.astype(conversions)
             
-        return data
+        return df
 
-    def run_backtest(self, trading_manager):
+    def run_backtest(self, trading_manager, ticks=None, store=None):
         """Executa o backtest usando o TradingManager
         
         Args:
             trading_manager: Instância do TradingManager configurada para backtest
+            ticks (TickStore, opcional): Ticks para resolver stop loss/take profit dentro dos candles
+            store (ResultsStore, opcional): Banco onde a execução é gravada (parâmetros,
+                impressão digital dos dados, ordens e métricas)
             
         Returns:
-            dict: Resultados do backtest (ordens e métricas)
+            dict: Resultados do backtest (ordens e métricas, e run_id se gravado)
         """
         # Preparar dados
         data = self.prepare_backtest_data()
@@ -131,7 +177,7 @@ class BacktestManager:
         self.logger.info("="*50 + "\n")
         
         # Executar simulação
-        results = trading_manager.run_simulation(data)
+        results = trading_manager.run_simulation(data, ticks=ticks)
         
         # Log do fim do backtest
         self.logger.info("\n" + "="*50)
@@ -144,9 +190,26 @@ class BacktestManager:
             self.logger.info(f"Total de trades: {metrics['general']['total_trades']}")
             self.logger.info(f"Win rate: {metrics['general']['win_rate']:.2f}%")
             self.logger.info(f"Profit factor: {metrics['profit_loss']['profit_factor']:.2f}")
-            self.logger.info(f"Drawdown máximo: {metrics['risk']['max_drawdown']:.2f}%")
+            self.logger.info(f"Drawdown máximo: {metrics['risk']['max_drawdown']:.2f}% (duração: {metrics['risk']['max_drawdown_duration']})")
+            self.logger.info(f"Sharpe: {metrics['risk']['sharpe_ratio']:.2f} | Sortino: {metrics['risk']['sortino_ratio']:.2f}")
+            self.logger.info(f"Exposição: {metrics['time']['exposure_time']:.1f}% | CAGR: {metrics['profit_loss']['cagr']:.2f}%")
             self.logger.info(f"Lucro líquido: ${metrics['profit_loss']['net_profit']:.2f} ({metrics['profit_loss']['net_profit_percentage']:.2f}%)")
         
         self.logger.info("="*50 + "\n")
         
+        if store is not None:
+            results['run_id'] = store.record_run(
+                trading_manager.strategy_params,
+                metrics,
+                orders=results['orders'],
+                symbol=self.symbol,
+                interval=self.interval,
+                data=data
+            )
+            self.logger.info(f"Execução {results['run_id']} gravada em {store.path}")
+        
+        # Tempo gasto em cada etapa (INSTRUMENTATION=true)
+        if instrumentation.enabled:
+            self.logger.info("Tempo por etapa:\n" + instrumentation.format_summary())
+        
         return results 
\ No newline at end of file
@@ -4,10 +4,57 @@ import plotly.io as pio
 import pandas as pd
 import numpy as np
 from datetime import datetime
+import time
 import os
+import glob
+import json
+import base64
+from .instrumentation import timed, instrumentation
+from .downsample import resample_ohlc, bucket_last, lttb
+
+def _typed_array(values):
+    """Array no formato binário do plotly.js (float64 em base64), bem menor que uma lista JSON"""
+    values = np.ascontiguousarray(values, dtype='<f8')
+    return {'dtype': 'f8', 'bdata': base64.b64encode(values.tobytes()).decode('ascii')}
+
+
+def _optional(value):
+    """NaN vira None (null no JSON)"""
+    return None if np.isnan(value) else float(value)
+
 
 class ChartManager:
-    def __init__(self, prefix=''):
+    # Índices fixos dos traces na figura (criados uma única vez)
+    TRACE_CANDLES = 0
+    TRACE_MA_SHORT = 1
+    TRACE_MA_LONG = 2
+    TRACE_STOP_LOSS = 3
+    TRACE_TAKE_PROFIT = 4
+    TRACE_BUY = 5
+    TRACE_SELL = 6
+
+    def __init__(self, prefix='', render_every=None, render_interval=None, initial_capacity=1024, max_render_points=None, webgl=None, output=None, keep=None):
+        """Inicializa o ChartManager
+        
+        Args:
+            prefix (str): Prefixo para o nome do arquivo do gráfico
+            render_every (int, opcional): Renderiza o HTML a cada N candles. 0 desativa.
+                Se None, usa CHART_RENDER_EVERY do .env (padrão: 0)
+            render_interval (float, opcional): Renderiza o HTML a cada N segundos. 0 desativa.
+                Se None, usa CHART_RENDER_INTERVAL do .env (padrão: 60)
+            initial_capacity (int): Capacidade inicial dos arrays de dados
+            max_render_points (int, opcional): Máximo de candles e pontos por linha no HTML;
+                acima disso os candles são agregados e as linhas decimadas (LTTB). 0 desativa.
+                Se None, usa CHART_MAX_POINTS do .env (padrão: 5000)
+            webgl (bool, opcional): Usa traces WebGL (Scattergl) para linhas e marcadores.
+                Se None, usa CHART_WEBGL do .env (padrão: false)
+            output (str, opcional): 'html' grava um HTML completo, com o plotly.js embutido,
+                a cada renderização; 'json' grava só os dados em um arquivo .json ao lado
+                de uma página de visualização (escrita uma vez) que usa o plotly.min.js
+                compartilhado do diretório charts/. Se None, usa CHART_OUTPUT do .env (padrão: html)
+            keep (int, opcional): Número de gráficos mais recentes mantidos por prefixo
+                (os mais antigos são apagados). 0 mantém todos. Se None, usa CHART_KEEP do .env (padrão: 0)
+        """
         # Criar diretório para salvar os gráficos
         os.makedirs("charts", exist_ok=True)
         
@@ -15,15 +62,51 @@ class ChartManager:
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         prefix_str = f"{prefix}_" if prefix else ""
         self.chart_file = f"charts/{prefix_str}chart_{self.timestamp}.html"
+        self.data_file = f"charts/{prefix_str}chart_{self.timestamp}.json"
+        
+        if output is None:
+            output = os.getenv('CHART_OUTPUT', 'html').lower()
+        if output not in ('html', 'json'):
+            raise ValueError(f"Formato de gráfico inválido: {output}")
+        self.output = output
+        self._viewer_written = False
+        
+        # Apagar gráficos antigos deste prefixo
+        if keep is None:
+            keep = int(os.getenv('CHART_KEEP', '0'))
+        if keep:
+            self._prune_charts(f"charts/{prefix_str}chart_", keep)
         
-        # Dados para o gráfico
-        self.times = []
-        self.open_prices = []
-        self.high_prices = []
-        self.low_prices = []
-        self.close_prices = []
-        self.ma_short = []
-        self.ma_long = []
+        # Frequência de renderização (o HTML só é escrito sob demanda ou nessa cadência)
+        if render_every is None:
+            render_every = int(os.getenv('CHART_RENDER_EVERY', '0'))
+        if render_interval is None:
+            render_interval = float(os.getenv('CHART_RENDER_INTERVAL', '60'))
+        self.render_every = render_every
+        self.render_interval = render_interval
+        self._last_render_size = 0
+        self._last_render_time = time.monotonic()
+        
+        # Tamanho do gráfico renderizado (independe do tamanho do backtest)
+        if max_render_points is None:
+            max_render_points = int(os.getenv('CHART_MAX_POINTS', '5000'))
+        if webgl is None:
+            webgl = os.getenv('CHART_WEBGL', 'false').lower() in ('1', 'true', 'yes')
+        self.max_render_points = max_render_points
+        self.webgl = webgl
+        
+        # Dados para o gráfico em arrays pré-alocados (crescem por duplicação)
+        self._size = 0
+        self._capacity = max(int(initial_capacity), 1)
+        self._times = np.empty(self._capacity, dtype='datetime64[ms]')
+        self._open = np.empty(self._capacity, dtype=np.float64)
+        self._high = np.empty(self._capacity, dtype=np.float64)
+        self._low = np.empty(self._capacity, dtype=np.float64)
+        self._close = np.empty(self._capacity, dtype=np.float64)
+        self._ma_short = np.empty(self._capacity, dtype=np.float64)
+        self._ma_long = np.empty(self._capacity, dtype=np.float64)
+        self._stop_loss = np.empty(self._capacity, dtype=np.float64)
+        self._take_profit = np.empty(self._capacity, dtype=np.float64)
         
         # Dados para marcadores de ordem
         self.buy_points_x = []
@@ -36,15 +119,78 @@ class ChartManager:
         self.take_profit = None
         self.in_position = False
         
+        # Callbacks que recebem cada candle e ordem (ex: ChartServer.publish)
+        self._listeners = []
+        
         # Limite de pontos no gráfico (aumentado para 1000)
         self.max_points = 1000000
         
-        # Criar figura do Plotly
+        # Criar figura do Plotly com todos os traces (atualizados in-place)
         self.fig = go.Figure()
         self._setup_layout()
+        self._setup_traces()
+
+    @staticmethod
+    def _prune_charts(pattern, keep):
+        """Mantém só os keep gráficos mais recentes (HTML e dados) com o prefixo dado"""
+        stems = sorted({os.path.splitext(path)[0] for extension in ('html', 'json')
+                        for path in glob.glob(f"{pattern}[0-9]*_[0-9]*.{extension}")})
+        for stem in stems[:max(len(stems) - (keep - 1), 0)]:
+            for path in (f"{stem}.html", f"{stem}.json"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def add_listener(self, callback):
+        """Registra um callback chamado com um dict a cada candle, compra e venda
         
-        # Salvar gráfico inicial
-        self.save_chart()
+        O callback roda no loop de trading e não deve bloquear.
+        """
+        self._listeners.append(callback)
+
+    def _publish(self, event):
+        for callback in self._listeners:
+            callback(event)
+
+    def _array_names(self):
+        return ('_times', '_open', '_high', '_low', '_close',
+                '_ma_short', '_ma_long', '_stop_loss', '_take_profit')
+    
+    # Visões somente dos dados válidos (sem cópia)
+    @property
+    def times(self):
+        return self._times[:self._size]
+
+    @property
+    def open_prices(self):
+        return self._open[:self._size]
+
+    @property
+    def high_prices(self):
+        return self._high[:self._size]
+
+    @property
+    def low_prices(self):
+        return self._low[:self._size]
+
+    @property
+    def close_prices(self):
+        return self._close[:self._size]
+
+    @property
+    def ma_short(self):
+        return self._ma_short[:self._size]
+
+    @property
+    def ma_long(self):
+        return self._ma_long[:self._size]
+
+    @property
+    def stop_loss_levels(self):
+        return self._stop_loss[:self._size]
+
+    @property
+    def take_profit_levels(self):
+        return self._take_profit[:self._size]
 
     def _setup_layout(self):
         """Configura o layout do gráfico"""
@@ -110,81 +256,13 @@ class ChartManager:
             )
         )
 
-    def update_data(self, current_price, ma_short, ma_long, open_price=None, high_price=None, low_price=None, stop_loss=None, take_profit=None):
-        """Atualiza os dados do gráfico"""
-        current_time = datetime.now()
-        
-        # Se não fornecidos, usar valores apropriados
-        if open_price is None:
-            open_price = current_price
-        if high_price is None:
-            high_price = max(current_price, open_price)
-        if low_price is None:
-            low_price = min(current_price, open_price)
-        
-        # Converter para float e garantir que os valores façam sentido
-        open_price = float(open_price)
-        high_price = float(max(high_price, open_price, current_price))
-        low_price = float(min(low_price, open_price, current_price))
-        current_price = float(current_price)
-        ma_short = float(ma_short)
-        ma_long = float(ma_long)
-        
-        # Adicionar novos dados
-        self.times.append(current_time)
-        self.open_prices.append(open_price)
-        self.high_prices.append(high_price)
-        self.low_prices.append(low_price)
-        self.close_prices.append(current_price)
-        self.ma_short.append(ma_short)
-        self.ma_long.append(ma_long)
-        
-        # Atualizar stop loss e take profit
-        self.stop_loss = float(stop_loss) if stop_loss is not None else None
-        self.take_profit = float(take_profit) if take_profit is not None else None
-        
-        # Limitar o número de pontos apenas se exceder muito o máximo
-        if len(self.times) > self.max_points * 1.5:
-            excess = len(self.times) - self.max_points
-            self.times = self.times[excess:]
-            self.open_prices = self.open_prices[excess:]
-            self.high_prices = self.high_prices[excess:]
-            self.low_prices = self.low_prices[excess:]
-            self.close_prices = self.close_prices[excess:]
-            self.ma_short = self.ma_short[excess:]
-            self.ma_long = self.ma_long[excess:]
-            
-            # Atualizar pontos de compra e venda
-            for i in range(len(self.buy_points_x)):
-                if self.buy_points_x[i] < self.times[0]:
-                    self.buy_points_x.pop(i)
-                    self.buy_points_y.pop(i)
-                    
-            for i in range(len(self.sell_points_x)):
-                if self.sell_points_x[i] < self.times[0]:
-                    self.sell_points_x.pop(i)
-                    self.sell_points_y.pop(i)
-        
-        # Atualizar gráfico
-        self.fig = go.Figure()
-        self._setup_layout()
-
-        # Criar DataFrame com os dados dos candles
-        df = pd.DataFrame({
-            'time': self.times,
-            'open': self.open_prices,
-            'high': self.high_prices,
-            'low': self.low_prices,
-            'close': self.close_prices
-        })
+    def _setup_traces(self):
+        """Cria os traces do gráfico uma única vez (os dados são preenchidos na renderização)"""
+        scatter = go.Scattergl if self.webgl else go.Scatter
         
-        # Adicionar candlesticks
+        # Candlesticks
         self.fig.add_trace(go.Candlestick(
-            x=df['time'],
-            open=df['open'],
-            high=df['high'],
-            low=df['low'],
-            close=df['close'],
+            x=[], open=[], high=[], low=[], close=[],
             name='Preço',
             increasing=dict(
                 line=dict(color='#26A69A', width=1),
@@ -200,119 +278,278 @@ class ChartManager:
             showlegend=True
         ))
         
-        # Adicionar médias móveis
-        self.fig.add_trace(go.Scatter(
-            x=self.times,
-            y=self.ma_short,
+        # Médias móveis
+        self.fig.add_trace(scatter(
+            x=[], y=[],
             mode='lines',
             name=f'Média Curta ({self.max_points})',
             line=dict(color='#F5D300', width=1.5)
         ))
         
-        self.fig.add_trace(go.Scatter(
-            x=self.times,
-            y=self.ma_long,
+        self.fig.add_trace(scatter(
+            x=[], y=[],
             mode='lines',
             name=f'Média Longa ({self.max_points})',
             line=dict(color='#2962FF', width=1.5)
         ))
         
-        # Adicionar stop loss e take profit se estiver em posição
-        if self.in_position and self.stop_loss is not None:
-            self.fig.add_trace(go.Scatter(
-                x=self.times,
-                y=[self.stop_loss] * len(self.times),
-                mode='lines',
-                name='Stop Loss',
-                line=dict(color='#880000', width=1, dash='dash'),
-                showlegend=True
-            ))
-            
-        if self.in_position and self.take_profit is not None:
-            self.fig.add_trace(go.Scatter(
-                x=self.times,
-                y=[self.take_profit] * len(self.times),
-                mode='lines',
-                name='Take Profit',
-                line=dict(color='#008888', width=1, dash='dash'),
-                showlegend=True
-            ))
-        
-        # Adicionar marcadores de compra e venda
-        if len(self.buy_points_x) > 0:
-            self.fig.add_trace(go.Scatter(
-                x=self.buy_points_x,
-                y=self.buy_points_y,
-                mode='markers',
-                name='Compra',
-                marker=dict(
-                    symbol='triangle-up',
-                    size=16,
-                    color='#26A69A',
-                    line=dict(width=2, color='white')
-                ),
-                showlegend=True
-            ))
-        
-        if len(self.sell_points_x) > 0:
-            self.fig.add_trace(go.Scatter(
-                x=self.sell_points_x,
-                y=self.sell_points_y,
-                mode='markers',
-                name='Venda',
-                marker=dict(
-                    symbol='triangle-down',
-                    size=16,
-                    color='#EF5350',
-                    line=dict(width=2, color='white')
-                ),
-                showlegend=True
-            ))
-        
-        # Salvar gráfico
-        self.save_chart()
-
-    def add_buy_point(self, price):
+        # Stop loss e take profit (NaN fora de posição, gerando lacunas na linha)
+        self.fig.add_trace(scatter(
+            x=[], y=[],
+            mode='lines',
+            name='Stop Loss',
+            line=dict(color='#880000', width=1, dash='dash'),
+            showlegend=True
+        ))
+        
+        self.fig.add_trace(scatter(
+            x=[], y=[],
+            mode='lines',
+            name='Take Profit',
+            line=dict(color='#008888', width=1, dash='dash'),
+            showlegend=True
+        ))
+        
+        # Marcadores de compra e venda
+        self.fig.add_trace(scatter(
+            x=[], y=[],
+            mode='markers',
+            name='Compra',
+            marker=dict(
+                symbol='triangle-up',
+                size=16,
+                color='#26A69A',
+                line=dict(width=2, color='white')
+            ),
+            showlegend=True
+        ))
+        
+        self.fig.add_trace(scatter(
+            x=[], y=[],
+            mode='markers',
+            name='Venda',
+            marker=dict(
+                symbol='triangle-down',
+                size=16,
+                color='#EF5350',
+                line=dict(width=2, color='white')
+            ),
+            showlegend=True
+        ))
+
+    def _ensure_capacity(self, required):
+        """Garante espaço nos arrays, duplicando a capacidade quando necessário"""
+        if required <= self._capacity:
+            return
+        new_capacity = self._capacity
+        while new_capacity < required:
+            new_capacity *= 2
+        for name in self._array_names():
+            old = getattr(self, name)
+            new = np.empty(new_capacity, dtype=old.dtype)
+            new[:self._size] = old[:self._size]
+            setattr(self, name, new)
+        self._capacity = new_capacity
+
+    def _trim(self):
+        """Descarta os pontos mais antigos quando o limite de pontos é excedido"""
+        excess = self._size - self.max_points
+        for name in self._array_names():
+            array = getattr(self, name)
+            array[:self.max_points] = array[excess:self._size]
+        self._size = self.max_points
+        self._last_render_size = max(self._last_render_size - excess, 0)
+        
+        # Atualizar pontos de compra e venda
+        first_time = self._times[0]
+        buy_points = [(x, y) for x, y in zip(self.buy_points_x, self.buy_points_y)
+                      if np.datetime64(x, 'ms') >= first_time]
+        sell_points = [(x, y) for x, y in zip(self.sell_points_x, self.sell_points_y)
+                       if np.datetime64(x, 'ms') >= first_time]
+        self.buy_points_x = [x for x, _ in buy_points]
+        self.buy_points_y = [y for _, y in buy_points]
+        self.sell_points_x = [x for x, _ in sell_points]
+        self.sell_points_y = [y for _, y in sell_points]
+
+    @timed('chart_update')
+    def update_data(self, current_price, ma_short, ma_long, open_price=None, high_price=None, low_price=None, stop_loss=None, take_profit=None, timestamp=None):
+        """Adiciona um candle aos dados do gráfico
+        
+        O HTML não é reescrito aqui: a renderização acontece em save_chart()
+        ou na cadência configurada por render_every/render_interval.
+        """
+        current_time = timestamp if timestamp is not None else datetime.now()
+        
+        # Se não fornecidos, usar valores apropriados
+        if open_price is None:
+            open_price = current_price
+        if high_price is None:
+            high_price = max(current_price, open_price)
+        if low_price is None:
+            low_price = min(current_price, open_price)
+        
+        # Converter para float e garantir que os valores façam sentido
+        open_price = float(open_price)
+        high_price = float(max(high_price, open_price, current_price))
+        low_price = float(min(low_price, open_price, current_price))
+        current_price = float(current_price)
+        
+        # Atualizar stop loss e take profit
+        self.stop_loss = float(stop_loss) if stop_loss is not None else None
+        self.take_profit = float(take_profit) if take_profit is not None else None
+        
+        # Adicionar novos dados
+        self._ensure_capacity(self._size + 1)
+        i = self._size
+        self._times[i] = np.datetime64(current_time, 'ms')
+        self._open[i] = open_price
+        self._high[i] = high_price
+        self._low[i] = low_price
+        self._close[i] = current_price
+        self._ma_short[i] = float(ma_short)
+        self._ma_long[i] = float(ma_long)
+        self._stop_loss[i] = self.stop_loss if self.in_position and self.stop_loss is not None else np.nan
+        self._take_profit[i] = self.take_profit if self.in_position and self.take_profit is not None else np.nan
+        self._size += 1
+        
+        if self._listeners:
+            self._publish({
+                'type': 'candle',
+                't': int(self._times[i].astype(np.int64)),
+                'o': open_price,
+                'h': high_price,
+                'l': low_price,
+                'c': current_price,
+                'ma_short': _optional(self._ma_short[i]),
+                'ma_long': _optional(self._ma_long[i]),
+                'sl': _optional(self._stop_loss[i]),
+                'tp': _optional(self._take_profit[i])
+            })
+        
+        # Limitar o número de pontos apenas se exceder muito o máximo
+        if self._size > self.max_points * 1.5:
+            self._trim()
+        
+        self._maybe_render()
+
+    @timed('chart_update')
+    def extend_data(self, times, open_prices, high_prices, low_prices, close_prices, ma_short, ma_long, stop_loss=None, take_profit=None):
+        """Adiciona vários candles de uma vez (usado pela simulação vetorizada)
+        
+        Args:
+            times (array-like): Horários dos candles
+            open_prices, high_prices, low_prices, close_prices (array-like): OHLC
+            ma_short, ma_long (array-like): Médias móveis
+            stop_loss, take_profit (array-like, opcional): Níveis por candle (NaN fora de posição)
+        """
+        count = len(close_prices)
+        if count == 0:
+            return
+        self._ensure_capacity(self._size + count)
+        window = slice(self._size, self._size + count)
+        self._times[window] = np.asarray(times, dtype='datetime64[ms]')
+        self._open[window] = open_prices
+        self._close[window] = close_prices
+        self._high[window] = np.maximum(np.maximum(high_prices, open_prices), close_prices)
+        self._low[window] = np.minimum(np.minimum(low_prices, open_prices), close_prices)
+        self._ma_short[window] = ma_short
+        self._ma_long[window] = ma_long
+        self._stop_loss[window] = stop_loss if stop_loss is not None else np.nan
+        self._take_profit[window] = take_profit if take_profit is not None else np.nan
+        self._size += count
+        
+        if self._size > self.max_points * 1.5:
+            self._trim()
+        
+        self._maybe_render()
+
+    def _maybe_render(self):
+        """Renderiza o gráfico se a cadência configurada foi atingida"""
+        if self.render_every and self._size - self._last_render_size >= self.render_every:
+            self.save_chart()
+        elif self.render_interval and time.monotonic() - self._last_render_time >= self.render_interval:
+            self.save_chart()
+
+    def _current_time(self):
+        """Retorna o horário do último candle (ou o atual se não houver dados)"""
+        if self._size:
+            return self._times[self._size - 1]
+        return np.datetime64(datetime.now(), 'ms')
+
+    def add_buy_point(self, price, timestamp=None):
         """Adiciona um ponto de compra no gráfico"""
-        current_index = len(self.close_prices) - 1
-        self.buy_points_x.append(self.times[current_index])
+        x = np.datetime64(timestamp, 'ms') if timestamp is not None else self._current_time()
+        self.buy_points_x.append(x)
         self.buy_points_y.append(float(price))
         self.in_position = True
-        
-        # Atualizar gráfico imediatamente
-        self.update_data(
-            current_price=self.close_prices[-1],
-            ma_short=self.ma_short[-1],
-            ma_long=self.ma_long[-1],
-            open_price=self.open_prices[-1],
-            high_price=self.high_prices[-1],
-            low_price=self.low_prices[-1],
-            stop_loss=None,
-            take_profit=None
-        )
+        if self._listeners:
+            self._publish({'type': 'buy', 't': int(x.astype(np.int64)), 'price': float(price)})
 
-    def add_sell_point(self, price):
+    def add_sell_point(self, price, timestamp=None):
         """Adiciona um ponto de venda no gráfico"""
-        current_index = len(self.close_prices) - 1
-        self.sell_points_x.append(self.times[current_index])
+        x = np.datetime64(timestamp, 'ms') if timestamp is not None else self._current_time()
+        self.sell_points_x.append(x)
         self.sell_points_y.append(float(price))
         self.in_position = False
+        if self._listeners:
+            self._publish({'type': 'sell', 't': int(x.astype(np.int64)), 'price': float(price)})
+
+    def _render_data(self):
+        """Dados a plotar, reduzidos a no máximo max_render_points pontos por trace
         
-        # Atualizar gráfico imediatamente
-        self.update_data(
-            current_price=self.close_prices[-1],
-            ma_short=self.ma_short[-1],
-            ma_long=self.ma_long[-1],
-            open_price=self.open_prices[-1],
-            high_price=self.high_prices[-1],
-            low_price=self.low_prices[-1],
-            stop_loss=None,
-            take_profit=None
-        )
+        Candles são agregados em OHLC (abertura do primeiro, máxima, mínima e
+        fechamento do último de cada grupo); as médias móveis são decimadas por
+        LTTB, que preserva picos e vales; stop loss e take profit usam o último
+        nível de cada grupo, mantendo as lacunas fora de posição. Os marcadores
+        de compra e venda são sempre mantidos.
+        
+        Returns:
+            dict: Arrays x/y de cada trace
+        """
+        times = self.times
+        target = self.max_render_points
+        if not target or self._size <= target:
+            return {
+                'candles': (times, self.open_prices, self.high_prices, self.low_prices, self.close_prices),
+                'ma_short': (times, self.ma_short),
+                'ma_long': (times, self.ma_long),
+                'stop_loss': (times, self.stop_loss_levels),
+                'take_profit': (times, self.take_profit_levels)
+            }
+        
+        candles = resample_ohlc(times, self.open_prices, self.high_prices, self.low_prices, self.close_prices, target)
+        x = times.astype(np.int64)
+        ma_short = lttb(x, self.ma_short, target)
+        ma_long = lttb(x, self.ma_long, target)
+        return {
+            'candles': candles,
+            'ma_short': (times[ma_short], self.ma_short[ma_short]),
+            'ma_long': (times[ma_long], self.ma_long[ma_long]),
+            'stop_loss': (candles[0], bucket_last(self.stop_loss_levels, target)),
+            'take_profit': (candles[0], bucket_last(self.take_profit_levels, target))
+        }
 
-    def save_chart(self):
-        """Salva o gráfico em HTML"""
-        config = {
+    def _refresh_traces(self):
+        """Atualiza os dados dos traces existentes sem recriar a figura"""
+        data = self._render_data()
+        times, open_prices, high_prices, low_prices, close_prices = data['candles']
+        with self.fig.batch_update():
+            self.fig.data[self.TRACE_CANDLES].update(
+                x=times,
+                open=open_prices,
+                high=high_prices,
+                low=low_prices,
+                close=close_prices
+            )
+            for index, name in ((self.TRACE_MA_SHORT, 'ma_short'), (self.TRACE_MA_LONG, 'ma_long'),
+                                (self.TRACE_STOP_LOSS, 'stop_loss'), (self.TRACE_TAKE_PROFIT, 'take_profit')):
+                x, y = data[name]
+                self.fig.data[index].update(x=x, y=y)
+            self.fig.data[self.TRACE_BUY].update(x=self.buy_points_x, y=self.buy_points_y)
+            self.fig.data[self.TRACE_SELL].update(x=self.sell_points_x, y=self.sell_points_y)
+
+    def _config(self):
+        return {
             'displayModeBar': True,
             'scrollZoom': True,
             'modeBarButtonsToAdd': ['drawline', 'eraseshape'],
@@ -326,15 +563,97 @@ class ChartManager:
                 'scale': 2
             }
         }
+
+    @timed('chart_render')
+    def save_chart(self):
+        """Renderiza e salva o gráfico (HTML completo ou arquivo de dados, conforme output)"""
+        self._last_render_size = self._size
+        self._last_render_time = time.monotonic()
         
+        if self.output == 'json':
+            self._save_data()
+            return
+        
+        self._refresh_traces()
+        # Os traces são criados (e validados) uma vez em _setup_traces
         self.fig.write_html(
             self.chart_file,
             include_plotlyjs=True,
             full_html=True,
             auto_open=False,
-            config=config,
+            config=self._config(),
+            include_mathjax=False,
+            validate=False,
+            default_width='100%',
+            default_height='100%'
+        )
+        if instrumentation.enabled:
+            instrumentation.add_bytes('chart_render', os.path.getsize(self.chart_file))
+
+    def _write_viewer(self):
+        """Escreve a página de visualização, que carrega os dados do arquivo .json
+        
+        O plotly.js fica em charts/plotly.min.js, compartilhado por todos os
+        gráficos. A página busca os dados periodicamente, então precisa ser
+        aberta por HTTP (ex: python -m http.server -d charts).
+        """
+        refresh_ms = int(max(self.render_interval, 1) * 1000)
+        data_name = os.path.basename(self.data_file)
+        post_script = f"""
+            const chart = document.getElementById('{{plot_id}}');
+            async function refreshChart() {{
+                const response = await fetch('{data_name}?t=' + Date.now(), {{cache: 'no-store'}});
+                if (!response.ok) return;
+                const update = await response.json();
+                const data = chart.data.map((trace, i) => Object.assign({{}}, trace, update.traces[i]));
+                Plotly.react(chart, data, chart.layout);
+            }}
+            refreshChart();
+            setInterval(refreshChart, {refresh_ms});
+        """
+        self.fig.write_html(
+            self.chart_file,
+            include_plotlyjs='directory',
+            full_html=True,
+            auto_open=False,
+            config=self._config(),
             include_mathjax=False,
-            validate=True,
+            validate=False,
+            post_script=post_script,
             default_width='100%',
             default_height='100%'
-        ) 
\ No newline at end of file
+        )
+        self._viewer_written = True
+
+    def _save_data(self):
+        """Grava os dados dos traces no arquivo .json (horários em ms desde epoch)"""
+        if not self._viewer_written:
+            self._write_viewer()
+        
+        data = self._render_data()
+        times, open_prices, high_prices, low_prices, close_prices = data['candles']
+        traces = [None] * len(self.fig.data)
+        traces[self.TRACE_CANDLES] = {
+            'x': _typed_array(times.astype(np.int64)),
+            'open': _typed_array(open_prices),
+            'high': _typed_array(high_prices),
+            'low': _typed_array(low_prices),
+            'close': _typed_array(close_prices)
+        }
+        for index, name in ((self.TRACE_MA_SHORT, 'ma_short'), (self.TRACE_MA_LONG, 'ma_long'),
+                            (self.TRACE_STOP_LOSS, 'stop_loss'), (self.TRACE_TAKE_PROFIT, 'take_profit')):
+            x, y = data[name]
+            traces[index] = {'x': _typed_array(x.astype(np.int64)), 'y': _typed_array(y)}
+        for index, xs, ys in ((self.TRACE_BUY, self.buy_points_x, self.buy_points_y),
+                              (self.TRACE_SELL, self.sell_points_x, self.sell_points_y)):
+            x = np.asarray(xs, dtype='datetime64[ms]').astype(np.int64)
+            traces[index] = {'x': _typed_array(x), 'y': _typed_array(ys)}
+        
+        # Escrita atômica: a página nunca lê um arquivo pela metade
+        payload = json.dumps({'traces': traces}, separators=(',', ':')).encode()
+        temp_file = f"{self.data_file}.tmp"
+        with open(temp_file, 'wb') as f:
+            f.write(payload)
+        os.replace(temp_file, self.data_file)
+        if instrumentation.enabled:
+            instrumentation.add_bytes('chart_render', len(payload))
@@ -0,0 +1,251 @@
+import json
+import queue
+import threading
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from .logger import Logger
+from .instrumentation import instrumentation
+
+# Página do painel: recebe os eventos por Server-Sent Events e acrescenta os
+# pontos com Plotly.extendTraces (um redesenho por quadro, não por evento)
+DASHBOARD_HTML = """<!DOCTYPE html>
+<html>
+<head>
+<meta charset="utf-8">
+<title>Donkey Bot - Ao vivo</title>
+<script src="/plotly.min.js"></script>
+<style>html, body, #chart { margin: 0; height: 100%; background: #131722; }</style>
+</head>
+<body>
+<div id="chart"></div>
+<script>
+const MAX_POINTS = __MAX_POINTS__;
+const chart = document.getElementById('chart');
+const line = (name, color, dash) => ({x: [], y: [], type: 'scattergl', mode: 'lines', name: name,
+                                      line: {color: color, width: dash ? 1 : 1.5, dash: dash}});
+const marker = (name, symbol, color) => ({x: [], y: [], type: 'scattergl', mode: 'markers', name: name,
+                                          marker: {symbol: symbol, size: 16, color: color, line: {width: 2, color: 'white'}}});
+Plotly.newPlot(chart, [
+    {x: [], open: [], high: [], low: [], close: [], type: 'candlestick', name: 'Preço',
+     increasing: {line: {color: '#26A69A'}, fillcolor: '#26A69A'},
+     decreasing: {line: {color: '#EF5350'}, fillcolor: '#EF5350'}},
+    line('Média Curta', '#F5D300'),
+    line('Média Longa', '#2962FF'),
+    line('Stop Loss', '#880000', 'dash'),
+    line('Take Profit', '#008888', 'dash'),
+    marker('Compra', 'triangle-up', '#26A69A'),
+    marker('Venda', 'triangle-down', '#EF5350')
+], {
+    title: {text: 'Donkey Bot - Ao vivo', x: 0.5},
+    plot_bgcolor: '#131722', paper_bgcolor: '#131722', font: {color: '#787B86', family: 'Trebuchet MS'},
+    xaxis: {type: 'date', gridcolor: 'rgba(42, 46, 57, 0.8)', rangeslider: {visible: false}},
+    yaxis: {side: 'right', gridcolor: 'rgba(42, 46, 57, 0.8)'},
+    hovermode: 'x unified', dragmode: 'pan',
+    legend: {x: 0.01, y: 0.99, bgcolor: 'rgba(19, 23, 34, 0.8)', bordercolor: '#2A2E39', borderwidth: 1}
+}, {scrollZoom: true, responsive: true, displaylogo: false});
+
+let pending = [];
+function flush() {
+    const events = pending;
+    pending = [];
+    const candles = events.filter(e => e.type === 'candle');
+    if (candles.length) {
+        const x = candles.map(e => e.t);
+        Plotly.extendTraces(chart, {
+            x: [x], open: [candles.map(e => e.o)], high: [candles.map(e => e.h)],
+            low: [candles.map(e => e.l)], close: [candles.map(e => e.c)]
+        }, [0], MAX_POINTS);
+        Plotly.extendTraces(chart, {
+            x: [x, x, x, x],
+            y: [candles.map(e => e.ma_short), candles.map(e => e.ma_long), candles.map(e => e.sl), candles.map(e => e.tp)]
+        }, [1, 2, 3, 4], MAX_POINTS);
+    }
+    for (const [type, index] of [['buy', 5], ['sell', 6]]) {
+        const markers = events.filter(e => e.type === type);
+        if (markers.length) {
+            Plotly.extendTraces(chart, {x: [markers.map(e => e.t)], y: [markers.map(e => e.price)]}, [index]);
+        }
+    }
+}
+
+const source = new EventSource('/events');
+source.onmessage = (message) => {
+    if (!pending.length) requestAnimationFrame(flush);
+    pending.push(JSON.parse(message.data));
+};
+// Reconexão: o servidor reenvia o histórico, então o gráfico é refeito do zero
+source.onopen = () => {
+    pending = [];
+    for (let i = 0; i < chart.data.length; i++) {
+        const empty = i === 0 ? {x: [[]], open: [[]], high: [[]], low: [[]], close: [[]]} : {x: [[]], y: [[]]};
+        Plotly.restyle(chart, empty, [i]);
+    }
+};
+</script>
+</body>
+</html>
+"""
+
+
+class _Client:
+    __slots__ = ('queue', 'dropped')
+
+    def __init__(self, size):
+        self.queue = queue.Queue(maxsize=size)
+        self.dropped = False
+
+
+class ChartServer:
+    def __init__(self, port=8050, host='127.0.0.1', history=5000, queue_size=10000, client_queue_size=1000):
+        """Painel ao vivo: envia cada candle e ordem ao navegador como um pequeno delta
+        
+        O ChartManager publica os eventos com publish(), que só faz um put_nowait
+        em uma fila limitada (se ela estiver cheia, o evento é descartado e
+        contado em chart_events_dropped). Uma thread própria serializa os eventos
+        e os repassa aos navegadores conectados por Server-Sent Events; o loop de
+        trading nunca espera pela rede nem pelo Plotly.
+        
+        Args:
+            port (int): Porta HTTP do painel
+            host (str): Endereço de escuta (padrão: só a máquina local)
+            history (int): Candles reenviados a cada navegador que se conecta
+            queue_size (int): Capacidade da fila entre o loop de trading e o servidor
+            client_queue_size (int): Eventos pendentes por navegador antes de desconectá-lo
+        """
+        self.host = host
+        self.port = port
+        self.history = history
+        self.client_queue_size = client_queue_size
+        self._events = queue.Queue(maxsize=queue_size)
+        self._candles = deque(maxlen=history)
+        self._markers = []
+        self._clients = set()
+        self._lock = threading.Lock()
+        self._plotlyjs = None
+        self._server = None
+        self.logger = Logger()
+
+    def publish(self, event):
+        """Enfileira um evento sem bloquear (chamado pelo ChartManager no loop de trading)"""
+        try:
+            self._events.put_nowait(event)
+        except queue.Full:
+            instrumentation.count('chart_events_dropped')
+
+    def attach(self, chart_manager):
+        """Passa a receber os candles e ordens de um ChartManager"""
+        chart_manager.add_listener(self.publish)
+        return self
+
+    def start(self):
+        """Inicia o servidor HTTP e a thread de distribuição em segundo plano"""
+        server = self
+        
+        class DashboardHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split('?', 1)[0]
+                if path == '/':
+                    page = DASHBOARD_HTML.replace('__MAX_POINTS__', str(server.history))
+                    self._send(page.encode(), 'text/html; charset=utf-8')
+                elif path == '/plotly.min.js':
+                    self._send(server._plotly_js(), 'application/javascript')
+                elif path == '/events':
+                    server._stream(self)
+                else:
+                    self.send_error(404)
+            
+            def _send(self, body, content_type):
+                self.send_response(200)
+                self.send_header('Content-Type', content_type)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        self._server = ThreadingHTTPServer((self.host, self.port), DashboardHandler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._dispatch, name='chart-dispatch', daemon=True).start()
+        threading.Thread(target=self._server.serve_forever, name='chart-server', daemon=True).start()
+        self.logger.info("Painel do gráfico em http://%s:%s/", self.host, self.port)
+        return self
+
+    def stop(self):
+        """Encerra o servidor e desconecta os navegadores"""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        self._events.put(None)
+
+    def _plotly_js(self):
+        # Carregado só quando um navegador pede a página
+        if self._plotlyjs is None:
+            from plotly.offline import get_plotlyjs
+            self._plotlyjs = get_plotlyjs().encode()
+        return self._plotlyjs
+
+    def _dispatch(self):
+        """Serializa os eventos da fila e os repassa aos navegadores (thread própria)"""
+        while True:
+            event = self._events.get()
+            if event is None:
+                break
+            message = f"data: {json.dumps(event, separators=(',', ':'))}\n\n".encode()
+            with self._lock:
+                if event['type'] == 'candle':
+                    self._candles.append(message)
+                else:
+                    self._markers.append(message)
+                for client in list(self._clients):
+                    try:
+                        client.queue.put_nowait(message)
+                    except queue.Full:
+                        # Navegador lento: desconecta; ao reconectar ele recebe o histórico
+                        client.dropped = True
+                        self._clients.discard(client)
+        
+        with self._lock:
+            for client in self._clients:
+                client.dropped = True
+            self._clients.clear()
+
+    def _subscribe(self):
+        client = _Client(self.client_queue_size)
+        with self._lock:
+            backlog = list(self._candles) + self._markers
+            self._clients.add(client)
+        return client, backlog
+
+    def _stream(self, handler):
+        """Mantém uma conexão de Server-Sent Events aberta com um navegador"""
+        client, backlog = self._subscribe()
+        try:
+            handler.send_response(200)
+            handler.send_header('Content-Type', 'text/event-stream')
+            handler.send_header('Cache-Control', 'no-cache')
+            handler.end_headers()
+            handler.wfile.write(b''.join(backlog) or b': conectado\n\n')
+            handler.wfile.flush()
+            
+            while not client.dropped:
+                try:
+                    messages = [client.queue.get(timeout=15)]
+                except queue.Empty:
+                    handler.wfile.write(b': keepalive\n\n')
+                    handler.wfile.flush()
+                    continue
+                # Tudo o que já está na fila vai em uma única escrita
+                while True:
+                    try:
+                        messages.append(client.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                handler.wfile.write(b''.join(messages))
+                handler.wfile.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self._lock:
+                self._clients.discard(client)
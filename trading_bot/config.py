@@ -0,0 +1,11 @@
+from dotenv import load_dotenv
+
+_loaded = False
+
+
+def load_env():
+    """Carrega as variáveis do .env uma única vez por processo"""
+    global _loaded
+    if not _loaded:
+        load_dotenv()
+        _loaded = True
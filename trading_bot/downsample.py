@@ -0,0 +1,87 @@
+import numpy as np
+
+
+def bucket_starts(n, target_points):
+    """Início de cada bucket ao agrupar n pontos em no máximo target_points buckets"""
+    size = max(-(-n // max(target_points, 1)), 1)
+    return np.arange(0, n, size), size
+
+
+def resample_ohlc(times, open_prices, high_prices, low_prices, close_prices, target_points):
+    """Agrega candles consecutivos em no máximo target_points candles
+    
+    Cada bucket vira um candle com a abertura do primeiro, a máxima e a mínima
+    do bucket e o fechamento do último, no horário do primeiro candle.
+    
+    Returns:
+        tuple: (times, open, high, low, close) agregados
+    """
+    n = len(close_prices)
+    starts, size = bucket_starts(n, target_points)
+    if size == 1:
+        return times, open_prices, high_prices, low_prices, close_prices
+    ends = np.minimum(starts + size, n) - 1
+    return (
+        times[starts],
+        open_prices[starts],
+        np.maximum.reduceat(high_prices, starts),
+        np.minimum.reduceat(low_prices, starts),
+        close_prices[ends]
+    )
+
+
+def bucket_last(values, target_points):
+    """Último valor de cada bucket (mantém lacunas NaN de séries em degrau, como stops)"""
+    n = len(values)
+    starts, size = bucket_starts(n, target_points)
+    if size == 1:
+        return values
+    return values[np.minimum(starts + size, n) - 1]
+
+
+def lttb(x, y, threshold):
+    """Índices escolhidos pelo Largest-Triangle-Three-Buckets
+    
+    Mantém o primeiro e o último ponto e, em cada bucket intermediário, o ponto
+    que forma o maior triângulo com o ponto escolhido no bucket anterior e a
+    média do bucket seguinte, preservando a forma visual da linha. Pontos NaN
+    são ignorados.
+    
+    Args:
+        x (np.ndarray): Eixo x numérico (ex: horários em ms)
+        y (np.ndarray): Valores
+        threshold (int): Número máximo de pontos
+    
+    Returns:
+        np.ndarray: Índices (crescentes) dos pontos mantidos
+    """
+    valid = np.flatnonzero(~np.isnan(y))
+    n = len(valid)
+    if threshold >= n or threshold < 3:
+        return valid
+    
+    xs = x[valid].astype(np.float64)
+    ys = y[valid].astype(np.float64)
+    every = (n - 2) / (threshold - 2)
+    selected = np.empty(threshold, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * every) + 1
+        end = int((i + 1) * every) + 1
+        next_end = min(int((i + 2) * every) + 1, n)
+        if end >= n - 1:
+            avg_x, avg_y = xs[-1], ys[-1]
+        else:
+            avg_x = xs[end:next_end].mean()
+            avg_y = ys[end:next_end].mean()
+        area = np.abs(
+            (xs[a] - avg_x) * (ys[start:end] - ys[a]) -
+            (xs[a] - xs[start:end]) * (avg_y - ys[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[i + 1] = a
+    
+    return valid[selected]
@@ -0,0 +1,104 @@
+import numpy as np
+import pandas as pd
+from .trade_ledger import BUY
+
+# Mercado cripto opera 24/7: um ano são 365 dias corridos
+YEAR_MS = 365 * 24 * 60 * 60_000
+
+
+def equity_curve(ledger, timestamps, close, initial_balance):
+    """Patrimônio marcado a mercado em cada candle (caixa + posição × fechamento)
+    
+    Cada ordem é atribuída ao candle que contém seu horário (ordens no
+    fechamento ou fills intrabar) e caixa e posição são acumulados sobre os
+    candles, sem percorrer as ordens em Python.
+    
+    Args:
+        ledger (TradeLedger): Ordens da simulação
+        timestamps (array): Abertura de cada candle, em ordem
+        close (np.ndarray): Fechamentos; 2-D (candle x par, na ordem de ledger.symbols)
+            no backtest de portfólio
+        initial_balance (float): Caixa antes da primeira ordem
+    
+    Returns:
+        tuple: (patrimônio por candle, máscara dos candles com alguma posição aberta)
+    """
+    times = np.asarray(timestamps, dtype='datetime64[ms]').astype(np.int64)
+    close = np.asarray(close, dtype=np.float64)
+    records = ledger.records
+    n = len(times)
+    
+    candle = np.searchsorted(times, records['timestamp'].astype(np.int64), side='right') - 1
+    candle = np.clip(candle, 0, max(n - 1, 0))
+    buy = records['side'] == BUY
+    cash_delta = np.where(buy, -records['value'], records['value'])
+    cash = initial_balance + np.cumsum(np.bincount(candle, weights=cash_delta, minlength=n))
+    amount = np.where(buy, records['amount'], -records['amount'])
+    
+    if close.ndim == 1:
+        position = np.cumsum(np.bincount(candle, weights=amount, minlength=n))
+        exposed = position != 0
+        value = position * close
+    else:
+        position = np.zeros(close.shape)
+        np.add.at(position, (candle, records['symbol']), amount)
+        position = np.cumsum(position, axis=0)
+        exposed = (position != 0).any(axis=1)
+        # Pares sem posição não contam, mesmo sem candle (NaN) naquele horário
+        value = np.where(position != 0, position * close, 0.0).sum(axis=1)
+    return cash + value, exposed
+
+
+def equity_metrics(timestamps, equity, exposed):
+    """Métricas de risco e retorno do patrimônio por candle
+    
+    Args:
+        timestamps (array): Abertura de cada candle
+        equity (np.ndarray): Patrimônio em cada candle (ver equity_curve)
+        exposed (np.ndarray): Máscara dos candles com posição aberta
+    
+    Returns:
+        dict: max_drawdown (%), max_drawdown_duration (maior tempo abaixo do topo
+            anterior), sharpe_ratio e sortino_ratio anualizados, exposure_time (% dos
+            candles em posição), cagr (%) e final_equity
+    """
+    times = np.asarray(timestamps, dtype='datetime64[ms]').astype(np.int64)
+    equity = np.asarray(equity, dtype=np.float64)
+    if len(equity) < 2:
+        return {
+            'max_drawdown': 0.0, 'max_drawdown_duration': str(pd.Timedelta(0)), 'sharpe_ratio': 0.0,
+            'sortino_ratio': 0.0, 'exposure_time': float(np.mean(exposed) * 100) if len(exposed) else 0.0,
+            'cagr': 0.0, 'final_equity': float(equity[-1]) if len(equity) else None
+        }
+    
+    # Drawdown e tempo desde o último topo
+    running_max = np.maximum.accumulate(equity)
+    drawdown = (running_max - equity) / running_max * 100
+    last_peak = np.maximum.accumulate(np.where(equity >= running_max, np.arange(len(equity)), 0))
+    duration_ms = int((times - times[last_peak]).max())
+    
+    # Retornos por candle, anualizados pelo intervalo típico entre candles
+    returns = equity[1:] / equity[:-1] - 1
+    annualization = np.sqrt(YEAR_MS / np.median(np.diff(times)))
+    mean = returns.mean()
+    std = returns.std(ddof=1)
+    downside = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))
+    sharpe = mean / std * annualization if std > 0 else 0.0
+    if downside > 0:
+        sortino = mean / downside * annualization
+    else:
+        sortino = float('inf') if mean > 0 else 0.0
+    
+    years = (times[-1] - times[0]) / YEAR_MS
+    growth = equity[-1] / equity[0]
+    cagr = (growth ** (1 / years) - 1) * 100 if years > 0 and growth > 0 else 0.0
+    
+    return {
+        'max_drawdown': float(drawdown.max()),
+        'max_drawdown_duration': str(pd.Timedelta(duration_ms, unit='ms')),
+        'sharpe_ratio': float(sharpe),
+        'sortino_ratio': float(sortino),
+        'exposure_time': float(np.mean(exposed) * 100),
+        'cagr': float(cagr),
+        'final_equity': float(equity[-1])
+    }
@@ -0,0 +1,145 @@
+import math
+from collections import deque
+
+class RollingMean:
+    # A soma acumulada é recalculada a cada N atualizações para não acumular erro de arredondamento
+    RESUM_EVERY = 1024
+
+    def __init__(self, window):
+        """Média móvel simples em O(1) por atualização
+        
+        Args:
+            window (int): Número de períodos da média
+        """
+        self.window = window
+        self._values = [0.0] * window
+        self._pos = 0
+        self._count = 0
+        self._total = 0.0
+        self._updates = 0
+
+    @property
+    def ready(self):
+        return self._count >= self.window
+
+    @property
+    def value(self):
+        """Média atual (NaN enquanto a janela não estiver cheia)"""
+        if not self.ready:
+            return math.nan
+        return self._total / self.window
+
+    def update(self, x):
+        """Adiciona um valor à janela e retorna a nova média"""
+        x = float(x)
+        self._total += x - self._values[self._pos]
+        self._values[self._pos] = x
+        self._pos = (self._pos + 1) % self.window
+        self._count = min(self._count + 1, self.window)
+        
+        self._updates += 1
+        if self._updates >= self.RESUM_EVERY:
+            self._total = math.fsum(self._values)
+            self._updates = 0
+        
+        return self.value
+
+
+class IncrementalIndicators:
+    def __init__(self, ma_short_period=9, ma_long_period=21, atr_period=14, lag=2):
+        """Indicadores de TradingManager.calculate_indicators atualizados candle a candle
+        
+        Mantém MA curta, MA longa e ATR com buffers circulares e somas acumuladas,
+        equivalentes (dentro da tolerância de ponto flutuante) ao cálculo com
+        rolling do pandas sobre todo o histórico.
+        
+        Args:
+            ma_short_period (int): Períodos da média curta
+            ma_long_period (int): Períodos da média longa
+            atr_period (int): Períodos do ATR
+            lag (int): Distância do candle "anterior" usado no cruzamento (igual a run_simulation)
+        """
+        self.ma_short_period = ma_short_period
+        self.ma_long_period = ma_long_period
+        self.atr_period = atr_period
+        self.lag = lag
+        
+        self._ma_short = RollingMean(ma_short_period)
+        self._ma_long = RollingMean(ma_long_period)
+        self._atr = RollingMean(atr_period)
+        self._prev_close = None
+        
+        # Histórico curto das médias para expor os valores "anteriores"
+        self._history = deque(maxlen=lag + 1)
+        
+        self.ma_short = math.nan
+        self.ma_long = math.nan
+        self.tr = math.nan
+        self.atr = math.nan
+
+    @classmethod
+    def from_trading_manager(cls, trading_manager):
+        """Cria os indicadores com os períodos configurados no TradingManager"""
+        return cls(
+            ma_short_period=trading_manager.ma_short_period,
+            ma_long_period=trading_manager.ma_long_period,
+            atr_period=trading_manager.atr_period
+        )
+
+    @property
+    def ready(self):
+        """True quando todos os indicadores e o valor anterior estão disponíveis"""
+        return self._atr.ready and len(self._history) > self.lag and not any(
+            math.isnan(value) for pair in self._history for value in pair
+        )
+
+    def update(self, candle):
+        """Atualiza os indicadores com um candle fechado
+        
+        Args:
+            candle (dict): Candle com as chaves 'high', 'low' e 'close'
+        
+        Returns:
+            dict: Candle acrescido de MA_short, MA_long, TR e ATR
+        """
+        high = float(candle['high'])
+        low = float(candle['low'])
+        close = float(candle['close'])
+        
+        self.ma_short = self._ma_short.update(close)
+        self.ma_long = self._ma_long.update(close)
+        
+        # O primeiro candle não tem fechamento anterior, então não tem TR (como no shift do pandas)
+        if self._prev_close is None:
+            self.tr = math.nan
+        else:
+            self.tr = max(high - low, abs(high - self._prev_close), abs(low - self._prev_close))
+            self.atr = self._atr.update(self.tr)
+        self._prev_close = close
+        
+        self._history.append((self.ma_short, self.ma_long))
+        
+        result = dict(candle)
+        result.update({'MA_short': self.ma_short, 'MA_long': self.ma_long, 'TR': self.tr, 'ATR': self.atr})
+        return result
+
+    def warm_up(self, df):
+        """Inicializa os buffers a partir de candles históricos
+        
+        Só os últimos candles necessários para preencher as janelas são processados.
+        
+        Args:
+            df (pd.DataFrame): Candles com as colunas 'high', 'low' e 'close'
+        """
+        needed = max(self.ma_long_period, self.ma_short_period, self.atr_period + 1) + self.lag
+        tail = df.iloc[-needed:]
+        for high, low, close in zip(tail['high'].to_numpy(), tail['low'].to_numpy(), tail['close'].to_numpy()):
+            self.update({'high': high, 'low': low, 'close': close})
+
+    def signal_args(self):
+        """Retorna (ma_short_current, ma_long_current, ma_short_previous, ma_long_previous)
+        
+        No mesmo formato dos argumentos de TradingManager.check_signals.
+        """
+        previous_short, previous_long = self._history[0] if len(self._history) > self.lag else (math.nan, math.nan)
+        return self.ma_short, self.ma_long, previous_short, previous_long
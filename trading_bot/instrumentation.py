@@ -0,0 +1,252 @@
+import os
+import math
+import time
+import inspect
+import functools
+import threading
+from contextlib import contextmanager
+from .config import load_env
+
+# Resolução do histograma: 8 buckets por potência de 2 (~9% de erro nos percentis)
+BUCKETS_PER_OCTAVE = 8
+MAX_BUCKET = BUCKETS_PER_OCTAVE * 40
+
+
+def _bucket(seconds):
+    """Índice do bucket logarítmico de uma duração (bucket 0: até 1µs)"""
+    micros = seconds * 1e6
+    if micros <= 1.0:
+        return 0
+    return min(int(math.log2(micros) * BUCKETS_PER_OCTAVE) + 1, MAX_BUCKET)
+
+
+def _bucket_upper(index):
+    """Limite superior (em segundos) de um bucket"""
+    return 2 ** (index / BUCKETS_PER_OCTAVE) / 1e6
+
+
+class _StageStats:
+    __slots__ = ('count', 'total', 'max', 'bytes', 'buckets')
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bytes = 0
+        self.buckets = {}
+
+    def percentile(self, q):
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= target:
+                return min(_bucket_upper(index), self.max)
+        return self.max
+
+
+class Instrumentation:
+    def __init__(self, enabled=False):
+        """Registro de latência, contagens e bytes por etapa do pipeline
+        
+        Desligado, cada ponto instrumentado custa apenas a verificação de
+        self.enabled. Ligado, cada etapa mantém um histograma logarítmico
+        (memória constante, mesmo ao vivo) com p50/p99, número de chamadas e
+        bytes escritos.
+        
+        Args:
+            enabled (bool): Começa registrando
+        """
+        self.enabled = enabled
+        self._stages = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def enable(self):
+        self.enabled = True
+
+    def disable(self):
+        self.enabled = False
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._counters = {}
+
+    def record(self, stage, seconds, nbytes=0):
+        """Registra uma execução de uma etapa"""
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats()
+            stats.count += 1
+            stats.total += seconds
+            if seconds > stats.max:
+                stats.max = seconds
+            stats.bytes += nbytes
+            index = _bucket(seconds)
+            stats.buckets[index] = stats.buckets.get(index, 0) + 1
+
+    def add_bytes(self, stage, nbytes):
+        """Soma bytes escritos a uma etapa sem registrar uma chamada"""
+        if not self.enabled:
+            return
+        with self._lock:
+            stats = self._stages.get(stage)
+            if stats is None:
+                stats = self._stages[stage] = _StageStats()
+            stats.bytes += nbytes
+
+    def count(self, name, value=1):
+        """Incrementa um contador (ex: mensagens descartadas)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    @contextmanager
+    def _timing(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def stage(self, name):
+        """Context manager que mede o bloco como uma execução da etapa"""
+        if not self.enabled:
+            return _NULL_STAGE
+        return self._timing(name)
+
+    def summary(self):
+        """Estatísticas por etapa
+        
+        Returns:
+            dict: Etapa -> count, total, mean, p50, p99, max (segundos) e bytes,
+                mais os contadores em 'counters'
+        """
+        with self._lock:
+            stages = {
+                name: {
+                    'count': stats.count,
+                    'total': stats.total,
+                    'mean': stats.total / stats.count if stats.count else 0.0,
+                    'p50': stats.percentile(0.50),
+                    'p99': stats.percentile(0.99),
+                    'max': stats.max,
+                    'bytes': stats.bytes
+                }
+                for name, stats in self._stages.items()
+            }
+            counters = dict(self._counters)
+        return {'stages': stages, 'counters': counters}
+
+    def format_summary(self):
+        """Resumo em tabela, ordenado pelo tempo total de cada etapa"""
+        summary = self.summary()
+        lines = [f"{'etapa':<22} {'chamadas':>9} {'total (s)':>10} {'p50 (ms)':>10} {'p99 (ms)':>10} {'max (ms)':>10} {'bytes':>12}"]
+        for name, stats in sorted(summary['stages'].items(), key=lambda item: -item[1]['total']):
+            lines.append(
+                f"{name:<22} {stats['count']:>9} {stats['total']:>10.3f} {stats['p50'] * 1000:>10.3f} "
+                f"{stats['p99'] * 1000:>10.3f} {stats['max'] * 1000:>10.3f} {stats['bytes']:>12}"
+            )
+        for name, value in sorted(summary['counters'].items()):
+            lines.append(f"{name:<22} {value:>9}")
+        return "\n".join(lines)
+
+    def prometheus(self, prefix='donkey_bot'):
+        """Exporta as métricas no formato texto do Prometheus"""
+        summary = self.summary()
+        lines = [
+            f"# HELP {prefix}_stage_seconds Latência por etapa do pipeline",
+            f"# TYPE {prefix}_stage_seconds summary"
+        ]
+        for name, stats in sorted(summary['stages'].items()):
+            lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="0.5"}} {stats["p50"]:.9f}')
+            lines.append(f'{prefix}_stage_seconds{{stage="{name}",quantile="0.99"}} {stats["p99"]:.9f}')
+            lines.append(f'{prefix}_stage_seconds_sum{{stage="{name}"}} {stats["total"]:.9f}')
+            lines.append(f'{prefix}_stage_seconds_count{{stage="{name}"}} {stats["count"]}')
+        lines.append(f"# HELP {prefix}_stage_bytes_total Bytes escritos por etapa")
+        lines.append(f"# TYPE {prefix}_stage_bytes_total counter")
+        for name, stats in sorted(summary['stages'].items()):
+            lines.append(f'{prefix}_stage_bytes_total{{stage="{name}"}} {stats["bytes"]}')
+        for name, value in sorted(summary['counters'].items()):
+            lines.append(f"# TYPE {prefix}_{name}_total counter")
+            lines.append(f"{prefix}_{name}_total {value}")
+        return "\n".join(lines) + "\n"
+
+    def serve_prometheus(self, port, host='127.0.0.1'):
+        """Expõe /metrics em uma thread em segundo plano
+        
+        Args:
+            port (int): Porta de escuta
+            host (str): Endereço de escuta (padrão: só a máquina local; '0.0.0.0' expõe
+                em todas as interfaces)
+        
+        Returns:
+            ThreadingHTTPServer: Servidor iniciado (use shutdown() para parar)
+        """
+        from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+        instrumentation = self
+        
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = instrumentation.prometheus().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def log_message(self, format, *args):
+                pass
+        
+        server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True).start()
+        return server
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+load_env()
+
+# Instância global usada pelos módulos do bot (INSTRUMENTATION=true no .env liga)
+instrumentation = Instrumentation(enabled=os.getenv('INSTRUMENTATION', '0').lower() in ('1', 'true', 'yes'))
+
+
+def timed(stage):
+    """Decorator que mede cada chamada da função como uma execução da etapa"""
+    def decorator(func):
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if not instrumentation.enabled:
+                    return await func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    instrumentation.record(stage, time.perf_counter() - start)
+            return async_wrapper
+        
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not instrumentation.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                instrumentation.record(stage, time.perf_counter() - start)
+        return wrapper
+    return decorator
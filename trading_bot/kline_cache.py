@@ -0,0 +1,253 @@
+import os
+import json
+from datetime import datetime, timezone
+import numpy as np
+import pandas as pd
+
+# Duração de cada intervalo da Binance em milissegundos
+INTERVAL_MS = {
+    '1m': 60_000,
+    '3m': 3 * 60_000,
+    '5m': 5 * 60_000,
+    '15m': 15 * 60_000,
+    '30m': 30 * 60_000,
+    '1h': 60 * 60_000,
+    '2h': 2 * 60 * 60_000,
+    '4h': 4 * 60 * 60_000,
+    '6h': 6 * 60 * 60_000,
+    '8h': 8 * 60 * 60_000,
+    '12h': 12 * 60 * 60_000,
+    '1d': 24 * 60 * 60_000,
+    '3d': 3 * 24 * 60 * 60_000,
+    '1w': 7 * 24 * 60 * 60_000,
+}
+
+# Formato colunar dos candles armazenados em disco
+KLINE_DTYPE = np.dtype([
+    ('timestamp', '<i8'),
+    ('open', '<f8'),
+    ('high', '<f8'),
+    ('low', '<f8'),
+    ('close', '<f8'),
+    ('volume', '<f8'),
+])
+
+KLINE_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+def interval_to_ms(interval):
+    """Converte um intervalo da Binance (ex: '15m') para milissegundos"""
+    try:
+        return INTERVAL_MS[interval]
+    except KeyError:
+        raise ValueError(f"Intervalo não suportado pelo cache: {interval}")
+
+
+def to_milliseconds(value):
+    """Converte datetime (naive = UTC), pd.Timestamp ou int para milissegundos"""
+    if isinstance(value, (int, np.integer)):
+        return int(value)
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(pd.Timestamp(value).timestamp() * 1000)
+
+
+def klines_to_array(klines):
+    """Converte linhas de kline no formato da API da Binance para o array colunar"""
+    if isinstance(klines, np.ndarray) and klines.dtype == KLINE_DTYPE:
+        return klines
+    if len(klines) == 0:
+        return np.empty(0, dtype=KLINE_DTYPE)
+    raw = np.asarray([row[:6] for row in klines], dtype=object)
+    data = np.empty(len(raw), dtype=KLINE_DTYPE)
+    data['timestamp'] = raw[:, 0].astype(np.int64)
+    for i, col in enumerate(KLINE_COLUMNS[1:], start=1):
+        data[col] = raw[:, i].astype(np.float64)
+    return data
+
+
+def array_to_frame(data):
+    """Converte o array colunar para o DataFrame usado pelo backtest"""
+    df = pd.DataFrame({col: np.asarray(data[col]) for col in KLINE_COLUMNS})
+    df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+    return df
+
+
+def read_kline_file(path):
+    """Lê um arquivo CSV de klines para o array colunar
+    
+    Aceita o formato dos arquivos de data.binance.vision (sem cabeçalho,
+    opcionalmente compactado em .zip) ou um CSV com as colunas
+    timestamp, open, high, low, close e volume.
+    """
+    df = pd.read_csv(path, header=None)
+    if not str(df.iloc[0, 0]).lstrip('-').isdigit():
+        df = pd.read_csv(path)
+        df = df[KLINE_COLUMNS]
+    df = df.iloc[:, :6]
+    df.columns = KLINE_COLUMNS
+    
+    data = np.empty(len(df), dtype=KLINE_DTYPE)
+    timestamps = df['timestamp']
+    if not pd.api.types.is_numeric_dtype(timestamps):
+        timestamps = pd.to_datetime(timestamps).astype('datetime64[ms]').astype(np.int64)
+    timestamps = timestamps.to_numpy(dtype=np.int64)
+    # Arquivos recentes da Binance usam microssegundos
+    if len(timestamps) and timestamps.max() > 10**14:
+        timestamps = timestamps // 1000
+    data['timestamp'] = timestamps
+    for col in KLINE_COLUMNS[1:]:
+        data[col] = df[col].to_numpy(dtype=np.float64)
+    return data
+
+
+class KlineCache:
+    def __init__(self, cache_dir='data/klines', fetcher=None, offline=False):
+        """Inicializa o cache local de candles
+        
+        Os candles de cada par/intervalo ficam em um arquivo .npy colunar
+        (lido via memory-map) e os trechos já baixados ficam registrados em
+        um arquivo de cobertura, para que só as lacunas sejam buscadas.
+        
+        Args:
+            cache_dir (str): Diretório do cache
+            fetcher (callable, opcional): Função fetcher(symbol, interval, start_ms, end_ms)
+                que retorna klines no formato da API da Binance
+            offline (bool): Se True, nunca busca dados, apenas serve o que está em disco
+        """
+        self.cache_dir = cache_dir
+        self.fetcher = fetcher
+        self.offline = offline
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _data_path(self, symbol, interval):
+        return os.path.join(self.cache_dir, f"{symbol.upper()}_{interval}.npy")
+
+    def _coverage_path(self, symbol, interval):
+        return os.path.join(self.cache_dir, f"{symbol.upper()}_{interval}.coverage.json")
+
+    def load(self, symbol, interval):
+        """Retorna todos os candles em cache (memory-mapped, somente leitura)"""
+        path = self._data_path(symbol, interval)
+        if not os.path.exists(path):
+            return np.empty(0, dtype=KLINE_DTYPE)
+        return np.load(path, mmap_mode='r')
+
+    def coverage(self, symbol, interval):
+        """Retorna os trechos [início, fim) em ms já presentes no cache"""
+        path = self._coverage_path(symbol, interval)
+        if not os.path.exists(path):
+            return []
+        with open(path, 'r') as f:
+            return [tuple(item) for item in json.load(f)]
+
+    def missing_ranges(self, symbol, interval, start_ms, end_ms):
+        """Retorna os trechos [início, fim) de [start_ms, end_ms) ainda não cobertos"""
+        missing = []
+        cursor = start_ms
+        for covered_start, covered_end in self.coverage(symbol, interval):
+            if covered_end <= cursor:
+                continue
+            if covered_start >= end_ms:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start))
+            cursor = max(cursor, covered_end)
+        if cursor < end_ms:
+            missing.append((cursor, end_ms))
+        return missing
+
+    def store(self, symbol, interval, data, start_ms, end_ms):
+        """Mescla candles no cache e marca [start_ms, end_ms) como coberto
+        
+        Args:
+            symbol (str): Par de trading
+            interval (str): Intervalo dos candles
+            data (np.ndarray): Candles no formato KLINE_DTYPE
+            start_ms (int): Início do trecho coberto (ms)
+            end_ms (int): Fim exclusivo do trecho coberto (ms)
+        """
+        existing = np.array(self.load(symbol, interval))
+        merged = np.concatenate((np.asarray(data, dtype=KLINE_DTYPE), existing))
+        # Em timestamps repetidos prevalece o dado mais novo (primeira ocorrência)
+        _, first = np.unique(merged['timestamp'], return_index=True)
+        merged = merged[first]
+        
+        path = self._data_path(symbol, interval)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, merged)
+        os.replace(tmp_path, path)
+        
+        ranges = self.coverage(symbol, interval) + [(int(start_ms), int(end_ms))]
+        ranges.sort()
+        merged_ranges = [list(ranges[0])]
+        for range_start, range_end in ranges[1:]:
+            if range_start <= merged_ranges[-1][1]:
+                merged_ranges[-1][1] = max(merged_ranges[-1][1], range_end)
+            else:
+                merged_ranges.append([range_start, range_end])
+        
+        coverage_path = self._coverage_path(symbol, interval)
+        with open(coverage_path + '.tmp', 'w') as f:
+            json.dump(merged_ranges, f)
+        os.replace(coverage_path + '.tmp', coverage_path)
+
+    def get_klines(self, symbol, interval, start, end):
+        """Retorna os candles de [start, end], buscando apenas o que falta no cache
+        
+        Args:
+            symbol (str): Par de trading
+            interval (str): Intervalo dos candles
+            start: Data inicial (datetime ou ms)
+            end: Data final (datetime ou ms)
+        
+        Returns:
+            pd.DataFrame: Candles com timestamp em datetime64 e preços em float64
+        """
+        return array_to_frame(self.get_array(symbol, interval, start, end))
+
+    def get_array(self, symbol, interval, start, end):
+        """Como get_klines, mas retorna o array colunar (KLINE_DTYPE)"""
+        interval_ms = interval_to_ms(interval)
+        start_ms = -(-to_milliseconds(start) // interval_ms) * interval_ms
+        end_ms = (to_milliseconds(end) // interval_ms + 1) * interval_ms
+        
+        # O candle ainda em formação não é armazenado
+        now_ms = to_milliseconds(datetime.now(timezone.utc))
+        last_closed_end = (now_ms // interval_ms) * interval_ms
+        end_ms = min(end_ms, last_closed_end)
+        
+        if not self.offline and self.fetcher is not None:
+            for gap_start, gap_end in self.missing_ranges(symbol, interval, start_ms, end_ms):
+                klines = self.fetcher(symbol, interval, gap_start, gap_end - 1)
+                data = klines_to_array(klines)
+                data = data[(data['timestamp'] >= gap_start) & (data['timestamp'] < gap_end)]
+                self.store(symbol, interval, data, gap_start, gap_end)
+        
+        return self.get_window_array(symbol, interval, start_ms, end_ms)
+
+    def get_window(self, symbol, interval, start_ms, end_ms):
+        """Retorna do disco os candles com abertura em [start_ms, end_ms)"""
+        return array_to_frame(self.get_window_array(symbol, interval, start_ms, end_ms))
+
+    def get_window_array(self, symbol, interval, start_ms, end_ms):
+        """Como get_window, mas retorna o array colunar (view do arquivo mapeado)"""
+        data = self.load(symbol, interval)
+        timestamps = data['timestamp']
+        lo = np.searchsorted(timestamps, start_ms, side='left')
+        hi = np.searchsorted(timestamps, end_ms, side='left')
+        return data[lo:hi]
+
+    def import_file(self, path, symbol, interval):
+        """Pré-popula o cache a partir de um arquivo CSV de klines (ver read_kline_file)
+        
+        Returns:
+            int: Número de candles importados
+        """
+        interval_ms = interval_to_ms(interval)
+        data = read_kline_file(path)
+        if len(data):
+            timestamps = data['timestamp']
+            self.store(symbol, interval, data, int(timestamps.min()), int(timestamps.max()) + interval_ms)
+        return len(data)
@@ -0,0 +1,179 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import requests
+from requests.adapters import HTTPAdapter
+from .kline_cache import KLINE_DTYPE, interval_to_ms, klines_to_array
+from .logger import Logger
+from .instrumentation import instrumentation
+
+# Peso de uma chamada a /api/v3/klines por faixa de limit (até 100, 500 e 1000 candles)
+KLINES_WEIGHT = {100: 1, 500: 2, 1000: 5}
+WEIGHT_HEADER = 'X-MBX-USED-WEIGHT-1M'
+
+
+class KlineDownloadError(Exception):
+    pass
+
+
+class KlineDownloader:
+    def __init__(self, base_url=None, max_workers=None, limit=1000, max_weight=None,
+                 max_retries=5, backoff=0.5, timeout=10, session=None):
+        """Baixa klines históricos da API REST da Binance em paralelo
+        
+        O período é dividido em blocos de `limit` candles, buscados ao mesmo tempo
+        por uma sessão HTTP com keep-alive. O peso usado no minuto (cabeçalho
+        X-MBX-USED-WEIGHT-1M) é acompanhado a cada resposta: antes de passar de
+        max_weight, as requisições esperam o minuto virar. Respostas 429/418 são
+        respeitadas (Retry-After) e erros de rede, 5xx e respostas 200 com corpo
+        inválido são repetidos com espera exponencial.
+        
+        Args:
+            base_url (str, opcional): URL da API. Se None, usa BINANCE_API_URL do .env
+                (padrão: https://api.binance.com); útil para apontar para um servidor local
+            max_workers (int, opcional): Requisições simultâneas. Se None, usa
+                KLINE_DOWNLOAD_WORKERS do .env (padrão: 4)
+            limit (int): Candles por requisição (máximo da Binance: 1000)
+            max_weight (int, opcional): Peso máximo por minuto. Se None, usa
+                BINANCE_MAX_WEIGHT do .env (padrão: 4800, 80% do limite da Binance)
+            max_retries (int): Tentativas por bloco antes de desistir
+            backoff (float): Espera inicial entre tentativas (dobra a cada falha)
+            timeout (float): Timeout de cada requisição em segundos
+            session (requests.Session, opcional): Sessão HTTP. Padrão: uma nova sessão
+        """
+        self.base_url = (base_url or os.getenv('BINANCE_API_URL', 'https://api.binance.com')).rstrip('/')
+        if max_workers is None:
+            max_workers = int(os.getenv('KLINE_DOWNLOAD_WORKERS', '4'))
+        if max_weight is None:
+            max_weight = int(os.getenv('BINANCE_MAX_WEIGHT', '4800'))
+        self.max_workers = max(int(max_workers), 1)
+        self.limit = limit
+        self.max_weight = max_weight
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.request_weight = next(weight for size, weight in sorted(KLINES_WEIGHT.items()) if limit <= size)
+        
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.max_workers)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+        self.session = session
+        
+        # Peso usado no minuto atual (informado pela Binance) e reservas em andamento
+        self._lock = threading.Lock()
+        self._used_weight = 0
+        self._weight_minute = self._minute()
+        self._reserved = 0
+        self._blocked_until = 0.0
+        self.logger = Logger("backtest")
+
+    @staticmethod
+    def _minute():
+        return int(time.time() // 60)
+
+    def chunks(self, interval, start_ms, end_ms):
+        """Divide [start_ms, end_ms] em blocos de até `limit` candles
+        
+        Returns:
+            list: Tuplas (início, fim) em ms, inclusivas
+        """
+        span = self.limit * interval_to_ms(interval)
+        return [(chunk_start, min(chunk_start + span, end_ms + 1) - 1) for chunk_start in range(start_ms, end_ms + 1, span)]
+
+    def _acquire(self):
+        """Reserva o peso de uma requisição, esperando o próximo minuto se preciso"""
+        while True:
+            with self._lock:
+                now = time.time()
+                minute = int(now // 60)
+                if minute != self._weight_minute:
+                    self._weight_minute = minute
+                    self._used_weight = 0
+                if now >= self._blocked_until and self._used_weight + self._reserved + self.request_weight <= self.max_weight:
+                    self._reserved += self.request_weight
+                    return
+                wait = max(self._blocked_until - now, (minute + 1) * 60 - now)
+            instrumentation.count('kline_weight_waits')
+            time.sleep(min(wait, 1.0))
+
+    def _release(self, response):
+        with self._lock:
+            self._reserved -= self.request_weight
+            if response is None:
+                return
+            used = response.headers.get(WEIGHT_HEADER)
+            if used is not None and self._minute() == self._weight_minute:
+                self._used_weight = max(self._used_weight, int(used))
+            if response.status_code in (418, 429):
+                retry_after = float(response.headers.get('Retry-After', '60'))
+                self._blocked_until = max(self._blocked_until, time.time() + retry_after)
+
+    def _fetch_chunk(self, symbol, interval, start_ms, end_ms):
+        """Busca um bloco, com novas tentativas em erros temporários"""
+        params = {
+            'symbol': symbol.upper(),
+            'interval': interval,
+            'startTime': start_ms,
+            'endTime': end_ms,
+            'limit': self.limit
+        }
+        delay = self.backoff
+        for attempt in range(1, self.max_retries + 1):
+            self._acquire()
+            response = None
+            try:
+                response = self.session.get(f"{self.base_url}/api/v3/klines", params=params, timeout=self.timeout)
+            except requests.RequestException as e:
+                error = e
+            finally:
+                self._release(response)
+            
+            if response is not None and response.status_code == 200:
+                try:
+                    data = klines_to_array(response.json())
+                except ValueError as e:
+                    # Corpo truncado ou página de erro de um proxy: repetir como um 5xx
+                    error = KlineDownloadError(f"Resposta inválida: {e}")
+                else:
+                    instrumentation.add_bytes('data_fetch', len(response.content))
+                    return data
+            elif response is not None:
+                error = KlineDownloadError(f"HTTP {response.status_code}: {response.text[:200]}")
+                # Erros do cliente (ex: par inválido) não melhoram com novas tentativas
+                if response.status_code < 500 and response.status_code not in (418, 429):
+                    raise error
+            
+            instrumentation.count('kline_retries')
+            self.logger.warning("Falha ao baixar klines %s %s a partir de %s (tentativa %d/%d): %s",
+                                symbol, interval, start_ms, attempt, self.max_retries, error)
+            if attempt < self.max_retries:
+                time.sleep(delay)
+                delay *= 2
+        raise KlineDownloadError(f"Não foi possível baixar os klines de {symbol} {interval} a partir de {start_ms}") from error
+
+    def download(self, symbol, interval, start_ms, end_ms):
+        """Baixa os candles com abertura em [start_ms, end_ms]
+        
+        Returns:
+            np.ndarray: Candles no formato KLINE_DTYPE, em ordem e sem repetições
+        """
+        chunks = self.chunks(interval, int(start_ms), int(end_ms))
+        if not chunks:
+            return np.empty(0, dtype=KLINE_DTYPE)
+        if len(chunks) == 1 or self.max_workers == 1:
+            parts = [self._fetch_chunk(symbol, interval, *chunk) for chunk in chunks]
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(chunks)), thread_name_prefix='klines') as executor:
+                parts = list(executor.map(lambda chunk: self._fetch_chunk(symbol, interval, *chunk), chunks))
+        
+        data = np.concatenate(parts)
+        data = data[(data['timestamp'] >= start_ms) & (data['timestamp'] <= end_ms)]
+        _, first = np.unique(data['timestamp'], return_index=True)
+        return data[first]
+
+    def close(self):
+        self.session.close()
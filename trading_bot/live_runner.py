@@ -0,0 +1,201 @@
+import os
+import json
+import time
+import asyncio
+import pandas as pd
+import websockets
+from .indicators import IncrementalIndicators
+from .kline_cache import interval_to_ms
+from .logger import Logger
+from .instrumentation import timed
+
+class LiveRunner:
+    def __init__(self, trading_manager, interval='15m', stream_url=None, client=None, warmup_candles=None, reconnect_delay=1.0, clock=None):
+        """Executa o TradingManager a partir do stream de klines da Binance
+        
+        Cada candle fechado recebido pelo WebSocket atualiza os indicadores
+        incrementais e é avaliado por check_signals imediatamente. Após uma
+        reconexão, os candles perdidos são buscados via REST antes de continuar.
+        
+        Args:
+            trading_manager: Instância do TradingManager em modo ao vivo
+            interval (str): Intervalo dos candles (ex: '15m')
+            stream_url (str, opcional): URL base do WebSocket. Se None, usa
+                BINANCE_STREAM_URL do .env (padrão: stream oficial da Binance)
+            client (opcional): Cliente REST com get_klines. Padrão: trading_manager.client
+            warmup_candles (int, opcional): Candles históricos usados no aquecimento
+            reconnect_delay (float): Espera inicial entre reconexões (dobra a cada falha)
+            clock (callable, opcional): Horário atual em segundos desde epoch. Padrão: time.time
+                (o replay injeta um relógio simulado)
+        """
+        self.trading_manager = trading_manager
+        self.symbol = trading_manager.symbol
+        self.interval = interval
+        self.interval_ms = interval_to_ms(interval)
+        self.stream_url = (stream_url or os.getenv('BINANCE_STREAM_URL', 'wss://stream.binance.com:9443')).rstrip('/')
+        self.client = client if client is not None else trading_manager.client
+        self.reconnect_delay = reconnect_delay
+        self.clock = clock if clock is not None else time.time
+        
+        self.indicators = IncrementalIndicators.from_trading_manager(trading_manager)
+        if warmup_candles is None:
+            warmup_candles = self.indicators.ma_long_period * 5
+        self.warmup_candles = warmup_candles
+        
+        # Horário de abertura (ms) do último candle fechado processado
+        self.last_open_time = None
+        self.running = False
+        self._backfilling = False
+        self.logger = Logger()
+
+    @property
+    def stream_name(self):
+        return f"{self.symbol.lower()}@kline_{self.interval}"
+
+    def _kline_to_candle(self, kline):
+        """Converte uma linha de kline da API REST para o formato de candle"""
+        return {
+            'open_time': int(kline[0]),
+            'timestamp': pd.to_datetime(int(kline[0]), unit='ms'),
+            'open': float(kline[1]),
+            'high': float(kline[2]),
+            'low': float(kline[3]),
+            'close': float(kline[4]),
+            'volume': float(kline[5]),
+            'close_time': int(kline[6])
+        }
+
+    def _event_to_candle(self, event):
+        """Converte um evento 'kline' do WebSocket para o formato de candle"""
+        k = event['k']
+        return {
+            'open_time': int(k['t']),
+            'timestamp': pd.to_datetime(int(k['t']), unit='ms'),
+            'open': float(k['o']),
+            'high': float(k['h']),
+            'low': float(k['l']),
+            'close': float(k['c']),
+            'volume': float(k['v']),
+            'close_time': int(k['T'])
+        }
+
+    def _fetch_closed_candles(self, start_ms=None, limit=1000):
+        """Busca via REST os candles já fechados a partir de start_ms"""
+        params = {'symbol': self.symbol, 'interval': self.interval, 'limit': limit}
+        if start_ms is not None:
+            params['startTime'] = start_ms
+        klines = self.client.get_klines(**params)
+        now_ms = int(self.clock() * 1000)
+        return [self._kline_to_candle(k) for k in klines if int(k[6]) < now_ms]
+
+    def warm_up(self):
+        """Aquece os indicadores com os últimos candles fechados"""
+        candles = self._fetch_closed_candles(limit=self.warmup_candles)
+        for candle in candles:
+            self.indicators.update(candle)
+            self.last_open_time = candle['open_time']
+        self.logger.info(f"Indicadores aquecidos com {len(candles)} candles")
+
+    def backfill(self):
+        """Processa os candles fechados perdidos desde o último candle processado"""
+        if self.last_open_time is None or self._backfilling:
+            return 0
+        self._backfilling = True
+        count = 0
+        try:
+            count = self._backfill_pending()
+        finally:
+            self._backfilling = False
+        if count:
+            self.logger.info(f"Backfill: {count} candles recuperados via REST")
+        return count
+
+    def _backfill_pending(self):
+        count = 0
+        while True:
+            candles = self._fetch_closed_candles(start_ms=self.last_open_time + self.interval_ms)
+            candles = [c for c in candles if c['open_time'] > self.last_open_time]
+            if not candles:
+                break
+            for candle in candles:
+                self.on_closed_candle(candle)
+            count += len(candles)
+        return count
+
+    @timed('live_tick')
+    def on_closed_candle(self, candle):
+        """Atualiza os indicadores e avalia os sinais de um candle fechado"""
+        if self.last_open_time is not None:
+            if candle['open_time'] <= self.last_open_time:
+                return  # Candle repetido (ex: já recebido no backfill)
+            if candle['open_time'] > self.last_open_time + self.interval_ms:
+                # Lacuna no stream: recuperar os candles intermediários primeiro
+                self.backfill()
+                if candle['open_time'] <= self.last_open_time:
+                    return
+        
+        candle = self.indicators.update(candle)
+        self.last_open_time = candle['open_time']
+        
+        if self.indicators.ready:
+            self.trading_manager.check_signals(candle, *self.indicators.signal_args())
+
+    def handle_message(self, message):
+        """Processa uma mensagem do WebSocket (mensagens malformadas são descartadas)"""
+        try:
+            event = json.loads(message)
+            # Streams combinados encapsulam o evento em 'data'
+            event = event.get('data', event)
+            if event.get('e') != 'kline' or not event['k'].get('x'):
+                return
+            candle = self._event_to_candle(event)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            self.logger.warning(f"Mensagem do stream ignorada ({type(e).__name__}: {str(e)}): {str(message)[:200]}")
+            return
+        self.on_closed_candle(candle)
+
+    @staticmethod
+    def _rest_errors():
+        """Erros da API REST (warm-up e backfill) tratados como falhas temporárias"""
+        from requests import RequestException
+        from binance.exceptions import BinanceAPIException, BinanceRequestException
+        return (BinanceAPIException, BinanceRequestException, RequestException)
+
+    async def run(self):
+        """Mantém a conexão com o stream, reconectando com backfill em caso de queda"""
+        self.running = True
+        # Handshake recusado (ex: HTTP 429/5xx), queda da conexão e erros REST no
+        # warm-up/backfill levam a uma nova tentativa com espera exponencial
+        retry_errors = (websockets.WebSocketException, OSError) + self._rest_errors()
+        
+        delay = self.reconnect_delay
+        url = f"{self.stream_url}/ws/{self.stream_name}"
+        while self.running:
+            try:
+                if self.last_open_time is None:
+                    self.warm_up()
+                async with websockets.connect(url) as ws:
+                    self.logger.info(f"Conectado ao stream {self.stream_name}")
+                    delay = self.reconnect_delay
+                    self.backfill()
+                    async for message in ws:
+                        self.handle_message(message)
+                        if not self.running:
+                            break
+                if not self.running:
+                    break
+                self.logger.warning(f"Stream encerrado pelo servidor, reconectando em {delay:.1f}s")
+            except retry_errors as e:
+                if not self.running:
+                    break
+                self.logger.warning(f"Conexão com o stream perdida ({type(e).__name__}: {str(e)}), reconectando em {delay:.1f}s")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 60)
+
+    def start(self):
+        """Executa o loop ao vivo até stop() ou KeyboardInterrupt"""
+        asyncio.run(self.run())
+
+    def stop(self):
+        """Encerra o loop após a próxima mensagem"""
+        self.running = False
@@ -1,13 +1,77 @@
 import os
+import queue
+import atexit
 import logging
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from datetime import datetime
+from .instrumentation import timed
+
+# Nível das mensagens do caminho quente (ex: atualização de trailing stop a cada candle).
+# Fica abaixo de INFO para que o backtest possa descartá-las sem formatar a mensagem.
+DETAIL = 15
+logging.addLevelName(DETAIL, 'DETAIL')
+
+
+class _AsyncQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # A fila é do próprio processo: a formatação fica para a thread do listener
+        return record
+
+
+class _BatchedStreamHandler(logging.StreamHandler):
+    def emit(self, record):
+        # Sem flush por registro: o listener faz um flush por lote
+        try:
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+
+class _BatchedRotatingFileHandler(RotatingFileHandler):
+    def __init__(self, filename, max_bytes, backup_count):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self._written = os.path.getsize(filename) if os.path.exists(filename) else 0
+
+    def emit(self, record):
+        # Rotação pelo tamanho contado em memória (o shouldRollover padrão faz seek e flush a cada registro)
+        try:
+            message = self.format(record) + self.terminator
+            size = len(message.encode(self.encoding, self.errors or 'strict'))
+            if self.maxBytes > 0 and self._written and self._written + size > self.maxBytes:
+                self.doRollover()
+                self._written = 0
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(message)
+            self._written += size
+        except Exception:
+            self.handleError(record)
+
+
+class _BatchingQueueListener(QueueListener):
+    def handle(self, record):
+        super().handle(record)
+        # Fila vazia: fim do lote, grava tudo de uma vez
+        if self.queue.empty():
+            self.flush()
+
+    def flush(self):
+        for handler in self.handlers:
+            handler.flush()
+
 
 class Logger:
     _instances = {}  # Dicionário para armazenar instâncias únicas do logger
+    _listeners = []  # Threads de escrita do modo fila
 
     def __init__(self, prefix=''):
         """Inicializa o logger
         
+        Por padrão as mensagens vão para uma fila em memória e são gravadas (arquivo
+        com rotação por tamanho e console) por uma thread em segundo plano, em lotes,
+        para que o log nunca bloqueie o loop de trading. Configuração pelo .env:
+        LOG_QUEUE, LOG_MAX_BYTES, LOG_BACKUP_COUNT, LOG_LEVEL e BACKTEST_LOG_LEVEL.
+        
         Args:
             prefix (str): Prefixo para o nome do arquivo de log
         """
@@ -31,20 +95,39 @@ class Logger:
         
         # Se o logger já tem handlers, não configura novamente
         if not self.logger.handlers:
-            self.logger.setLevel(logging.INFO)
+            # No backtest as mensagens DETAIL ficam de fora (nem chegam a ser formatadas)
+            if prefix == 'backtest':
+                level = os.getenv('BACKTEST_LOG_LEVEL', 'INFO')
+            else:
+                level = os.getenv('LOG_LEVEL', 'DETAIL')
+            self.logger.setLevel(level.upper())
             
             # Configurar formato do log
             formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
             
-            # Handler para arquivo
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setFormatter(formatter)
-            self.logger.addHandler(file_handler)
+            max_bytes = int(os.getenv('LOG_MAX_BYTES', str(10 * 1024 * 1024)))
+            backup_count = int(os.getenv('LOG_BACKUP_COUNT', '5'))
+            use_queue = os.getenv('LOG_QUEUE', 'true').lower() in ('1', 'true', 'yes')
             
-            # Handler para console
-            console_handler = logging.StreamHandler()
+            if use_queue:
+                # Handlers para arquivo e console, usados pela thread do listener
+                file_handler = _BatchedRotatingFileHandler(log_file, max_bytes, backup_count)
+                console_handler = _BatchedStreamHandler()
+            else:
+                file_handler = RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backup_count)
+                console_handler = logging.StreamHandler()
+            file_handler.setFormatter(formatter)
             console_handler.setFormatter(formatter)
-            self.logger.addHandler(console_handler)
+            
+            if use_queue:
+                log_queue = queue.SimpleQueue()
+                self.logger.addHandler(_AsyncQueueHandler(log_queue))
+                listener = _BatchingQueueListener(log_queue, file_handler, console_handler)
+                listener.start()
+                Logger._listeners.append(listener)
+            else:
+                self.logger.addHandler(file_handler)
+                self.logger.addHandler(console_handler)
             
             # Evitar propagação para o logger root
             self.logger.propagate = False
@@ -52,22 +135,104 @@ class Logger:
         # Armazenar a instância para reutilização
         Logger._instances[prefix] = self.logger
 
-    def info(self, message):
+    @classmethod
+    def shutdown(cls):
+        """Grava as mensagens pendentes e encerra as threads de log"""
+        while cls._listeners:
+            listener = cls._listeners.pop()
+            listener.stop()
+            try:
+                listener.flush()
+            except ValueError:
+                # Stream já fechado no encerramento do interpretador (ex: stderr capturado)
+                pass
+
+    @classmethod
+    def _file_handlers(cls):
+        handlers = [h for listener in cls._listeners for h in listener.handlers]
+        handlers += [h for logger in cls._instances.values() for h in logger.handlers]
+        return [h for h in handlers if isinstance(h, RotatingFileHandler)]
+
+    @classmethod
+    def _before_fork(cls):
+        # Nenhuma escrita em andamento e buffers vazios no fork: o filho não regrava o que o pai já gravou
+        for handler in cls._file_handlers():
+            handler.acquire()
+            handler.flush()
+
+    @classmethod
+    def _after_fork_in_parent(cls):
+        for handler in cls._file_handlers():
+            handler.release()
+
+    @staticmethod
+    def _process_file_handler(handler):
+        """Handler equivalente gravando em um arquivo próprio do processo (<log>_<pid>.log)"""
+        if not isinstance(handler, RotatingFileHandler):
+            return handler
+        root, ext = os.path.splitext(handler.baseFilename)
+        filename = f"{root}_{os.getpid()}{ext}"
+        if isinstance(handler, _BatchedRotatingFileHandler):
+            replacement = _BatchedRotatingFileHandler(filename, handler.maxBytes, handler.backupCount)
+        else:
+            replacement = RotatingFileHandler(filename, maxBytes=handler.maxBytes,
+                                              backupCount=handler.backupCount, delay=True)
+        replacement.setFormatter(handler.formatter)
+        replacement.setLevel(handler.level)
+        handler.close()
+        return replacement
+
+    @classmethod
+    def _after_fork_in_child(cls):
+        """Processo filho (fork): descarta os registros herdados do pai, que o próprio
+        pai grava, troca o arquivo compartilhado (e sua rotação) por um arquivo do
+        processo e recria a thread do listener, que não existe mais no filho
+        """
+        for listener in cls._listeners:
+            while not listener.queue.empty():
+                listener.queue.get_nowait()
+            listener.handlers = tuple(cls._process_file_handler(h) for h in listener.handlers)
+            listener._thread = None
+            listener.start()
+        for logger in cls._instances.values():
+            for handler in list(logger.handlers):
+                if isinstance(handler, RotatingFileHandler):
+                    logger.removeHandler(handler)
+                    logger.addHandler(cls._process_file_handler(handler))
+
+    @timed('logging')
+    def detail(self, message, *args):
+        """Registra uma mensagem do caminho quente (formatada só se o nível DETAIL estiver ativo)"""
+        if self.logger.isEnabledFor(DETAIL):
+            self.logger.log(DETAIL, message, *args)
+
+    @timed('logging')
+    def info(self, message, *args):
         """Registra uma mensagem de informação"""
-        self.logger.info(message)
+        self.logger.info(message, *args)
         
-    def error(self, message):
+    @timed('logging')
+    def error(self, message, *args):
         """Registra uma mensagem de erro"""
-        self.logger.error(message)
+        self.logger.error(message, *args)
         
-    def warning(self, message):
+    @timed('logging')
+    def warning(self, message, *args):
         """Registra uma mensagem de aviso"""
-        self.logger.warning(message)
+        self.logger.warning(message, *args)
     
-    def debug(self, message):
+    @timed('logging')
+    def debug(self, message, *args):
         """Registra mensagem de debug"""
-        self.logger.debug(message)
+        self.logger.debug(message, *args)
     
-    def critical(self, message):
+    @timed('logging')
+    def critical(self, message, *args):
         """Registra mensagem crítica"""
-        self.logger.critical(message) 
\ No newline at end of file
+        self.logger.critical(message, *args)
+
+
+atexit.register(Logger.shutdown)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(before=Logger._before_fork, after_in_parent=Logger._after_fork_in_parent,
+                        after_in_child=Logger._after_fork_in_child)
@@ -0,0 +1,278 @@
+import os
+import random
+import logging
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from .trading_manager import TradingManager
+from .logger import Logger
+
+PRICE_COLUMNS = ['open', 'high', 'low', 'close', 'volume']
+
+# Execuções gravadas por transação no ResultsStore
+STORE_BATCH_SIZE = 200
+
+# Parâmetros sem efeito no backtest: os stops dinâmicos usam 2% do preço no lugar
+# do ATR (como check_signals com candles sem 'ATR'), então a janela só é usada ao vivo
+BACKTEST_INERT_PARAMS = ('atr_period',)
+
+# Estado de cada processo worker (anexado à memória compartilhada no initializer)
+_worker_data = {}
+
+
+def grid_configs(param_grid):
+    """Gera todas as combinações de um grid
+    
+    Args:
+        param_grid (dict): Nome do parâmetro -> lista de valores
+    
+    Returns:
+        list: Lista de dicionários de parâmetros
+    """
+    names = list(param_grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(param_grid[name] for name in names))]
+
+
+def random_configs(param_space, n_iter, seed=None):
+    """Sorteia configurações de um espaço de parâmetros
+    
+    Args:
+        param_space (dict): Nome do parâmetro -> lista de valores (sorteio entre eles) ou
+            tupla (mínimo, máximo), inteira ou float
+        n_iter (int): Número de configurações
+        seed (int, opcional): Semente do sorteio
+    
+    Returns:
+        list: Lista de dicionários de parâmetros
+    """
+    rng = random.Random(seed)
+    configs = []
+    for _ in range(n_iter):
+        config = {}
+        for name, spec in param_space.items():
+            if isinstance(spec, tuple):
+                low, high = spec
+                if isinstance(low, int) and isinstance(high, int):
+                    config[name] = rng.randint(low, high)
+                else:
+                    config[name] = rng.uniform(low, high)
+            else:
+                config[name] = rng.choice(list(spec))
+        configs.append(config)
+    return configs
+
+
+def _prepare_configs(configs):
+    """Valida as configs, descarta as inválidas e agrupa as que têm os mesmos períodos
+    
+    Raises:
+        ValueError: Se alguma config varia um parâmetro sem efeito no backtest
+    """
+    for config in configs:
+        inert = [name for name in BACKTEST_INERT_PARAMS if name in config]
+        if inert:
+            raise ValueError(f"Parâmetros sem efeito no backtest: {', '.join(inert)}")
+    
+    # Configs inválidas (média curta >= longa) são ignoradas
+    configs = [
+        c for c in configs
+        if c.get('ma_short_period', 9) < c.get('ma_long_period', 21)
+    ]
+    # Agrupar configs com os mesmos períodos para reaproveitar os indicadores no worker
+    configs.sort(key=lambda c: (c.get('ma_short_period', 9), c.get('ma_long_period', 21)))
+    return configs
+
+
+def _attach_shared(names, length):
+    """Initializer dos workers: anexa os arrays de candles sem copiá-los"""
+    prices_shm = shared_memory.SharedMemory(name=names[0])
+    times_shm = shared_memory.SharedMemory(name=names[1])
+    prices = np.ndarray((len(PRICE_COLUMNS), length), dtype=np.float64, buffer=prices_shm.buf)
+    times = np.ndarray((length,), dtype='datetime64[ns]', buffer=times_shm.buf)
+    columns = {'timestamp': times}
+    columns.update({col: prices[i] for i, col in enumerate(PRICE_COLUMNS)})
+    
+    _worker_data['shm'] = (prices_shm, times_shm)
+    _worker_data['df'] = pd.DataFrame(columns, copy=False)
+    _worker_data['indicators'] = (None, None)
+    
+    # Os logs por trade não são úteis em uma varredura
+    Logger('backtest').logger.setLevel(logging.WARNING)
+
+
+def _indicator_key(trading_manager):
+    """Períodos que determinam o frame de indicadores de uma config"""
+    return (trading_manager.ma_short_period, trading_manager.ma_long_period, trading_manager.atr_period)
+
+
+def _indicators_for(params):
+    """Indicadores do histórico completo, reaproveitados entre configs com os mesmos períodos"""
+    trading_manager = TradingManager(is_backtest=True, params=params, enable_chart=False)
+    key = _indicator_key(trading_manager)
+    cached_key, cached_df = _worker_data['indicators']
+    if cached_key != key:
+        cached_df = trading_manager.calculate_indicators(_worker_data['df'].copy(deep=False))
+        _worker_data['indicators'] = (key, cached_df)
+    return cached_df
+
+
+def _simulate(params, df):
+    """Roda uma simulação sem gráfico e retorna as métricas"""
+    trading_manager = TradingManager(is_backtest=True, params=params, enable_chart=False)
+    return trading_manager.run_simulation(df, precomputed_indicators=True)['metrics']
+
+
+def _flatten_metrics(metrics):
+    if not metrics:
+        return {
+            'total_trades': 0, 'win_rate': 0.0, 'net_profit': 0.0,
+            'net_profit_percentage': 0.0, 'profit_factor': 0.0, 'max_drawdown': 0.0, 'sharpe_ratio': 0.0
+        }
+    return {
+        'total_trades': metrics['general']['total_trades'],
+        'win_rate': metrics['general']['win_rate'],
+        'net_profit': metrics['profit_loss']['net_profit'],
+        'net_profit_percentage': metrics['profit_loss']['net_profit_percentage'],
+        'profit_factor': metrics['profit_loss']['profit_factor'],
+        'max_drawdown': metrics['risk']['max_drawdown'],
+        'sharpe_ratio': metrics['risk']['sharpe_ratio']
+    }
+
+
+def _evaluate(task):
+    """Avalia uma configuração, descartando cedo as claramente perdedoras
+    
+    Returns:
+        tuple: Linha do resultado e, se record, a execução completa para o ResultsStore
+            (parâmetros resolvidos, métricas e ledger); None para configs descartadas
+    """
+    params, prune_fraction, prune_min_profit, record = task
+    df = _indicators_for(params)
+    
+    if prune_fraction:
+        prefix = df.iloc[:int(len(df) * prune_fraction)]
+        partial = _flatten_metrics(_simulate(params, prefix))
+        if partial['net_profit_percentage'] < prune_min_profit:
+            return dict(params, **partial, pruned=True), None
+    
+    if not record:
+        return dict(params, **_flatten_metrics(_simulate(params, df)), pruned=False), None
+    
+    trading_manager = TradingManager(is_backtest=True, params=params, enable_chart=False)
+    metrics = trading_manager.run_simulation(df, precomputed_indicators=True)['metrics']
+    run = {'params': trading_manager.strategy_params, 'metrics': metrics, 'orders': trading_manager.ledger}
+    return dict(params, **_flatten_metrics(metrics), pruned=False), run
+
+
+class ParameterOptimizer:
+    def __init__(self, data, max_workers=None, prune_fraction=None, prune_min_profit=-5.0,
+                 store=None, symbol=None, interval=None):
+        """Otimizador de parâmetros do TradingManager em paralelo
+        
+        Os candles são colocados uma única vez em memória compartilhada e todos
+        os processos do pool leem os mesmos arrays, sem cópia por worker.
+        
+        Args:
+            data (pd.DataFrame): Candles com timestamp, open, high, low, close e volume
+            max_workers (int, opcional): Número de processos. Padrão: número de CPUs
+            prune_fraction (float, opcional): Fração inicial do histórico usada para
+                descartar configs cedo. None desativa a poda
+            prune_min_profit (float): Lucro líquido mínimo (%) no trecho inicial para
+                a config ser avaliada no histórico completo
+            store (ResultsStore, opcional): Banco onde cada config avaliada é gravada com
+                suas ordens e métricas (as descartadas pela poda não são gravadas). Os
+                workers devolvem as execuções e o processo principal as grava em lotes
+            symbol (str, opcional): Par dos candles, gravado com as execuções
+            interval (str, opcional): Intervalo dos candles, gravado com as execuções
+        """
+        self.data = data
+        self.max_workers = max_workers or os.cpu_count()
+        self.prune_fraction = prune_fraction
+        self.prune_min_profit = prune_min_profit
+        self.store = store
+        self.symbol = symbol
+        self.interval = interval
+        self._data_info = None
+
+    def _share_data(self):
+        """Copia os candles para blocos de memória compartilhada"""
+        length = len(self.data)
+        prices_shm = shared_memory.SharedMemory(create=True, size=max(len(PRICE_COLUMNS) * length * 8, 1))
+        times_shm = shared_memory.SharedMemory(create=True, size=max(length * 8, 1))
+        
+        prices = np.ndarray((len(PRICE_COLUMNS), length), dtype=np.float64, buffer=prices_shm.buf)
+        for i, col in enumerate(PRICE_COLUMNS):
+            prices[i] = self.data[col].to_numpy(dtype=np.float64)
+        times = np.ndarray((length,), dtype='datetime64[ns]', buffer=times_shm.buf)
+        times[:] = self.data['timestamp'].to_numpy(dtype='datetime64[ns]')
+        
+        return prices_shm, times_shm
+
+    def run(self, configs, rank_by='net_profit'):
+        """Executa os backtests de todas as configurações
+        
+        Args:
+            configs (list): Lista de dicionários de parâmetros (ver grid_configs/random_configs)
+            rank_by (str): Métrica usada na ordenação do resultado
+        
+        Returns:
+            pd.DataFrame: Uma linha por configuração, ordenada pela métrica (maior primeiro)
+        
+        Raises:
+            ValueError: Se alguma config varia um parâmetro de BACKTEST_INERT_PARAMS
+        """
+        configs = _prepare_configs(configs)
+        record = self.store is not None
+        tasks = [(config, self.prune_fraction, self.prune_min_profit, record) for config in configs]
+        
+        rows, pending = [], []
+        prices_shm, times_shm = self._share_data()
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_attach_shared,
+                initargs=((prices_shm.name, times_shm.name), len(self.data))
+            ) as executor:
+                chunksize = max(1, len(tasks) // (self.max_workers * 4))
+                for row, run in executor.map(_evaluate, tasks, chunksize=chunksize):
+                    rows.append(row)
+                    if run is not None:
+                        pending.append((row, run))
+                        if len(pending) >= STORE_BATCH_SIZE:
+                            self._store_runs(pending)
+                            pending = []
+            self._store_runs(pending)
+        finally:
+            prices_shm.close()
+            prices_shm.unlink()
+            times_shm.close()
+            times_shm.unlink()
+        
+        results = pd.DataFrame(rows)
+        if results.empty:
+            return results
+        return results.sort_values(['pruned', rank_by], ascending=[True, False]).reset_index(drop=True)
+
+    def _store_runs(self, pending):
+        """Grava um lote de execuções em uma transação e anota o run_id em cada linha"""
+        if not pending:
+            return
+        if self._data_info is None:
+            from .results_store import describe_data
+            self._data_info = describe_data(self.data)
+        run_ids = self.store.record_runs([
+            dict(run, symbol=self.symbol, interval=self.interval, data_info=self._data_info, source='optimizer')
+            for _, run in pending
+        ])
+        for (row, _), run_id in zip(pending, run_ids):
+            row['run_id'] = run_id
+
+    def grid_search(self, param_grid, rank_by='net_profit'):
+        """Executa todas as combinações do grid"""
+        return self.run(grid_configs(param_grid), rank_by)
+
+    def random_search(self, param_space, n_iter, seed=None, rank_by='net_profit'):
+        """Executa n_iter configurações sorteadas do espaço de parâmetros"""
+        return self.run(random_configs(param_space, n_iter, seed), rank_by)
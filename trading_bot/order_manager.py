@@ -1,35 +1,105 @@
 import json
 import os
+import time
+from bisect import bisect_left, bisect_right
 from datetime import datetime
+from .instrumentation import timed, instrumentation
 
 class OrderManager:
-    def __init__(self, prefix=''):
+    FSYNC_POLICIES = ('always', 'interval', 'never')
+
+    def __init__(self, prefix='', fsync=None, fsync_interval=None):
+        """Initialize the append-only order journal
+        
+        Args:
+            prefix (str): Prefix for the journal file name
+            fsync (str, optional): 'always' (fsync after every order), 'interval'
+                (at most once every fsync_interval seconds) or 'never'.
+                Defaults to ORDER_JOURNAL_FSYNC from .env ('always')
+            fsync_interval (float, optional): Seconds between fsyncs in 'interval' mode.
+                Defaults to ORDER_JOURNAL_FSYNC_INTERVAL from .env (1.0)
+        """
         # Criar diretório para salvar as ordens
         os.makedirs("data", exist_ok=True)
         
         # Gerar nome do arquivo com timestamp
         self.timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         prefix_str = f"{prefix}_" if prefix else ""
-        self.orders_file = f"data/{prefix_str}orders_{self.timestamp}.json"
-        self._initialize_file()
+        self.orders_file = f"data/{prefix_str}orders_{self.timestamp}.jsonl"
+        
+        self.fsync = (fsync or os.getenv('ORDER_JOURNAL_FSYNC', 'always')).lower()
+        if self.fsync not in self.FSYNC_POLICIES:
+            raise ValueError(f"Invalid fsync policy: {self.fsync}")
+        if fsync_interval is None:
+            fsync_interval = float(os.getenv('ORDER_JOURNAL_FSYNC_INTERVAL', '1.0'))
+        self.fsync_interval = fsync_interval
+        self._last_fsync = time.monotonic()
+        
+        # In-memory view of the journal (loaded lazily) and its indexes
+        self._orders = None
+        self._timestamps = []
+        self._by_symbol = {}
+        self._by_side = {}
+        self._file = None
 
-    def _initialize_file(self):
-        """Initialize orders file if it doesn't exist"""
+    def _load_orders(self):
+        """Load the journal into memory, dropping a torn last line left by a crash"""
+        if self._orders is not None:
+            return self._orders
+        
+        self._orders = []
+        self._timestamps = []
+        self._by_symbol = {}
+        self._by_side = {}
         if not os.path.exists(self.orders_file):
-            with open(self.orders_file, 'w') as f:
-                json.dump([], f)
+            # The journal file is only created by the first append
+            return self._orders
+        
+        valid_size = 0
+        with open(self.orders_file, 'rb') as f:
+            for line in f:
+                if not line.endswith(b'\n'):
+                    break
+                try:
+                    order = json.loads(line)
+                except json.JSONDecodeError:
+                    break
+                self._index(order)
+                valid_size += len(line)
+        
+        if os.path.getsize(self.orders_file) != valid_size:
+            with open(self.orders_file, 'r+b') as f:
+                f.truncate(valid_size)
+        
+        return self._orders
 
-    def _load_orders(self):
-        """Load orders from JSON file"""
-        try:
-            with open(self.orders_file, 'r') as f:
-                return json.load(f)
-        except json.JSONDecodeError:
-            return []
+    def _index(self, order):
+        """Add an order to the in-memory list and indexes"""
+        position = len(self._orders)
+        self._orders.append(order)
+        self._timestamps.append(order['timestamp'])
+        self._by_symbol.setdefault(order['symbol'], []).append(position)
+        self._by_side.setdefault(order['side'], []).append(position)
+
+    @timed('order_persist')
+    def _append(self, order):
+        """Append one JSON line to the journal, applying the fsync policy"""
+        if self._file is None:
+            self._file = open(self.orders_file, 'a')
+        line = json.dumps(order, separators=(',', ':')) + '\n'
+        self._file.write(line)
+        self._file.flush()
+        instrumentation.add_bytes('order_persist', len(line))
+        
+        if self.fsync == 'always':
+            os.fsync(self._file.fileno())
+        elif self.fsync == 'interval' and time.monotonic() - self._last_fsync >= self.fsync_interval:
+            os.fsync(self._file.fileno())
+            self._last_fsync = time.monotonic()
 
     def save_order(self, order):
-        """Save a new order to JSON file"""
-        orders = self._load_orders()
+        """Append a new order to the journal"""
+        self._load_orders()
         
         # Add timestamp and format order
         formatted_order = {
@@ -42,10 +112,9 @@ class OrderManager:
             'status': order['status']
         }
         
-        orders.append(formatted_order)
-        
-        with open(self.orders_file, 'w') as f:
-            json.dump(orders, f, indent=4)
+        self._append(formatted_order)
+        self._index(formatted_order)
+        return formatted_order
 
     def get_last_order(self):
         """Return the last executed order"""
@@ -54,4 +123,47 @@ class OrderManager:
 
     def get_all_orders(self):
         """Return all orders"""
-        return self._load_orders() 
\ No newline at end of file
+        return list(self._load_orders())
+
+    def get_orders(self, symbol=None, side=None, start=None, end=None):
+        """Return orders filtered by symbol, side and time range
+        
+        Args:
+            symbol (str, optional): Trading pair (e.g. 'BTCUSDT')
+            side (str, optional): 'BUY' or 'SELL'
+            start (datetime or str, optional): Inclusive lower bound of the order timestamp
+            end (datetime or str, optional): Inclusive upper bound of the order timestamp
+        """
+        orders = self._load_orders()
+        
+        # Orders are appended in time order, so the time range is a slice
+        lo, hi = 0, len(orders)
+        if start is not None:
+            lo = bisect_left(self._timestamps, self._to_iso(start))
+        if end is not None:
+            hi = bisect_right(self._timestamps, self._to_iso(end))
+        
+        positions = None
+        for key, index in ((symbol, self._by_symbol), (side, self._by_side)):
+            if key is None:
+                continue
+            indexed = index.get(key, [])
+            selected = indexed[bisect_left(indexed, lo):bisect_left(indexed, hi)]
+            positions = selected if positions is None else sorted(set(positions).intersection(selected))
+        
+        if positions is None:
+            positions = range(lo, hi)
+        return [orders[i] for i in positions]
+
+    @staticmethod
+    def _to_iso(value):
+        return value.isoformat() if isinstance(value, datetime) else str(value)
+
+    def close(self):
+        """Flush and close the journal file"""
+        if self._file is not None:
+            self._file.flush()
+            if self.fsync != 'never':
+                os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
@@ -0,0 +1,248 @@
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pandas as pd
+from .backtest_manager import BacktestManager
+from .trading_manager import TradingManager
+from .trade_ledger import TradeLedger
+from .signal_engine import compute_signals, EXIT_STOP_LOSS, EXIT_TAKE_PROFIT, EXIT_REASONS
+from .logger import Logger
+
+class PortfolioBacktestManager:
+    def __init__(self, symbols, start_date=None, end_date=None, interval='15m',
+                 initial_balance=1000.0, max_positions=None, params=None, max_workers=8, offline=None):
+        """Inicializa o backtest de portfólio
+        
+        A estratégia do TradingManager roda em vários pares ao mesmo tempo, sobre
+        uma linha do tempo comum, com um único caixa compartilhado e uma posição
+        por par.
+        
+        Args:
+            symbols (list): Pares de trading (ex: ['BTCUSDT', 'ETHUSDT'])
+            start_date (datetime, opcional): Data inicial. Se None, usa 7 dias atrás
+            end_date (datetime, opcional): Data final. Se None, usa data atual
+            interval (str, opcional): Intervalo dos candles. Padrão: 15 minutos
+            initial_balance (float): Caixa inicial compartilhado
+            max_positions (int, opcional): Máximo de posições abertas ao mesmo tempo.
+                Padrão: número de pares
+            params (dict, opcional): Parâmetros da estratégia (ver TradingManager.STRATEGY_PARAMS)
+            max_workers (int): Downloads simultâneos de candles
+            offline (bool, opcional): Usa apenas o cache local de candles
+        """
+        self.symbols = [symbol.upper() for symbol in symbols]
+        self.start_date = start_date or datetime.now() - timedelta(days=7)
+        self.end_date = end_date or datetime.now()
+        self.interval = interval
+        self.initial_balance = initial_balance
+        self.max_positions = max_positions or len(self.symbols)
+        self.max_workers = max_workers
+        self.offline = offline
+        
+        # TradingManager usado apenas como fonte dos parâmetros e das métricas
+        self.strategy = TradingManager(is_backtest=True, params=params, enable_chart=False)
+        self.logger = Logger("backtest")
+        self.data = None
+
+    def _load_symbol(self, symbol):
+        backtest = BacktestManager(
+            symbol=symbol,
+            start_date=self.start_date,
+            end_date=self.end_date,
+            interval=self.interval,
+            offline=self.offline
+        )
+        return symbol, backtest.prepare_backtest_data()
+
+    def load_data(self):
+        """Obtém (ou lê do cache) os candles de todos os pares em paralelo
+        
+        Returns:
+            dict: Par -> DataFrame de candles
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self.data = dict(executor.map(self._load_symbol, self.symbols))
+        return self.data
+
+    def align(self, data):
+        """Alinha os candles de todos os pares em uma linha do tempo comum
+        
+        Args:
+            data (dict): Par -> DataFrame de candles
+        
+        Returns:
+            tuple: (timestamps, dict coluna -> DataFrame tempo x par), com NaN
+                onde um par não tem candle
+        """
+        frames = {}
+        for column in ['open', 'high', 'low', 'close', 'volume']:
+            frames[column] = pd.DataFrame({
+                symbol: df.set_index('timestamp')[column] for symbol, df in data.items()
+            }).sort_index()[self.symbols]
+        return frames['close'].index, frames
+
+    def calculate_indicators(self, frames):
+        """Mesmos indicadores de TradingManager.calculate_indicators, para todos os pares de uma vez"""
+        strategy = self.strategy
+        close, high, low = frames['close'], frames['high'], frames['low']
+        previous_close = close.shift(1)
+        tr = np.maximum(high - low, np.maximum(abs(high - previous_close), abs(low - previous_close)))
+        return {
+            'MA_short': close.rolling(window=strategy.ma_short_period).mean(),
+            'MA_long': close.rolling(window=strategy.ma_long_period).mean(),
+            'TR': tr,
+            'ATR': tr.rolling(window=strategy.atr_period).mean(),
+        }
+
+    def run_backtest(self, data=None):
+        """Executa o backtest de portfólio
+        
+        Args:
+            data (dict, opcional): Par -> DataFrame de candles. Se None, usa load_data()
+        
+        Returns:
+            dict: Ordens, métricas do portfólio e métricas por par
+        """
+        if data is None:
+            data = self.data if self.data is not None else self.load_data()
+        
+        timestamps, frames = self.align(data)
+        indicators = self.calculate_indicators(frames)
+        
+        close = frames['close'].to_numpy(dtype=np.float64)
+        ma_short = indicators['MA_short'].to_numpy(dtype=np.float64)
+        ma_long = indicators['MA_long'].to_numpy(dtype=np.float64)
+        valid = ~np.isnan(np.stack([
+            close, frames['volume'].to_numpy(dtype=np.float64), ma_short, ma_long,
+            indicators['ATR'].to_numpy(dtype=np.float64)
+        ])).any(axis=0)
+        
+        # Como em run_simulation, os stops dinâmicos usam o padrão de 2% do preço
+        strategy = self.strategy
+        signals = compute_signals(
+            close, ma_short, ma_long, close * 0.02,
+            strategy.stop_loss_percent, strategy.take_profit_percent,
+            sl_bounds=(strategy.min_stop_loss_percent, strategy.max_stop_loss_percent),
+            tp_bounds=(strategy.min_take_profit_percent, strategy.max_take_profit_percent)
+        )
+        lag = signals['start']
+        entry = signals['entry']
+        entry[lag:] &= valid[lag:] & valid[:-lag]
+        entry[:lag] = False
+        
+        self.logger.info("\n" + "="*50)
+        self.logger.info("Iniciando Backtest de Portfólio")
+        self.logger.info(f"Pares: {', '.join(self.symbols)}")
+        self.logger.info(f"Período: {self.start_date} até {self.end_date}")
+        self.logger.info(f"Candles na linha do tempo: {len(timestamps)}")
+        self.logger.info("="*50 + "\n")
+        
+        orders = self._step(timestamps, close, valid, signals)
+        # Posições abertas são avaliadas pelo último fechamento conhecido do par
+        return self._results(orders, (timestamps, frames['close'].ffill().to_numpy(dtype=np.float64)))
+
+    def _step(self, timestamps, close, valid, signals):
+        """Avança todos os pares juntos pela linha do tempo, com caixa compartilhado"""
+        n_symbols = len(self.symbols)
+        exit_code = signals['exit_code']
+        entry = signals['entry']
+        new_sl, new_tp, tp_update = signals['new_sl'], signals['new_tp'], signals['tp_update']
+        
+        holding = np.zeros(n_symbols, dtype=bool)
+        amount = np.zeros(n_symbols)
+        entry_price = np.zeros(n_symbols)
+        stop_loss = np.zeros(n_symbols)
+        take_profit = np.zeros(n_symbols)
+        self.cash = self.initial_balance
+        orders = TradeLedger(symbols=self.symbols)
+        
+        # Só as linhas com sinal de entrada ou com posição aberta precisam ser visitadas
+        entry_rows = np.flatnonzero(entry.any(axis=1))
+        t = int(entry_rows[0]) if len(entry_rows) else len(timestamps)
+        while t < len(timestamps):
+            prices = close[t]
+            timestamp = timestamps[t]
+            
+            # Saídas dos pares em posição (mesma prioridade de check_signals)
+            active = holding & valid[t]
+            hit_sl = active & (prices <= stop_loss)
+            hit_tp = active & ~hit_sl & (prices >= take_profit)
+            technical = active & ~hit_sl & ~hit_tp & (exit_code[t] > 0)
+            for i in np.flatnonzero(hit_sl | hit_tp | technical):
+                reason = EXIT_STOP_LOSS if hit_sl[i] else EXIT_TAKE_PROFIT if hit_tp[i] else int(exit_code[t, i])
+                self._sell(orders, i, float(prices[i]), timestamp, amount[i], entry_price[i], EXIT_REASONS[reason])
+                holding[i] = False
+            exited = hit_sl | hit_tp | technical
+            
+            # Trailing stop dos pares que continuam em posição
+            staying = active & ~exited
+            stop_loss[staying] = np.maximum(stop_loss[staying], new_sl[t, staying])
+            take_profit[staying] = np.maximum(take_profit[staying], tp_update[t, staying])
+            
+            # Entradas, dividindo o caixa entre as vagas livres
+            candidates = np.flatnonzero(entry[t] & ~holding & ~exited)
+            if len(candidates):
+                # Prioridade para as tendências mais fortes quando faltam vagas
+                candidates = candidates[np.argsort(-signals['trend_strength'][t, candidates], kind='stable')]
+                for i in candidates:
+                    free_slots = self.max_positions - int(holding.sum())
+                    if free_slots <= 0:
+                        break
+                    price = float(prices[i])
+                    amount[i] = (self.cash * 0.99 / free_slots) / price
+                    entry_price[i] = price
+                    stop_loss[i] = new_sl[t, i]
+                    take_profit[i] = new_tp[t, i]
+                    holding[i] = True
+                    self._buy(orders, i, price, timestamp, amount[i], stop_loss[i], take_profit[i])
+            
+            if holding.any():
+                t += 1
+            else:
+                k = np.searchsorted(entry_rows, t + 1)
+                t = int(entry_rows[k]) if k < len(entry_rows) else len(timestamps)
+        
+        self.open_positions = {self.symbols[i]: float(amount[i]) for i in np.flatnonzero(holding)}
+        return orders
+
+    def _buy(self, orders, i, price, timestamp, amount, stop_loss, take_profit):
+        cost = amount * price
+        orders.record_buy(timestamp, price, amount, cost, self.cash, stop_loss, take_profit, symbol=self.symbols[i])
+        self.cash -= cost
+
+    def _sell(self, orders, i, price, timestamp, amount, entry_price, reason):
+        revenue = amount * price
+        orders.record_sell(
+            timestamp, price, amount, revenue,
+            revenue - (amount * entry_price),
+            (price - entry_price) / entry_price * 100,
+            reason, self.cash, symbol=self.symbols[i]
+        )
+        self.cash += revenue
+
+    def _results(self, orders, prices=None):
+        metrics = self.strategy.calculate_metrics(orders, self.initial_balance, self.cash, prices=prices)
+        
+        per_symbol = {}
+        sells = orders.sells
+        for i, symbol in enumerate(self.symbols):
+            profit = sells['profit'][sells['symbol'] == i]
+            per_symbol[symbol] = {
+                'total_trades': len(profit),
+                'winning_trades': int((profit > 0).sum()),
+                'net_profit': float(profit.sum())
+            }
+        
+        self.logger.info("\n" + "="*50)
+        self.logger.info("Backtest de Portfólio Finalizado")
+        if metrics:
+            self.logger.info(f"Total de trades: {metrics['general']['total_trades']}")
+            self.logger.info(f"Lucro líquido: ${metrics['profit_loss']['net_profit']:.2f} ({metrics['profit_loss']['net_profit_percentage']:.2f}%)")
+            for symbol, summary in per_symbol.items():
+                self.logger.info(f"{symbol}: {summary['total_trades']} trades, ${summary['net_profit']:.2f}")
+        self.logger.info("="*50 + "\n")
+        
+        return {
+            'orders': orders,
+            'metrics': metrics,
+            'per_symbol': per_symbol
+        }
@@ -0,0 +1,154 @@
+import json
+import time
+import asyncio
+import numpy as np
+from .kline_cache import interval_to_ms, klines_to_array
+from .live_runner import LiveRunner
+
+
+class SimulatedClock:
+    def __init__(self, start_ms=0):
+        """Relógio controlado pelo replay (substitui time.time no LiveRunner)
+        
+        Args:
+            start_ms (int): Horário inicial em ms desde epoch
+        """
+        self.now_ms = int(start_ms)
+
+    def __call__(self):
+        """Horário atual em segundos desde epoch, como time.time"""
+        return self.now_ms / 1000
+
+    def advance_to(self, ms):
+        """Avança o relógio até ms (nunca volta no tempo)"""
+        if ms > self.now_ms:
+            self.now_ms = int(ms)
+
+
+class ReplayClient:
+    def __init__(self, klines, interval, clock=None):
+        """Stub do cliente REST da Binance servido a partir de candles históricos
+        
+        get_klines só enxerga os candles já abertos no relógio simulado, como a
+        API real (o LiveRunner descarta o candle ainda aberto).
+        
+        Args:
+            klines: Candles históricos (KLINE_DTYPE ou linhas no formato da API)
+            interval (str): Intervalo dos candles (ex: '15m')
+            clock (SimulatedClock, opcional): Relógio do replay. Padrão: um novo relógio no epoch
+        """
+        self.klines = klines_to_array(klines)
+        self.interval = interval
+        self.interval_ms = interval_to_ms(interval)
+        self.clock = clock if clock is not None else SimulatedClock()
+        self.requests = 0
+
+    def get_klines(self, symbol, interval, limit=500, startTime=None, endTime=None, **kwargs):
+        """Mesma assinatura de binance.client.Client.get_klines"""
+        if interval != self.interval:
+            raise ValueError(f"Replay carregado em {self.interval}, pedido {interval}")
+        self.requests += 1
+        timestamps = self.klines['timestamp']
+        hi = np.searchsorted(timestamps, self.clock.now_ms, side='right')
+        if endTime is not None:
+            hi = min(hi, np.searchsorted(timestamps, endTime, side='right'))
+        if startTime is not None:
+            lo = np.searchsorted(timestamps, startTime, side='left')
+            hi = min(hi, lo + limit)
+        else:
+            lo = max(hi - limit, 0)
+        return [
+            [int(row['timestamp']), repr(float(row['open'])), repr(float(row['high'])), repr(float(row['low'])),
+             repr(float(row['close'])), repr(float(row['volume'])), int(row['timestamp']) + self.interval_ms - 1]
+            for row in self.klines[lo:hi]
+        ]
+
+
+class RecordingBot:
+    def __init__(self):
+        """Stub do telegram.Bot: guarda as mensagens em vez de enviá-las"""
+        self.messages = []
+
+    async def send_message(self, chat_id, text, parse_mode=None):
+        self.messages.append(text)
+
+
+class ReplayRunner(LiveRunner):
+    def __init__(self, trading_manager, interval='15m', client=None, warmup_candles=None, yield_every=1000):
+        """Executa o caminho ao vivo (LiveRunner) sobre candles históricos
+        
+        Cada candle vira um evento 'kline' fechado do WebSocket, entregue a
+        handle_message com o relógio simulado no fechamento do candle e sem
+        esperas, de modo que aquecimento, backfill de lacunas, check_signals,
+        gráfico e notificações rodam como ao vivo, na velocidade da CPU.
+        
+        Args:
+            trading_manager: TradingManager em modo ao vivo, criado com client=ReplayClient
+                (e um notifier local, ex: TelegramNotifier(bot=RecordingBot()))
+            interval (str): Intervalo dos candles
+            client (ReplayClient, opcional): Fonte dos candles. Padrão: trading_manager.client
+            warmup_candles (int, opcional): Candles usados no aquecimento
+            yield_every (int): Candles entre devoluções do controle ao event loop
+        """
+        client = client if client is not None else trading_manager.client
+        super().__init__(trading_manager, interval=interval, client=client,
+                         warmup_candles=warmup_candles, clock=client.clock)
+        self.yield_every = max(int(yield_every), 1)
+        self.candles = 0
+        self.elapsed = 0.0
+
+    def _message(self, row):
+        """Evento 'kline' fechado no formato do stream da Binance"""
+        open_time = int(row['timestamp'])
+        close_time = open_time + self.interval_ms - 1
+        return json.dumps({
+            'e': 'kline',
+            'E': close_time + 1,
+            's': self.symbol,
+            'k': {
+                't': open_time,
+                'T': close_time,
+                's': self.symbol,
+                'i': self.interval,
+                'o': repr(float(row['open'])),
+                'c': repr(float(row['close'])),
+                'h': repr(float(row['high'])),
+                'l': repr(float(row['low'])),
+                'v': repr(float(row['volume'])),
+                'x': True
+            }
+        })
+
+    async def run(self):
+        """Reproduz os candles a partir do fim do aquecimento até o último"""
+        data = self.client.klines
+        self.running = True
+        warmup = min(self.warmup_candles, len(data))
+        if self.last_open_time is None and warmup:
+            # O aquecimento vê apenas os primeiros warmup_candles já fechados
+            self.clock.advance_to(int(data['timestamp'][warmup - 1]) + self.interval_ms)
+            self.warm_up()
+        
+        start = 0 if self.last_open_time is None else np.searchsorted(data['timestamp'], self.last_open_time, side='right')
+        started = time.perf_counter()
+        try:
+            for row in data[start:]:
+                if not self.running:
+                    break
+                self.clock.advance_to(int(row['timestamp']) + self.interval_ms)
+                self.handle_message(self._message(row))
+                self.candles += 1
+                if self.candles % self.yield_every == 0:
+                    await asyncio.sleep(0)
+        finally:
+            self.elapsed += time.perf_counter() - started
+            self.running = False
+
+    def stats(self):
+        """Candles reproduzidos, tempo gasto e vazão"""
+        return {
+            'candles': self.candles,
+            'elapsed': self.elapsed,
+            'candles_per_second': self.candles / self.elapsed if self.elapsed else 0.0,
+            'rest_requests': self.client.requests
+        }
@@ -0,0 +1,125 @@
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+import numpy as np
+from .kline_cache import KLINE_DTYPE, interval_to_ms, to_milliseconds, array_to_frame
+
+# Deslocamento do início das barras em relação ao epoch (as semanas da Binance começam na segunda-feira)
+BAR_OFFSETS_MS = {
+    '1w': 4 * 24 * 60 * 60_000,
+}
+
+
+def bar_open_times(timestamps, interval):
+    """Horário de abertura (ms) da barra do intervalo que contém cada timestamp"""
+    interval_ms = interval_to_ms(interval)
+    offset = BAR_OFFSETS_MS.get(interval, 0)
+    return (np.asarray(timestamps, dtype=np.int64) - offset) // interval_ms * interval_ms + offset
+
+
+def resample_klines(data, interval, base_interval='1m'):
+    """Agrega candles de um intervalo menor em um intervalo maior
+    
+    Cada barra tem a abertura do primeiro candle, a máxima, a mínima, o
+    fechamento do último e o volume somado, com os limites alinhados aos da
+    Binance. Barras das pontas sem todos os candles base (início ou fim dos
+    dados) são descartadas; lacunas no meio da série são mantidas, como na
+    Binance.
+    
+    Args:
+        data (np.ndarray): Candles base em ordem (KLINE_DTYPE)
+        interval (str): Intervalo de destino (ex: '1h')
+        base_interval (str): Intervalo dos candles base
+    
+    Returns:
+        np.ndarray: Candles agregados (KLINE_DTYPE)
+    """
+    interval_ms = interval_to_ms(interval)
+    base_ms = interval_to_ms(base_interval)
+    if interval_ms % base_ms:
+        raise ValueError(f"{interval} não é múltiplo de {base_interval}")
+    if interval_ms == base_ms or not len(data):
+        return np.asarray(data, dtype=KLINE_DTYPE)
+    
+    timestamps = data['timestamp']
+    opens = bar_open_times(timestamps, interval)
+    starts = np.flatnonzero(np.r_[True, opens[1:] != opens[:-1]])
+    ends = np.r_[starts[1:], len(data)] - 1
+    
+    bars = np.empty(len(starts), dtype=KLINE_DTYPE)
+    bars['timestamp'] = opens[starts]
+    bars['open'] = data['open'][starts]
+    bars['high'] = np.maximum.reduceat(data['high'], starts)
+    bars['low'] = np.minimum.reduceat(data['low'], starts)
+    bars['close'] = data['close'][ends]
+    bars['volume'] = np.add.reduceat(data['volume'], starts)
+    
+    # Barras parciais nas pontas
+    keep = slice(
+        1 if timestamps[0] > opens[0] else 0,
+        -1 if timestamps[-1] < opens[-1] + interval_ms - base_ms else None
+    )
+    return bars[keep]
+
+
+class TimeframeResampler:
+    # Séries derivadas compartilhadas entre instâncias (backtests em vários intervalos no mesmo processo)
+    _memo = OrderedDict()
+    _lock = threading.Lock()
+
+    def __init__(self, cache, base_interval='1m', max_entries=32):
+        """Serve qualquer intervalo a partir de uma única série base em cache
+        
+        Só o intervalo base é baixado e armazenado pelo KlineCache; os demais são
+        agregados a partir dele e memorizados em memória (LRU), de modo que rodar
+        a mesma estratégia em 5m, 15m, 1h e 4h faz um único download.
+        
+        Args:
+            cache (KlineCache): Cache da série base
+            base_interval (str): Intervalo da série base
+            max_entries (int): Séries derivadas mantidas em memória
+        """
+        self.cache = cache
+        self.base_interval = base_interval
+        self.max_entries = max_entries
+
+    def get_array(self, symbol, interval, start, end):
+        """Candles de [start, end] no intervalo pedido (KLINE_DTYPE)"""
+        if interval == self.base_interval:
+            return self.cache.get_array(symbol, interval, start, end)
+        
+        interval_ms = interval_to_ms(interval)
+        offset = BAR_OFFSETS_MS.get(interval, 0)
+        start_ms = int(bar_open_times(to_milliseconds(start) + interval_ms - 1, interval))
+        end_ms = int(bar_open_times(to_milliseconds(end), interval)) + interval_ms
+        # Só barras já fechadas
+        now_ms = to_milliseconds(datetime.now(timezone.utc))
+        end_ms = min(end_ms, (now_ms - offset) // interval_ms * interval_ms + offset)
+        if end_ms <= start_ms:
+            return np.empty(0, dtype=KLINE_DTYPE)
+        
+        key = (self.cache.cache_dir, symbol.upper(), self.base_interval, interval, start_ms, end_ms)
+        with self._lock:
+            if key in self._memo:
+                self._memo.move_to_end(key)
+                return self._memo[key]
+        
+        base = self.cache.get_array(symbol, self.base_interval, start_ms, end_ms - 1)
+        bars = resample_klines(base, interval, self.base_interval)
+        bars.flags.writeable = False
+        
+        with self._lock:
+            self._memo[key] = bars
+            while len(self._memo) > self.max_entries:
+                self._memo.popitem(last=False)
+        return bars
+
+    def get_klines(self, symbol, interval, start, end):
+        """Como get_array, mas retorna o DataFrame usado pelo backtest"""
+        return array_to_frame(self.get_array(symbol, interval, start, end))
+
+    @classmethod
+    def clear(cls):
+        """Descarta as séries derivadas memorizadas"""
+        with cls._lock:
+            cls._memo.clear()
@@ -0,0 +1,306 @@
+import os
+import json
+import hashlib
+import sqlite3
+from datetime import datetime
+import numpy as np
+import pandas as pd
+from .trade_ledger import TradeLedger
+
+# Métricas com coluna própria (indexadas ou usadas em filtros/ordenação)
+METRIC_COLUMNS = ('total_trades', 'win_rate', 'net_profit', 'net_profit_percentage', 'profit_factor', 'max_drawdown')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    created_at TEXT NOT NULL,
+    source TEXT NOT NULL,
+    symbol TEXT,
+    interval TEXT,
+    params TEXT NOT NULL,
+    params_hash TEXT NOT NULL,
+    data_fingerprint TEXT,
+    data_start INTEGER,
+    data_end INTEGER,
+    candles INTEGER,
+    total_trades INTEGER,
+    win_rate REAL,
+    net_profit REAL,
+    net_profit_percentage REAL,
+    profit_factor REAL,
+    max_drawdown REAL,
+    metrics TEXT
+);
+CREATE INDEX IF NOT EXISTS runs_symbol_interval_profit ON runs (symbol, interval, net_profit);
+CREATE INDEX IF NOT EXISTS runs_symbol_interval_factor ON runs (symbol, interval, profit_factor);
+CREATE INDEX IF NOT EXISTS runs_net_profit ON runs (net_profit);
+CREATE INDEX IF NOT EXISTS runs_profit_factor ON runs (profit_factor);
+CREATE INDEX IF NOT EXISTS runs_params ON runs (params_hash);
+CREATE INDEX IF NOT EXISTS runs_fingerprint ON runs (data_fingerprint);
+CREATE TABLE IF NOT EXISTS orders (
+    run_id INTEGER NOT NULL REFERENCES runs (id) ON DELETE CASCADE,
+    seq INTEGER NOT NULL,
+    symbol TEXT,
+    type TEXT NOT NULL,
+    timestamp INTEGER NOT NULL,
+    price REAL,
+    amount REAL,
+    value REAL,
+    profit REAL,
+    profit_percentage REAL,
+    reason TEXT,
+    balance_before REAL,
+    balance_after REAL,
+    stop_loss REAL,
+    take_profit REAL,
+    PRIMARY KEY (run_id, seq)
+) WITHOUT ROWID;
+"""
+
+ORDER_COLUMNS = ('symbol', 'type', 'timestamp', 'price', 'amount', 'value', 'profit', 'profit_percentage',
+                 'reason', 'balance_before', 'balance_after', 'stop_loss', 'take_profit')
+
+
+def _json_default(value):
+    # Escalares do NumPy e horários nas métricas
+    if hasattr(value, 'item'):
+        return value.item()
+    return str(value)
+
+
+def params_json(params):
+    """Parâmetros em JSON canônico (chaves ordenadas), usado na comparação entre execuções"""
+    return json.dumps(params or {}, sort_keys=True, default=_json_default)
+
+
+def describe_data(data):
+    """Impressão digital dos candles de uma execução
+    
+    Args:
+        data (pd.DataFrame ou np.ndarray): Candles (DataFrame do backtest ou KLINE_DTYPE)
+    
+    Returns:
+        dict: fingerprint (hash dos horários e preços), início/fim em ms e número de candles
+    """
+    if isinstance(data, pd.DataFrame):
+        timestamps = data['timestamp'].to_numpy(dtype='datetime64[ms]').astype(np.int64)
+    else:
+        timestamps = np.asarray(data['timestamp']).astype('datetime64[ms]').astype(np.int64)
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(timestamps).tobytes())
+    for col in ('open', 'high', 'low', 'close', 'volume'):
+        digest.update(np.ascontiguousarray(np.asarray(data[col], dtype=np.float64)).tobytes())
+    return {
+        'data_fingerprint': digest.hexdigest(),
+        'data_start': int(timestamps[0]) if len(timestamps) else None,
+        'data_end': int(timestamps[-1]) if len(timestamps) else None,
+        'candles': len(timestamps)
+    }
+
+
+class ResultsStore:
+    def __init__(self, path=None, timeout=30.0):
+        """Banco SQLite com os resultados de todas as execuções de backtest
+        
+        Cada execução grava a configuração, a impressão digital dos dados, as
+        métricas completas (JSON) e as principais em colunas indexadas, e cada
+        ordem em uma linha da tabela orders. O banco usa WAL: várias leituras
+        podem acontecer durante uma escrita, e processos diferentes podem gravar
+        no mesmo arquivo (esperando até `timeout` pelo lock). Para muitas
+        execuções, record_runs grava tudo em uma única transação.
+        
+        Args:
+            path (str, opcional): Arquivo do banco. Se None, usa RESULTS_DB do .env
+                (padrão: data/results.sqlite)
+            timeout (float): Espera máxima pelo lock de escrita em segundos
+        """
+        self.path = path or os.getenv('RESULTS_DB', 'data/results.sqlite')
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.conn = sqlite3.connect(self.path, timeout=timeout)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.execute('PRAGMA foreign_keys=ON')
+        self.conn.executescript(SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _insert_run(self, run):
+        params = params_json(run.get('params'))
+        metrics = run.get('metrics')
+        flat = self._flatten(metrics)
+        data_info = run.get('data_info') or {}
+        cursor = self.conn.execute(
+            "INSERT INTO runs (created_at, source, symbol, interval, params, params_hash, data_fingerprint, "
+            "data_start, data_end, candles, " + ", ".join(METRIC_COLUMNS) + ", metrics) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, " + ", ".join('?' * len(METRIC_COLUMNS)) + ", ?)",
+            (
+                datetime.now().isoformat(timespec='seconds'), run.get('source', 'backtest'),
+                run.get('symbol'), run.get('interval'), params, hashlib.sha1(params.encode()).hexdigest(),
+                data_info.get('data_fingerprint'), data_info.get('data_start'), data_info.get('data_end'),
+                data_info.get('candles'), *(flat[name] for name in METRIC_COLUMNS),
+                json.dumps(metrics, default=_json_default) if metrics else None
+            )
+        )
+        run_id = cursor.lastrowid
+        
+        orders = run.get('orders')
+        if orders is not None and len(orders):
+            self.conn.executemany(
+                "INSERT INTO orders (run_id, seq, " + ", ".join(ORDER_COLUMNS) + ") "
+                "VALUES (?, ?, " + ", ".join('?' * len(ORDER_COLUMNS)) + ")",
+                self._order_rows(run_id, orders)
+            )
+        return run_id
+
+    @staticmethod
+    def _flatten(metrics):
+        if not metrics:
+            return {name: 0 if name == 'total_trades' else None for name in METRIC_COLUMNS}
+        return {
+            'total_trades': int(metrics['general']['total_trades']),
+            'win_rate': float(metrics['general']['win_rate']),
+            'net_profit': float(metrics['profit_loss']['net_profit']),
+            'net_profit_percentage': float(metrics['profit_loss']['net_profit_percentage']),
+            'profit_factor': float(metrics['profit_loss']['profit_factor']),
+            'max_drawdown': float(metrics['risk']['max_drawdown'])
+        }
+
+    @staticmethod
+    def _order_rows(run_id, orders):
+        """Linhas da tabela orders a partir das colunas do ledger (NaN vira NULL)"""
+        if not isinstance(orders, TradeLedger):
+            orders = TradeLedger.from_orders(list(orders))
+        df = orders.to_dataframe()
+        if 'symbol' not in df:
+            df.insert(0, 'symbol', None)
+        df['timestamp'] = df['timestamp'].to_numpy(dtype='datetime64[ms]').astype(np.int64)
+        df = df[list(ORDER_COLUMNS)].astype(object).where(df[list(ORDER_COLUMNS)].notna(), None)
+        return [(run_id, seq, *row) for seq, row in enumerate(df.itertuples(index=False, name=None))]
+
+    def record_run(self, params, metrics, orders=None, symbol=None, interval=None, data=None, data_info=None, source='backtest'):
+        """Grava uma execução
+        
+        Args:
+            params (dict): Parâmetros da estratégia usados
+            metrics (dict): Métricas de TradingManager.calculate_metrics (None sem trades)
+            orders (TradeLedger ou list, opcional): Ordens executadas
+            symbol (str, opcional): Par (ex: 'BTCUSDT')
+            interval (str, opcional): Intervalo dos candles
+            data (pd.DataFrame, opcional): Candles usados, para a impressão digital
+            data_info (dict, opcional): Resultado de describe_data já calculado (evita recalcular)
+            source (str): Origem da execução (ex: 'backtest', 'optimizer')
+        
+        Returns:
+            int: Id da execução
+        """
+        if data_info is None and data is not None:
+            data_info = describe_data(data)
+        return self.record_runs([{
+            'params': params, 'metrics': metrics, 'orders': orders, 'symbol': symbol,
+            'interval': interval, 'data_info': data_info, 'source': source
+        }])[0]
+
+    def record_runs(self, runs):
+        """Grava várias execuções em uma única transação
+        
+        Args:
+            runs (list): Dicts com as chaves de record_run (params, metrics, orders, symbol,
+                interval, data_info e source)
+        
+        Returns:
+            list: Ids das execuções, na mesma ordem
+        """
+        with self.conn:
+            return [self._insert_run(run) for run in runs]
+
+    def top(self, n=10, by='profit_factor', symbol=None, interval=None, data_fingerprint=None, min_trades=1):
+        """As n melhores execuções por uma métrica, sem ler as ordens
+        
+        Args:
+            n (int): Número de execuções
+            by (str): Métrica de METRIC_COLUMNS (maior primeiro)
+            symbol (str, opcional): Filtra pelo par
+            interval (str, opcional): Filtra pelo intervalo
+            data_fingerprint (str, opcional): Só execuções sobre os mesmos candles
+            min_trades (int): Mínimo de trades (evita profit factor infinito com 1 trade)
+        
+        Returns:
+            pd.DataFrame: Uma linha por execução, com os parâmetros expandidos em colunas
+        """
+        if by not in METRIC_COLUMNS:
+            raise ValueError(f"Métrica desconhecida: {by} (opções: {', '.join(METRIC_COLUMNS)})")
+        where, args = self._filters(symbol, interval, data_fingerprint)
+        where.append("total_trades >= ?")
+        args.append(min_trades)
+        df = pd.read_sql_query(
+            "SELECT id, created_at, source, symbol, interval, params, data_fingerprint, candles, "
+            + ", ".join(METRIC_COLUMNS) + f" FROM runs WHERE {' AND '.join(where)} "
+            f"ORDER BY {by} DESC LIMIT ?",
+            self.conn, params=(*args, n)
+        )
+        return self._expand_params(df)
+
+    def runs(self, symbol=None, interval=None, data_fingerprint=None, params=None):
+        """Execuções gravadas (sem as ordens e sem o JSON das métricas)
+        
+        Args:
+            params (dict, opcional): Só execuções com exatamente estes parâmetros
+        """
+        where, args = self._filters(symbol, interval, data_fingerprint)
+        if params is not None:
+            where.append("params_hash = ?")
+            args.append(hashlib.sha1(params_json(params).encode()).hexdigest())
+        df = pd.read_sql_query(
+            "SELECT id, created_at, source, symbol, interval, params, data_fingerprint, data_start, data_end, "
+            "candles, " + ", ".join(METRIC_COLUMNS) + f" FROM runs WHERE {' AND '.join(where) or '1'} ORDER BY id",
+            self.conn, params=args
+        )
+        return self._expand_params(df)
+
+    def metrics(self, run_id):
+        """Dict completo de métricas de uma execução"""
+        row = self.conn.execute("SELECT metrics FROM runs WHERE id = ?", (run_id,)).fetchone()
+        if row is None:
+            raise KeyError(f"Execução não encontrada: {run_id}")
+        return json.loads(row[0]) if row[0] else None
+
+    def orders(self, run_id):
+        """Ordens de uma execução (mesmas colunas de TradeLedger.to_dataframe)"""
+        df = pd.read_sql_query(
+            "SELECT " + ", ".join(ORDER_COLUMNS) + " FROM orders WHERE run_id = ? ORDER BY seq",
+            self.conn, params=(run_id,)
+        )
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        if df['symbol'].isna().all():
+            df = df.drop(columns='symbol')
+        return df
+
+    def delete_runs(self, run_ids):
+        """Remove execuções e suas ordens"""
+        with self.conn:
+            self.conn.executemany("DELETE FROM runs WHERE id = ?", [(int(run_id),) for run_id in run_ids])
+
+    @staticmethod
+    def _filters(symbol, interval, data_fingerprint):
+        where, args = [], []
+        for column, value in (('symbol', symbol), ('interval', interval), ('data_fingerprint', data_fingerprint)):
+            if value is not None:
+                where.append(f"{column} = ?")
+                args.append(value)
+        return where, args
+
+    @staticmethod
+    def _expand_params(df):
+        if df.empty:
+            return df.drop(columns='params')
+        params = pd.DataFrame([json.loads(value) for value in df.pop('params')], index=df.index)
+        return pd.concat([df, params], axis=1)
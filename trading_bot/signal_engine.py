@@ -0,0 +1,202 @@
+import numpy as np
+
+# Códigos dos motivos de saída, na ordem de prioridade usada por check_signals
+EXIT_STOP_LOSS = 1
+EXIT_TAKE_PROFIT = 2
+EXIT_DOWNTREND = 3
+EXIT_WEAK_TREND = 4
+EXIT_BELOW_MA_SHORT = 5
+
+EXIT_REASONS = {
+    EXIT_STOP_LOSS: "Stop Loss",
+    EXIT_TAKE_PROFIT: "Take Profit",
+    EXIT_DOWNTREND: "Tendência de Baixa",
+    EXIT_WEAK_TREND: "Tendência Fraca",
+    EXIT_BELOW_MA_SHORT: "Preço < Média Curta",
+}
+
+
+def dynamic_stops(close, atr, trend_strength, stop_loss_percent, take_profit_percent, sl_bounds=(0.005, 0.05), tp_bounds=(0.01, 0.10)):
+    """Versão vetorizada de TradingManager.calculate_dynamic_stops
+    
+    Args:
+        close (np.ndarray): Preços de fechamento
+        atr (np.ndarray): Valores do ATR (volatilidade)
+        trend_strength (np.ndarray): Força da tendência em percentual
+        stop_loss_percent (float): Stop loss base (fração)
+        take_profit_percent (float): Take profit base (fração)
+        sl_bounds (tuple): Limites (mínimo, máximo) do stop loss dinâmico
+        tp_bounds (tuple): Limites (mínimo, máximo) do take profit dinâmico
+    
+    Returns:
+        tuple: Arrays (stop_loss_price, take_profit_price, sl_percent, tp_percent)
+    """
+    volatility_factor = atr / close
+    sl_volatility_multiplier = 1 + (volatility_factor * 10)
+    tp_trend_multiplier = 1 + (np.abs(trend_strength) / 100)
+    
+    sl_percent = stop_loss_percent * sl_volatility_multiplier
+    tp_percent = take_profit_percent * tp_trend_multiplier
+    
+    # Limitar os valores para evitar extremos
+    sl_percent = np.minimum(np.maximum(sl_percent, sl_bounds[0]), sl_bounds[1])
+    tp_percent = np.minimum(np.maximum(tp_percent, tp_bounds[0]), tp_bounds[1])
+    
+    return close * (1 - sl_percent), close * (1 + tp_percent), sl_percent, tp_percent
+
+
+def compute_signals(close, ma_short, ma_long, atr, stop_loss_percent, take_profit_percent, lag=2, sl_bounds=(0.005, 0.05), tp_bounds=(0.01, 0.10)):
+    """Calcula todos os sinais que não dependem do estado da posição
+    
+    Args:
+        close (np.ndarray): Preços de fechamento
+        ma_short (np.ndarray): Média móvel curta
+        ma_long (np.ndarray): Média móvel longa
+        atr (np.ndarray): ATR usado nos stops dinâmicos
+        stop_loss_percent (float): Stop loss base (fração)
+        take_profit_percent (float): Take profit base (fração)
+        lag (int): Distância do candle "anterior" usado no cruzamento das médias
+        sl_bounds (tuple): Limites (mínimo, máximo) do stop loss dinâmico
+        tp_bounds (tuple): Limites (mínimo, máximo) do take profit dinâmico
+    
+    Os arrays podem ser 2D (tempo x par), com o tempo no primeiro eixo.
+    
+    Returns:
+        dict: Arrays de entrada, saída técnica e stops dinâmicos por candle
+    """
+    n = len(close)
+    trend_strength = (ma_short - ma_long) / ma_long * 100
+    
+    # Sinal de compra: média curta cruza a longa para cima E preço acima das duas médias
+    entry = np.zeros(np.shape(close), dtype=bool)
+    if n > lag:
+        entry[lag:] = (
+            (ma_short[lag:] > ma_long[lag:]) &
+            (ma_short[:-lag] < ma_long[:-lag]) &
+            (close[lag:] > ma_short[lag:]) &
+            (close[lag:] > ma_long[lag:])
+        )
+    
+    # Saídas técnicas, na mesma ordem de prioridade de check_signals
+    exit_code = np.select(
+        [ma_short < ma_long, trend_strength < 0.05, close < ma_short],
+        [EXIT_DOWNTREND, EXIT_WEAK_TREND, EXIT_BELOW_MA_SHORT],
+        0
+    ).astype(np.int8)
+    
+    new_sl, new_tp, sl_percent, tp_percent = dynamic_stops(
+        close, atr, trend_strength, stop_loss_percent, take_profit_percent,
+        sl_bounds, tp_bounds
+    )
+    
+    return {
+        'close': close,
+        'entry': entry,
+        'exit_code': exit_code,
+        'trend_strength': trend_strength,
+        'new_sl': new_sl,
+        'new_tp': new_tp,
+        'sl_percent': sl_percent,
+        'tp_percent': tp_percent,
+        # Take profit só sobe com tendência forte
+        'tp_update': np.where(trend_strength > 0.1, new_tp, -np.inf),
+        'start': lag,
+    }
+
+
+def find_trades(signals, chunk_size=64, intrabar=None):
+    """Resolve a máquina de estados de posição sobre os sinais pré-calculados
+    
+    O trailing stop dentro de uma posição é o máximo acumulado dos stops
+    dinâmicos desde a entrada, então cada trade é resolvido com operações
+    vetorizadas sobre blocos de candles em vez de um candle por vez.
+    
+    Args:
+        signals (dict): Resultado de compute_signals
+        chunk_size (int): Tamanho inicial dos blocos avaliados dentro de uma posição
+        intrabar (IntrabarResolver, opcional): Resolve stop loss/take profit com os ticks
+            de dentro de cada candle. Se None, compara apenas o fechamento
+    
+    Returns:
+        tuple: (trades, stop_loss_levels, take_profit_levels), onde trades é uma lista
+            de tuplas (entry_idx, exit_idx, exit_code, stop_loss, take_profit, fill) com
+            exit_idx None para posição ainda aberta e fill = (preço, horário em ms) nas
+            saídas resolvidas pelos ticks (None para saída no fechamento), e os níveis
+            são os stops vigentes antes de cada candle (NaN fora de posição)
+    """
+    close = signals['close']
+    exit_code = signals['exit_code']
+    new_sl = signals['new_sl']
+    new_tp = signals['new_tp']
+    tp_update = signals['tp_update']
+    n = len(close)
+    
+    stop_loss_levels = np.full(n, np.nan)
+    take_profit_levels = np.full(n, np.nan)
+    entries = np.flatnonzero(signals['entry'])
+    forced_exits = np.flatnonzero(exit_code)
+    trades = []
+    
+    position = signals['start']
+    while True:
+        k = np.searchsorted(entries, position)
+        if k == len(entries):
+            break
+        entry_idx = int(entries[k])
+        
+        # A próxima saída técnica limita o trecho a ser avaliado
+        f = np.searchsorted(forced_exits, entry_idx + 1)
+        last = int(forced_exits[f]) if f < len(forced_exits) else n - 1
+        
+        sl = new_sl[entry_idx]
+        tp = new_tp[entry_idx]
+        exit_idx = None
+        reason = 0
+        fill = None
+        lo = entry_idx + 1
+        width = chunk_size
+        while lo <= last:
+            hi = min(lo + width, last + 1)
+            # Stops vigentes antes de cada candle do bloco [lo, hi)
+            sl_before = np.maximum.accumulate(np.concatenate(([sl], new_sl[lo:hi - 1])))
+            tp_before = np.maximum.accumulate(np.concatenate(([tp], tp_update[lo:hi - 1])))
+            if intrabar is None:
+                prices = close[lo:hi]
+                hit_sl = prices <= sl_before
+                hit_tp = prices >= tp_before
+                hits = np.flatnonzero(hit_sl | hit_tp)
+                first_hit = None
+                if len(hits):
+                    m = int(hits[0])
+                    first_hit = (m, EXIT_STOP_LOSS if hit_sl[m] else EXIT_TAKE_PROFIT, None)
+            else:
+                first_hit = intrabar.first_hit(lo, sl_before, tp_before)
+            
+            if first_hit is not None:
+                m, reason, fill = first_hit
+                exit_idx = lo + m
+                stop_loss_levels[lo:exit_idx + 1] = sl_before[:m + 1]
+                take_profit_levels[lo:exit_idx + 1] = tp_before[:m + 1]
+                break
+            
+            stop_loss_levels[lo:hi] = sl_before
+            take_profit_levels[lo:hi] = tp_before
+            if hi - 1 == last and exit_code[last]:
+                exit_idx = last
+                reason = int(exit_code[last])
+                break
+            
+            # Nenhuma saída no bloco: o último candle também atualiza os stops
+            sl = max(sl_before[-1], new_sl[hi - 1])
+            tp = max(tp_before[-1], tp_update[hi - 1])
+            lo = hi
+            width *= 2
+        
+        if exit_idx is None:
+            trades.append((entry_idx, None, 0, sl, tp, None))
+            break
+        
+        trades.append((entry_idx, exit_idx, reason, None, None, fill))
+        position = exit_idx + 1
+    
+    return trades, stop_loss_levels, take_profit_levels
@@ -0,0 +1,48 @@
+import numpy as np
+import pandas as pd
+
+# Regimes de mercado: (tendência por candle, volatilidade por candle, amplitude dos pavios)
+REGIMES = {
+    'random_walk': (0.0, 0.003, 0.002),
+    'trending': (0.0004, 0.002, 0.0015),
+    'high_volatility': (0.0, 0.012, 0.008),
+}
+
+
+def generate_candles(n, regime='random_walk', seed=42, start='2024-01-01', freq='15min', start_price=30000.0):
+    """Gera candles OHLCV sintéticos e determinísticos
+    
+    Mesmo formato de BacktestManager.prepare_backtest_data, para benchmarks e
+    testes offline sem acesso à Binance.
+    
+    Args:
+        n (int): Número de candles
+        regime (str): 'random_walk', 'trending' ou 'high_volatility'
+        seed (int): Semente do gerador (mesma semente, mesmos candles)
+        start (str): Horário de abertura do primeiro candle
+        freq (str): Intervalo entre candles (frequência do pandas)
+        start_price (float): Preço inicial
+    
+    Returns:
+        pd.DataFrame: Colunas timestamp, open, high, low, close e volume
+    """
+    if regime not in REGIMES:
+        raise ValueError(f"Regime desconhecido: {regime}")
+    drift, volatility, wick = REGIMES[regime]
+    
+    rng = np.random.default_rng(seed)
+    returns = rng.normal(0.0, volatility, n)
+    if drift:
+        # Tendências alternadas de alta e baixa, com 2000 candles cada
+        returns += drift * np.where((np.arange(n) // 2000) % 2 == 0, 1.0, -1.0)
+    close = start_price * np.exp(np.cumsum(returns))
+    open_ = np.concatenate(([start_price], close[:-1]))
+    
+    return pd.DataFrame({
+        'timestamp': pd.date_range(start, periods=n, freq=freq),
+        'open': open_,
+        'high': np.maximum(open_, close) * (1 + rng.uniform(0, wick, n)),
+        'low': np.minimum(open_, close) * (1 - rng.uniform(0, wick, n)),
+        'close': close,
+        'volume': rng.lognormal(1.0, 0.5 + volatility * 50, n)
+    })
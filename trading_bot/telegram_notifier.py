@@ -1,25 +1,256 @@
 import os
 import asyncio
+import atexit
+import queue
+import threading
+import time
+from datetime import timedelta
 from telegram import Bot
-from telegram.error import TelegramError
+from telegram.error import RetryAfter, TimedOut, NetworkError
+from .instrumentation import timed, instrumentation
+
+# Limite de caracteres de uma mensagem do Telegram
+MAX_MESSAGE_LENGTH = 4096
 
 class TelegramNotifier:
-    def __init__(self):
+    _STOP = object()
+
+    def __init__(self, bot=None, max_queue_size=None, coalesce_window=None, min_interval=None, max_retries=3):
+        """Initialize the notifier with a background sender
+        
+        Messages are queued by send_message and delivered by a dedicated thread
+        that keeps a single event loop (and HTTP session) alive, so callers never
+        wait on Telegram.
+        
+        Args:
+            bot (optional): Bot instance (e.g. a local fake). Defaults to telegram.Bot
+            max_queue_size (int, optional): Queue bound; messages beyond it are dropped.
+                Defaults to TELEGRAM_QUEUE_SIZE from .env (100)
+            coalesce_window (float, optional): Seconds to wait for more messages to merge
+                into a single send. Defaults to TELEGRAM_COALESCE_WINDOW from .env (0.5)
+            min_interval (float, optional): Minimum seconds between sends to the chat.
+                Defaults to TELEGRAM_MIN_INTERVAL from .env (1.0)
+            max_retries (int): Attempts per message on network errors
+        """
         self.bot_token = os.getenv('TELEGRAM_BOT_TOKEN')
         self.chat_id = os.getenv('TELEGRAM_CHAT_ID')
-        self.bot = Bot(token=self.bot_token)
+        self.bot = bot if bot is not None else Bot(token=self.bot_token)
+        
+        if max_queue_size is None:
+            max_queue_size = int(os.getenv('TELEGRAM_QUEUE_SIZE', '100'))
+        if coalesce_window is None:
+            coalesce_window = float(os.getenv('TELEGRAM_COALESCE_WINDOW', '0.5'))
+        if min_interval is None:
+            min_interval = float(os.getenv('TELEGRAM_MIN_INTERVAL', '1.0'))
+        self.coalesce_window = coalesce_window
+        self.min_interval = min_interval
+        self.max_retries = max_retries
+        
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = None
+        self._lock = threading.Lock()
+        self._last_send = 0.0
+        self.dropped_messages = 0
+        atexit.register(self.close)
 
     def send_message(self, message):
-        """Send a message to the configured chat"""
+        """Queue a message to the configured chat (never blocks)"""
+        self._ensure_started()
+        try:
+            self._queue.put_nowait(message)
+        except queue.Full:
+            self._drop(1)
+            print("Error sending Telegram message: queue is full, message dropped")
+
+    def flush(self, timeout=None):
+        """Wait until all queued messages were sent
+        
+        Returns:
+            bool: True if the queue was drained before the timeout
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._queue.all_tasks_done:
+            while self._queue.unfinished_tasks:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._queue.all_tasks_done.wait(remaining)
+        return True
+
+    def close(self, timeout=10):
+        """Flush pending messages and stop the background sender"""
+        with self._lock:
+            thread = self._thread
+            if thread is None:
+                return
+            self._thread = None
+        self.flush(timeout)
+        # A stalled sender with a full queue must not block shutdown (atexit, main's finally)
         try:
-            asyncio.run(self._send_message_async(message))
-        except TelegramError as e:
-            print(f"Error sending Telegram message: {str(e)}")
+            self._queue.put(self._STOP, timeout=timeout)
+        except queue.Full:
+            pass
+        thread.join(timeout)
+
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='telegram-notifier', daemon=True)
+                self._thread.start()
+
+    def _drop(self, count):
+        self.dropped_messages += count
+        instrumentation.count('telegram_dropped', count)
+
+    def _run(self):
+        """Sender thread: one persistent event loop for the notifier lifetime"""
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        initialized = False
+        try:
+            while True:
+                batch, stop = self._next_batch()
+                if batch:
+                    # A failed initialize (bad token, no network) is retried on the next batch;
+                    # meanwhile the queue keeps draining so send_message never piles up
+                    try:
+                        initialized = initialized or self._initialize(loop)
+                        if initialized:
+                            for text, parse_mode in self._coalesce(batch):
+                                if not loop.run_until_complete(self._send_with_retry(text, parse_mode)):
+                                    self._drop(1)
+                        else:
+                            self._drop(len(batch))
+                    except Exception as e:
+                        # The sender must survive anything: a dead thread fills the queue and hangs flush()
+                        print(f"Error sending Telegram messages, batch dropped: {str(e)}")
+                        self._drop(len(batch))
+                    finally:
+                        for _ in batch:
+                            self._queue.task_done()
+                if stop:
+                    self._queue.task_done()
+                    break
+        finally:
+            if initialized and hasattr(self.bot, 'shutdown'):
+                try:
+                    loop.run_until_complete(self.bot.shutdown())
+                except Exception as e:
+                    print(f"Error shutting down Telegram bot: {str(e)}")
+            loop.close()
+
+    def _initialize(self, loop):
+        """Initialize the bot session, returning False (and logging) on failure"""
+        if not hasattr(self.bot, 'initialize'):
+            return True
+        try:
+            loop.run_until_complete(self.bot.initialize())
+            return True
+        except Exception as e:
+            print(f"Error initializing Telegram bot, messages dropped: {str(e)}")
+            return False
+
+    def _next_batch(self):
+        """Block for one message, then collect a burst within the coalesce window"""
+        first = self._queue.get()
+        if first is self._STOP:
+            return [], True
+        
+        batch = [first]
+        deadline = time.monotonic() + self.coalesce_window
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                message = self._queue.get(timeout=remaining)
+            except queue.Empty:
+                break
+            if message is self._STOP:
+                return batch, True
+            batch.append(message)
+        return batch, False
+
+    @staticmethod
+    def _coalesce(batch):
+        """Merge a burst into as few messages as the Telegram size limit allows
+        
+        Returns:
+            list: (text, parse_mode) pairs, see _split for oversized messages
+        """
+        texts = []
+        current = ''
+        for message in batch:
+            candidate = f"{current}\n\n{message}" if current else message
+            if len(candidate) <= MAX_MESSAGE_LENGTH:
+                current = candidate
+                continue
+            if current:
+                texts.append((current, 'HTML'))
+            if len(message) > MAX_MESSAGE_LENGTH:
+                texts.extend(TelegramNotifier._split(message))
+                current = ''
+            else:
+                current = message
+        if current:
+            texts.append((current, 'HTML'))
+        return texts
+
+    @staticmethod
+    def _split(message):
+        """Split an oversized message on line boundaries, keeping HTML tags and entities whole
+        
+        A single line over the limit has to be cut anywhere; the pieces holding a
+        cut are sent as plain text, since a broken tag makes Telegram reject them.
+        """
+        parts = []
+        current, parse_mode = None, 'HTML'
+        for line in message.split('\n'):
+            if current is not None and len(current) + 1 + len(line) <= MAX_MESSAGE_LENGTH:
+                current = f"{current}\n{line}"
+                continue
+            if current is not None:
+                parts.append((current, parse_mode))
+            parse_mode = 'HTML'
+            while len(line) > MAX_MESSAGE_LENGTH:
+                parts.append((line[:MAX_MESSAGE_LENGTH], None))
+                line = line[MAX_MESSAGE_LENGTH:]
+                parse_mode = None
+            current = line
+        parts.append((current, parse_mode))
+        return parts
+
+    @timed('telegram_send')
+    async def _send_with_retry(self, message, parse_mode='HTML'):
+        """Send respecting the chat rate limit and Telegram's RetryAfter"""
+        for attempt in range(self.max_retries):
+            wait = self.min_interval - (time.monotonic() - self._last_send)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            try:
+                await self._send_message_async(message, parse_mode)
+                self._last_send = time.monotonic()
+                instrumentation.add_bytes('telegram_send', len(message.encode()))
+                return True
+            except RetryAfter as e:
+                retry_after = e.retry_after
+                if isinstance(retry_after, timedelta):
+                    retry_after = retry_after.total_seconds()
+                await asyncio.sleep(retry_after)
+            except (TimedOut, NetworkError) as e:
+                print(f"Error sending Telegram message (attempt {attempt + 1}): {str(e)}")
+                await asyncio.sleep(2 ** attempt)
+            except Exception as e:
+                # TelegramError (e.g. BadRequest) or any bot failure: not worth retrying
+                print(f"Error sending Telegram message: {str(e)}")
+                return False
+        print("Error sending Telegram message: retries exhausted, message dropped")
+        return False
 
-    async def _send_message_async(self, message):
+    async def _send_message_async(self, message, parse_mode='HTML'):
         """Async method to send message"""
         await self.bot.send_message(
             chat_id=self.chat_id,
             text=message,
-            parse_mode='HTML'
-        ) 
\ No newline at end of file
+            parse_mode=parse_mode
+        )
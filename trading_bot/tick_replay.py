@@ -0,0 +1,233 @@
+import os
+import numpy as np
+import pandas as pd
+from .signal_engine import EXIT_STOP_LOSS, EXIT_TAKE_PROFIT
+
+# Colunas do tick store, cada uma em um arquivo binário próprio (memory-mapped na leitura)
+TICK_COLUMNS = {
+    'timestamp': np.dtype('<i8'),
+    'price': np.dtype('<f8'),
+    'quantity': np.dtype('<f8'),
+}
+
+
+def klines_to_ticks(klines):
+    """Converte sub-candles (ex: 1s ou 1m) em uma sequência de ticks
+    
+    Cada sub-candle vira quatro ticks no caminho mais provável: abertura, mínima,
+    máxima e fechamento para candles de alta; abertura, máxima, mínima e
+    fechamento para candles de baixa.
+    
+    Args:
+        klines (np.ndarray): Array estruturado com timestamp, open, high, low, close e volume
+    
+    Returns:
+        tuple: Arrays (timestamps, prices, quantities) com 4 ticks por sub-candle
+    """
+    bullish = klines['close'] >= klines['open']
+    second = np.where(bullish, klines['low'], klines['high'])
+    third = np.where(bullish, klines['high'], klines['low'])
+    prices = np.column_stack((klines['open'], second, third, klines['close'])).ravel()
+    # Os ticks do mesmo sub-candle compartilham o horário de abertura (a ordem é a do array)
+    timestamps = np.repeat(klines['timestamp'].astype(np.int64), 4)
+    quantities = np.repeat(klines['volume'] / 4, 4)
+    return timestamps, prices, quantities
+
+
+class TickStore:
+    def __init__(self, path):
+        """Histórico de ticks (trades agregados ou sub-candles) em disco
+        
+        Cada coluna é um arquivo binário de tamanho fixo por tick, lido com
+        np.memmap: só as páginas dos trechos consultados são carregadas, então
+        históricos de vários GB não precisam caber na memória.
+        
+        Args:
+            path (str): Diretório do tick store (ex: data/ticks/BTCUSDT)
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        self._columns = None
+
+    def _column_path(self, name):
+        return os.path.join(self.path, f"{name}.bin")
+
+    def _open(self):
+        if self._columns is None:
+            sizes = {}
+            for name, dtype in TICK_COLUMNS.items():
+                path = self._column_path(name)
+                sizes[name] = os.path.getsize(path) // dtype.itemsize if os.path.exists(path) else 0
+            size = min(sizes.values())
+            
+            columns = {}
+            for name, dtype in TICK_COLUMNS.items():
+                path = self._column_path(name)
+                # Import interrompido no meio de um append: descarta os ticks que não
+                # chegaram a todas as colunas, senão os arquivos ficam desalinhados
+                if os.path.exists(path) and os.path.getsize(path) != size * dtype.itemsize:
+                    os.truncate(path, size * dtype.itemsize)
+                columns[name] = np.memmap(path, dtype=dtype, mode='r', shape=(size,)) if size else np.empty(0, dtype=dtype)
+            self._columns = columns
+        return self._columns
+
+    def __len__(self):
+        return len(self._open()['timestamp'])
+
+    @property
+    def timestamps(self):
+        return self._open()['timestamp']
+
+    @property
+    def prices(self):
+        return self._open()['price']
+
+    def append(self, timestamps, prices, quantities):
+        """Acrescenta ticks ao final do store (devem ser posteriores aos já gravados)"""
+        timestamps = np.asarray(timestamps, dtype=TICK_COLUMNS['timestamp'])
+        if not len(timestamps):
+            return 0
+        if np.any(np.diff(timestamps) < 0):
+            raise ValueError("Ticks fora de ordem cronológica")
+        if len(self) and timestamps[0] < self.timestamps[-1]:
+            raise ValueError("Ticks anteriores ao fim do tick store")
+        
+        values = {
+            'timestamp': timestamps,
+            'price': np.asarray(prices, dtype=TICK_COLUMNS['price']),
+            'quantity': np.asarray(quantities, dtype=TICK_COLUMNS['quantity']),
+        }
+        try:
+            for name, data in values.items():
+                with open(self._column_path(name), 'ab') as f:
+                    data.tofile(f)
+        finally:
+            # Mesmo após uma falha: a próxima leitura realinha as colunas
+            self._columns = None
+        return len(timestamps)
+
+    def import_aggtrades(self, path, chunk_size=1_000_000):
+        """Importa trades agregados no formato de data.binance.vision (CSV ou .zip)
+        
+        O arquivo é lido em blocos, sem carregar o histórico inteiro.
+        
+        Returns:
+            int: Número de ticks importados
+        """
+        # Colunas: agg_trade_id, price, quantity, first_trade_id, last_trade_id, transact_time, is_buyer_maker, ...
+        count = 0
+        header = pd.read_csv(path, header=None, nrows=1)
+        skip = 0 if str(header.iloc[0, 0]).lstrip('-').isdigit() else 1
+        for chunk in pd.read_csv(path, header=None, skiprows=skip, usecols=[1, 2, 5], chunksize=chunk_size):
+            timestamps = chunk[5].to_numpy(dtype=np.int64)
+            # Arquivos recentes da Binance usam microssegundos
+            if timestamps.max() > 10**14:
+                timestamps = timestamps // 1000
+            count += self.append(timestamps, chunk[1].to_numpy(dtype=np.float64), chunk[2].to_numpy(dtype=np.float64))
+        return count
+
+    def import_klines(self, klines, chunk_size=250_000):
+        """Importa sub-candles (ex: do KlineCache com intervalo 1s ou 1m) como ticks
+        
+        Returns:
+            int: Número de ticks importados
+        """
+        count = 0
+        for start in range(0, len(klines), chunk_size):
+            count += self.append(*klines_to_ticks(klines[start:start + chunk_size]))
+        return count
+
+    def window(self, start_ms, end_ms):
+        """Ticks em [start_ms, end_ms) como views do arquivo mapeado
+        
+        Returns:
+            tuple: (timestamps, prices)
+        """
+        timestamps = self.timestamps
+        lo = int(np.searchsorted(timestamps, start_ms, side='left'))
+        hi = int(np.searchsorted(timestamps, end_ms, side='left'))
+        return timestamps[lo:hi], self.prices[lo:hi]
+
+    def iter_chunks(self, start_ms=None, end_ms=None, chunk_size=1_000_000):
+        """Percorre os ticks de um período em blocos (gerador)
+        
+        Yields:
+            tuple: (timestamps, prices) de até chunk_size ticks
+        """
+        timestamps = self.timestamps
+        lo = 0 if start_ms is None else int(np.searchsorted(timestamps, start_ms, side='left'))
+        hi = len(timestamps) if end_ms is None else int(np.searchsorted(timestamps, end_ms, side='left'))
+        for start in range(lo, hi, chunk_size):
+            stop = min(start + chunk_size, hi)
+            yield timestamps[start:stop], self.prices[start:stop]
+
+    def iter_candles(self, open_times_ms, interval_ms):
+        """Percorre os ticks de cada candle da estratégia (gerador)
+        
+        Yields:
+            tuple: (índice do candle, timestamps, prices)
+        """
+        for i, open_ms in enumerate(open_times_ms):
+            timestamps, prices = self.window(int(open_ms), int(open_ms) + interval_ms)
+            yield i, timestamps, prices
+
+
+class IntrabarResolver:
+    def __init__(self, ticks, df, interval_ms=None):
+        """Resolve stop loss e take profit dentro de cada candle a partir dos ticks
+        
+        Só os candles cuja mínima/máxima alcança os stops são consultados no tick
+        store; neles, o primeiro tick que cruza um dos níveis define a saída e o
+        preço de execução. Sem ticks para o candle, assume o stop loss primeiro
+        quando os dois níveis estão dentro do candle (hipótese conservadora).
+        
+        Args:
+            ticks (TickStore): Ticks do par
+            df (pd.DataFrame): Candles da simulação (timestamp, open, high, low)
+            interval_ms (int, opcional): Duração do candle. Padrão: inferida dos timestamps
+        """
+        self.ticks = ticks
+        self.open_times = df['timestamp'].to_numpy(dtype='datetime64[ms]').astype(np.int64)
+        if interval_ms is None:
+            interval_ms = int(np.median(np.diff(self.open_times))) if len(self.open_times) > 1 else 60_000
+        self.interval_ms = interval_ms
+        self.open = df['open'].to_numpy(dtype=np.float64)
+        self.high = df['high'].to_numpy(dtype=np.float64)
+        self.low = df['low'].to_numpy(dtype=np.float64)
+
+    def first_hit(self, lo, stop_loss, take_profit):
+        """Primeiro candle de um bloco em que um stop foi atingido
+        
+        Args:
+            lo (int): Índice do primeiro candle do bloco
+            stop_loss (np.ndarray): Stop loss vigente em cada candle do bloco
+            take_profit (np.ndarray): Take profit vigente em cada candle do bloco
+        
+        Returns:
+            tuple: (posição no bloco, motivo, (preço, horário em ms)) ou None
+        """
+        hi = lo + len(stop_loss)
+        candidates = np.flatnonzero((self.low[lo:hi] <= stop_loss) | (self.high[lo:hi] >= take_profit))
+        for m in candidates:
+            hit = self._resolve(lo + int(m), stop_loss[m], take_profit[m])
+            if hit is not None:
+                return int(m), hit[0], hit[1]
+        return None
+
+    def _resolve(self, idx, stop_loss, take_profit):
+        open_ms = int(self.open_times[idx])
+        timestamps, prices = self.ticks.window(open_ms, open_ms + self.interval_ms)
+        
+        if not len(prices):
+            # Sem ticks: ordem desconhecida, execução no nível (ou na abertura, se abriu além dele)
+            if self.low[idx] <= stop_loss:
+                return EXIT_STOP_LOSS, (min(self.open[idx], stop_loss), open_ms)
+            return EXIT_TAKE_PROFIT, (max(self.open[idx], take_profit), open_ms)
+        
+        crossed = np.flatnonzero((prices <= stop_loss) | (prices >= take_profit))
+        if not len(crossed):
+            return None
+        j = int(crossed[0])
+        price = float(prices[j])
+        reason = EXIT_STOP_LOSS if price <= stop_loss else EXIT_TAKE_PROFIT
+        return reason, (price, int(timestamps[j]))
@@ -0,0 +1,207 @@
+import json
+from collections.abc import Sequence
+import numpy as np
+import pandas as pd
+
+BUY = 0
+SELL = 1
+
+# Uma linha por ordem; 'value' é o custo da compra ou a receita da venda
+LEDGER_DTYPE = np.dtype([
+    ('side', np.int8),
+    ('symbol', np.int16),
+    ('reason', np.int16),
+    ('timestamp', 'datetime64[ms]'),
+    ('price', np.float64),
+    ('amount', np.float64),
+    ('value', np.float64),
+    ('profit', np.float64),
+    ('profit_percentage', np.float64),
+    ('balance_before', np.float64),
+    ('balance_after', np.float64),
+    ('stop_loss', np.float64),
+    ('take_profit', np.float64),
+])
+
+
+def _to_ms(timestamp):
+    """Horário da ordem em ms desde epoch (UTC para horários com fuso)"""
+    return pd.Timestamp(timestamp).value // 1_000_000
+
+
+class TradeLedger(Sequence):
+    def __init__(self, symbols=None, capacity=64):
+        """Registro das ordens de uma simulação em um array estruturado do NumPy
+        
+        As ordens ficam em colunas de tamanho fixo, pré-alocadas e ampliadas por
+        duplicação, e as métricas são calculadas sobre as colunas. Como sequência,
+        o ledger devolve cada ordem como dict (mesmo formato da antiga lista
+        TradingManager.orders), convertida só quando acessada.
+        
+        Args:
+            symbols (list, opcional): Pares do portfólio; com eles cada ordem tem a chave 'symbol'
+            capacity (int): Capacidade inicial
+        """
+        self.symbols = list(symbols) if symbols is not None else None
+        self._records = np.zeros(max(int(capacity), 1), dtype=LEDGER_DTYPE)
+        self._size = 0
+        self._reasons = []
+        self._reason_codes = {}
+
+    @classmethod
+    def from_orders(cls, orders):
+        """Cria um ledger a partir de uma lista de ordens no formato de dict"""
+        symbols = sorted({order['symbol'] for order in orders if 'symbol' in order}) or None
+        ledger = cls(symbols=symbols, capacity=len(orders))
+        for order in orders:
+            symbol = order.get('symbol')
+            if order['type'] == 'buy':
+                ledger.record_buy(order['timestamp'], order['price'], order['amount'], order['cost'],
+                                  order['balance_before'], order['stop_loss'], order['take_profit'], symbol=symbol)
+            else:
+                ledger.record_sell(order['timestamp'], order['price'], order['amount'], order['revenue'],
+                                   order['profit'], order['profit_percentage'], order['reason'],
+                                   order['balance_before'], symbol=symbol)
+        return ledger
+
+    def _append(self, record):
+        if self._size == len(self._records):
+            records = np.zeros(len(self._records) * 2, dtype=LEDGER_DTYPE)
+            records[:self._size] = self._records[:self._size]
+            self._records = records
+        self._records[self._size] = record
+        self._size += 1
+
+    def _symbol_code(self, symbol):
+        return self.symbols.index(symbol) if symbol is not None and self.symbols else 0
+
+    def _reason_code(self, reason):
+        code = self._reason_codes.get(reason)
+        if code is None:
+            code = self._reason_codes[reason] = len(self._reasons)
+            self._reasons.append(reason)
+        return code
+
+    def record_buy(self, timestamp, price, amount, cost, balance_before, stop_loss, take_profit, symbol=None):
+        """Registra uma compra (saldo depois = saldo antes - custo)"""
+        self._append((
+            BUY, self._symbol_code(symbol), 0, np.datetime64(_to_ms(timestamp), 'ms'),
+            price, amount, cost, 0.0, 0.0, balance_before, balance_before - cost, stop_loss, take_profit
+        ))
+
+    def record_sell(self, timestamp, price, amount, revenue, profit, profit_percentage, reason, balance_before, symbol=None):
+        """Registra uma venda (saldo depois = saldo antes + receita)"""
+        self._append((
+            SELL, self._symbol_code(symbol), self._reason_code(reason), np.datetime64(_to_ms(timestamp), 'ms'),
+            price, amount, revenue, profit, profit_percentage, balance_before, balance_before + revenue, np.nan, np.nan
+        ))
+
+    @property
+    def records(self):
+        """Ordens registradas (visão do array estruturado, sem cópia)"""
+        return self._records[:self._size]
+
+    @property
+    def sells(self):
+        records = self.records
+        return records[records['side'] == SELL]
+
+    def __len__(self):
+        return self._size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self._to_dict(row) for row in self.records[index]]
+        if index < 0:
+            index += self._size
+        if not 0 <= index < self._size:
+            raise IndexError("Índice de ordem fora do intervalo")
+        return self._to_dict(self._records[index])
+
+    def __iter__(self):
+        for row in self.records:
+            yield self._to_dict(row)
+
+    def _to_dict(self, row):
+        order = {'symbol': self.symbols[row['symbol']]} if self.symbols else {}
+        timestamp = pd.Timestamp(row['timestamp'])
+        if row['side'] == BUY:
+            order.update({
+                'type': 'buy',
+                'timestamp': timestamp,
+                'price': float(row['price']),
+                'amount': float(row['amount']),
+                'cost': float(row['value']),
+                'balance_before': float(row['balance_before']),
+                'balance_after': float(row['balance_after']),
+                'stop_loss': float(row['stop_loss']),
+                'take_profit': float(row['take_profit'])
+            })
+        else:
+            order.update({
+                'type': 'sell',
+                'timestamp': timestamp,
+                'price': float(row['price']),
+                'amount': float(row['amount']),
+                'revenue': float(row['value']),
+                'profit': float(row['profit']),
+                'profit_percentage': float(row['profit_percentage']),
+                'reason': self._reasons[row['reason']],
+                'balance_before': float(row['balance_before']),
+                'balance_after': float(row['balance_after'])
+            })
+        return order
+
+    def to_dicts(self):
+        """Lista de ordens no formato de dict"""
+        return list(self)
+
+    def to_dataframe(self):
+        """Ordens como DataFrame (colunas 'type', 'reason' e 'symbol' como texto)"""
+        records = self.records
+        df = pd.DataFrame({
+            'type': np.where(records['side'] == BUY, 'buy', 'sell'),
+            'timestamp': records['timestamp'],
+            'price': records['price'],
+            'amount': records['amount'],
+            'value': records['value'],
+            'profit': np.where(records['side'] == SELL, records['profit'], np.nan),
+            'profit_percentage': np.where(records['side'] == SELL, records['profit_percentage'], np.nan),
+            'reason': [self._reasons[code] if side == SELL else None for side, code in zip(records['side'], records['reason'])],
+            'balance_before': records['balance_before'],
+            'balance_after': records['balance_after'],
+            'stop_loss': np.where(records['side'] == BUY, records['stop_loss'], np.nan),
+            'take_profit': np.where(records['side'] == BUY, records['take_profit'], np.nan)
+        })
+        if self.symbols:
+            df.insert(0, 'symbol', np.asarray(self.symbols, dtype=object)[records['symbol']])
+        return df
+
+    def to_json(self):
+        """Ordens em JSON (lista de objetos, horários em ISO 8601)"""
+        return json.dumps([dict(order, timestamp=order['timestamp'].isoformat()) for order in self])
+
+    def summary(self, initial_balance):
+        """Estatísticas das vendas calculadas sobre as colunas
+        
+        Returns:
+            dict: Contagens, lucro/prejuízo somados, curva de saldo após cada venda
+                e primeiro/último horário das ordens
+        """
+        records = self.records
+        sells = records[records['side'] == SELL]
+        profit = sells['profit']
+        gains = profit[profit > 0]
+        losses = profit[profit < 0]
+        balances = np.concatenate(([initial_balance], sells['balance_after']))
+        timestamps = records['timestamp']
+        return {
+            'total_trades': len(sells),
+            'winning_trades': len(gains),
+            'losing_trades': len(losses),
+            'total_profit': float(gains.sum()),
+            'total_loss': float(losses.sum()),
+            'balances': balances,
+            'first_trade': timestamps.min() if len(records) else None,
+            'last_trade': timestamps.max() if len(records) else None
+        }
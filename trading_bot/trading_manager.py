@@ -3,19 +3,36 @@ import json
 from datetime import datetime
 import pandas as pd
 import numpy as np
-from dotenv import load_dotenv
-from binance.client import Client
-from .telegram_notifier import TelegramNotifier
+from .config import load_env
 from .order_manager import OrderManager
+from .trade_ledger import TradeLedger
+from .equity import equity_curve, equity_metrics
 from .logger import Logger
-from .chart_manager import ChartManager
+from .signal_engine import compute_signals, find_trades, EXIT_REASONS
+from .instrumentation import timed
 
 # Carregar variáveis de ambiente
-load_dotenv()
+load_env()
 
 class TradingManager:
-    def __init__(self, is_backtest=False):
-        """Inicializa o TradingManager"""
+    # Parâmetros da estratégia que podem ser sobrescritos (ex: pelo otimizador)
+    STRATEGY_PARAMS = (
+        'ma_short_period', 'ma_long_period', 'atr_period',
+        'stop_loss_percent', 'take_profit_percent',
+        'min_stop_loss_percent', 'max_stop_loss_percent',
+        'min_take_profit_percent', 'max_take_profit_percent'
+    )
+
+    def __init__(self, is_backtest=False, params=None, enable_chart=True, client=None, notifier=None):
+        """Inicializa o TradingManager
+        
+        Args:
+            is_backtest (bool): Executa em modo backtest (sem Binance e Telegram)
+            params (dict, opcional): Sobrescreve parâmetros da estratégia (ver STRATEGY_PARAMS)
+            enable_chart (bool): Se False, não gera gráfico
+            client (opcional): Cliente REST com get_klines (ex: replay local). Padrão: binance Client
+            notifier (opcional): Notificador com send_message/close. Padrão: TelegramNotifier
+        """
         # Configurações gerais
         self.symbol = os.getenv('SYMBOL', 'BTCUSDT')
         self.quantity = float(os.getenv('QUANTITY', '0.00010'))  # valor padrão caso não encontre
@@ -30,6 +47,18 @@ class TradingManager:
         # Moving averages settings
         self.ma_short_period = 9
         self.ma_long_period = 21
+        self.atr_period = 14
+        
+        # Limites dos stops dinâmicos
+        self.min_stop_loss_percent = 0.005
+        self.max_stop_loss_percent = 0.05
+        self.min_take_profit_percent = 0.01
+        self.max_take_profit_percent = 0.10
+        
+        for name, value in (params or {}).items():
+            if name not in self.STRATEGY_PARAMS:
+                raise ValueError(f"Parâmetro de estratégia desconhecido: {name}")
+            setattr(self, name, value)
         
         # Estado do trading
         self.current_position = None
@@ -37,7 +66,7 @@ class TradingManager:
         self.take_profit_price = None
         
         # Métricas e resultados
-        self.orders = []
+        self.ledger = TradeLedger()
         self.initial_balance = 1000.0
         self.current_balance = self.initial_balance
         
@@ -52,17 +81,32 @@ class TradingManager:
         self.logger.info(f"Ambiente: {self.env}")
         self.logger.info("="*50 + "\n")
         
-        # Configurar componentes
+        # Configurar componentes (Binance, Telegram e Plotly só são importados quando usados)
         if not is_backtest:
-            self.client = Client(
-                os.getenv('BINANCE_API_KEY'),
-                os.getenv('BINANCE_API_SECRET')
-            )
-            self.telegram = TelegramNotifier()
+            if client is None:
+                from binance.client import Client
+                client = Client(
+                    os.getenv('BINANCE_API_KEY'),
+                    os.getenv('BINANCE_API_SECRET')
+                )
+            if notifier is None:
+                from .telegram_notifier import TelegramNotifier
+                notifier = TelegramNotifier()
+            self.client = client
+            self.telegram = notifier
             
         self.order_manager = OrderManager(prefix='backtest' if is_backtest else '')
-        self.chart_manager = ChartManager(prefix='backtest' if is_backtest else '')
+        # Em backtest o gráfico só é renderizado ao final da simulação
+        if not enable_chart:
+            self.chart_manager = None
+        else:
+            from .chart_manager import ChartManager
+            if is_backtest:
+                self.chart_manager = ChartManager(prefix='backtest', render_every=0, render_interval=0)
+            else:
+                self.chart_manager = ChartManager()
 
+    @timed('indicators')
     def calculate_indicators(self, df):
         """Calcula os indicadores técnicos"""
         # Médias móveis
@@ -77,7 +121,7 @@ class TradingManager:
                 abs(df['low'] - df['close'].shift(1))
             )
         )
-        df['ATR'] = df['TR'].rolling(window=14).mean()
+        df['ATR'] = df['TR'].rolling(window=self.atr_period).mean()
         
         return df
 
@@ -106,9 +150,9 @@ class TradingManager:
         dynamic_sl_percent = base_sl_percent * sl_volatility_multiplier
         dynamic_tp_percent = base_tp_percent * tp_trend_multiplier
         
-        # Limitar os valores para evitar extremos
-        dynamic_sl_percent = min(max(dynamic_sl_percent, 0.005), 0.05)  # Entre 0.5% e 5%
-        dynamic_tp_percent = min(max(dynamic_tp_percent, 0.01), 0.10)   # Entre 1% e 10%
+        # Limitar os valores para evitar extremos (padrão: SL entre 0.5% e 5%, TP entre 1% e 10%)
+        dynamic_sl_percent = min(max(dynamic_sl_percent, self.min_stop_loss_percent), self.max_stop_loss_percent)
+        dynamic_tp_percent = min(max(dynamic_tp_percent, self.min_take_profit_percent), self.max_take_profit_percent)
         
         # Calcular preços
         stop_loss_price = current_price * (1 - dynamic_sl_percent)
@@ -116,6 +160,7 @@ class TradingManager:
         
         return stop_loss_price, take_profit_price, dynamic_sl_percent, dynamic_tp_percent
 
+    @timed('signal_evaluation')
     def check_signals(self, candle, ma_short_current, ma_long_current, ma_short_previous, ma_long_previous):
         """Verifica sinais de compra e venda"""
         current_price = float(candle['close'])
@@ -124,16 +169,18 @@ class TradingManager:
         trend_strength = (ma_short_current - ma_long_current) / ma_long_current * 100
         
         # Atualizar gráfico
-        self.chart_manager.update_data(
-            current_price=current_price,
-            ma_short=ma_short_current,
-            ma_long=ma_long_current,
-            open_price=float(candle['open']),
-            high_price=float(candle['high']),
-            low_price=float(candle['low']),
-            stop_loss=self.stop_loss_price,
-            take_profit=self.take_profit_price
-        )
+        if self.chart_manager is not None:
+            self.chart_manager.update_data(
+                current_price=current_price,
+                ma_short=ma_short_current,
+                ma_long=ma_long_current,
+                open_price=float(candle['open']),
+                high_price=float(candle['high']),
+                low_price=float(candle['low']),
+                stop_loss=self.stop_loss_price,
+                take_profit=self.take_profit_price,
+                timestamp=candle['timestamp']
+            )
         
         # Verificar sinais
         if not self.current_position:
@@ -187,13 +234,14 @@ class TradingManager:
                 # Só atualiza o stop loss se o novo for maior que o atual (trailing stop)
                 if new_sl > self.stop_loss_price:
                     self.stop_loss_price = new_sl
-                    self.logger.info(f"Stop Loss atualizado: ${new_sl:.2f}")
+                    self.logger.detail("Stop Loss atualizado: $%.2f", new_sl)
                 
                 # Atualiza take profit se a tendência estiver forte
                 if trend_strength > 0.1 and new_tp > self.take_profit_price:
                     self.take_profit_price = new_tp
-                    self.logger.info(f"Take Profit atualizado: ${new_tp:.2f}")
+                    self.logger.detail("Take Profit atualizado: $%.2f", new_tp)
 
+    @timed('order_execution')
     def execute_buy(self, price, timestamp, stop_loss_price=None, take_profit_price=None, sl_percent=None, tp_percent=None):
         """Executa uma ordem de compra"""
         # Calcular quantidade baseada no saldo disponível (1% de margem para taxas)
@@ -210,18 +258,7 @@ class TradingManager:
             tp_percent = self.take_profit_percent
         
         # Registrar a ordem
-        order = {
-            'type': 'buy',
-            'timestamp': timestamp,
-            'price': price,
-            'amount': amount,
-            'cost': cost,
-            'balance_before': self.current_balance,
-            'balance_after': self.current_balance - cost,
-            'stop_loss': stop_loss_price,
-            'take_profit': take_profit_price
-        }
-        self.orders.append(order)
+        self.ledger.record_buy(timestamp, price, amount, cost, self.current_balance, stop_loss_price, take_profit_price)
         
         # Atualizar saldo e posição
         self.current_balance -= cost
@@ -237,12 +274,13 @@ class TradingManager:
         self.take_profit_price = take_profit_price
         
         # Registrar no log
-        self.logger.info(f"Compra executada - Preço: ${price:.2f}, Quantidade: {amount:.8f}")
-        self.logger.info(f"Stop Loss: ${stop_loss_price:.2f} ({sl_percent*100:.1f}%)")
-        self.logger.info(f"Take Profit: ${take_profit_price:.2f} ({tp_percent*100:.1f}%)")
+        self.logger.info("Compra executada - Preço: $%.2f, Quantidade: %.8f", price, amount)
+        self.logger.info("Stop Loss: $%.2f (%.1f%%)", stop_loss_price, sl_percent * 100)
+        self.logger.info("Take Profit: $%.2f (%.1f%%)", take_profit_price, tp_percent * 100)
         
         # Adicionar ponto de compra no gráfico
-        self.chart_manager.add_buy_point(price)
+        if self.chart_manager is not None:
+            self.chart_manager.add_buy_point(price, timestamp)
         
         # Notificar via Telegram se não for backtest
         if not self.is_backtest:
@@ -253,6 +291,7 @@ class TradingManager:
                 f"Take Profit: ${take_profit_price:.2f}"
             )
 
+    @timed('order_execution')
     def execute_sell(self, price, timestamp, reason=""):
         """Executa uma ordem de venda"""
         if not self.current_position:
@@ -266,29 +305,18 @@ class TradingManager:
         profit_percentage = (price - entry_price) / entry_price * 100
         
         # Registrar a ordem
-        order = {
-            'type': 'sell',
-            'timestamp': timestamp,
-            'price': price,
-            'amount': amount,
-            'revenue': revenue,
-            'profit': profit,
-            'profit_percentage': profit_percentage,
-            'reason': reason,
-            'balance_before': self.current_balance,
-            'balance_after': self.current_balance + revenue
-        }
-        self.orders.append(order)
+        self.ledger.record_sell(timestamp, price, amount, revenue, profit, profit_percentage, reason, self.current_balance)
         
         # Atualizar saldo e posição
         self.current_balance += revenue
         
         # Registrar no log
-        self.logger.info(f"Venda executada ({reason}) - Preço: ${price:.2f}, Resultado: ${profit:.2f} ({profit_percentage:.2f}%)")
-        self.logger.info(f"Saldo atual: ${self.current_balance:.2f}")
+        self.logger.info("Venda executada (%s) - Preço: $%.2f, Resultado: $%.2f (%.2f%%)", reason, price, profit, profit_percentage)
+        self.logger.info("Saldo atual: $%.2f", self.current_balance)
         
         # Adicionar ponto de venda no gráfico
-        self.chart_manager.add_sell_point(price)
+        if self.chart_manager is not None:
+            self.chart_manager.add_sell_point(price, timestamp)
         
         # Notificar via Telegram se não for backtest
         if not self.is_backtest:
@@ -308,19 +336,55 @@ class TradingManager:
         if current_price <= self.stop_loss_price:
             self.execute_sell(current_price, current_time, "Stop Loss")
 
-    def run_simulation(self, data):
-        """Executa uma simulação com dados históricos"""
+    def run_simulation(self, data, vectorized=True, precomputed_indicators=False, ticks=None):
+        """Executa uma simulação com dados históricos
+        
+        Args:
+            data: Candles históricos (DataFrame colunar ou lista de dicionários)
+            vectorized (bool): Usa o motor vetorizado. Se False, avalia candle a candle
+                via check_signals (mais lento, mas idêntico ao fluxo ao vivo)
+            precomputed_indicators (bool): Se True, data já contém MA_short, MA_long, TR e ATR
+                calculados com os parâmetros deste TradingManager
+            ticks (TickStore, opcional): Ticks ou sub-candles usados para resolver stop loss
+                e take profit dentro de cada candle (só no motor vetorizado)
+        """
         self.is_backtest = True
         
-        # Converter dados para DataFrame
-        df = pd.DataFrame(data)
+        # DataFrames são usados diretamente (cópia rasa, sem duplicar as colunas)
+        if isinstance(data, pd.DataFrame):
+            df = data.copy(deep=False)
+        else:
+            df = pd.DataFrame(data)
         
         # Calcular indicadores
-        df = self.calculate_indicators(df)
+        if not precomputed_indicators:
+            df = self.calculate_indicators(df)
         
         # Remover linhas com NaN
         df = df.dropna()
         
+        if ticks is not None and not (vectorized and self.current_position is None):
+            raise ValueError("A simulação com ticks requer o motor vetorizado e nenhuma posição aberta")
+        
+        if vectorized and self.current_position is None:
+            self._simulate_vectorized(df, ticks)
+        else:
+            self._simulate_loop(df)
+        
+        # Calcular métricas finais (patrimônio marcado a mercado nos candles simulados)
+        metrics = self.calculate_metrics(prices=df)
+        
+        # Salvar gráfico final
+        if self.chart_manager is not None:
+            self.chart_manager.save_chart()
+        
+        return {
+            'orders': self.orders,
+            'metrics': metrics
+        }
+
+    def _simulate_loop(self, df):
+        """Simula candle a candle chamando check_signals"""
         # Iterar sobre os dados
         for i in range(2, len(df)):
             candle = {
@@ -340,31 +404,116 @@ class TradingManager:
             
             # Verificar sinais
             self.check_signals(candle, ma_short_current, ma_long_current, ma_short_previous, ma_long_previous)
+
+    @timed('signal_evaluation')
+    def _simulate_vectorized(self, df, ticks=None):
+        """Simula com sinais calculados em arrays NumPy
+        
+        Produz as mesmas ordens que _simulate_loop: os sinais de entrada, as saídas
+        técnicas e os stops dinâmicos são calculados de uma vez, e só os candles de
+        compra e venda passam por execute_buy/execute_sell. Com ticks, stop loss e
+        take profit são executados no primeiro tick que cruza o nível.
+        """
+        close = df['close'].to_numpy(dtype=np.float64)
+        ma_short = df['MA_short'].to_numpy(dtype=np.float64)
+        ma_long = df['MA_long'].to_numpy(dtype=np.float64)
+        
+        # O candle montado no loop não tem a chave 'ATR', então check_signals
+        # usa o padrão de 2% do preço nos stops dinâmicos
+        atr = close * 0.02
+        
+        signals = compute_signals(
+            close, ma_short, ma_long, atr,
+            self.stop_loss_percent, self.take_profit_percent,
+            sl_bounds=(self.min_stop_loss_percent, self.max_stop_loss_percent),
+            tp_bounds=(self.min_take_profit_percent, self.max_take_profit_percent)
+        )
+        intrabar = None
+        if ticks is not None:
+            from .tick_replay import IntrabarResolver
+            intrabar = IntrabarResolver(ticks, df)
+        trades, stop_loss_levels, take_profit_levels = find_trades(signals, intrabar=intrabar)
+        
+        # Enviar os candles avaliados para o gráfico de uma vez
+        if self.chart_manager is not None:
+            self.chart_manager.extend_data(
+                times=df['timestamp'].to_numpy()[2:],
+                open_prices=df['open'].to_numpy(dtype=np.float64)[2:],
+                high_prices=df['high'].to_numpy(dtype=np.float64)[2:],
+                low_prices=df['low'].to_numpy(dtype=np.float64)[2:],
+                close_prices=close[2:],
+                ma_short=ma_short[2:],
+                ma_long=ma_long[2:],
+                stop_loss=stop_loss_levels[2:],
+                take_profit=take_profit_levels[2:]
+            )
         
-        # Calcular métricas finais
-        metrics = self.calculate_metrics()
-        
-        # Salvar gráfico final
-        self.chart_manager.save_chart()
-        
-        return {
-            'orders': self.orders,
-            'metrics': metrics
-        }
+        timestamps = df['timestamp'].array
+        for entry_idx, exit_idx, reason, stop_loss, take_profit, fill in trades:
+            self.execute_buy(
+                float(close[entry_idx]),
+                timestamps[entry_idx],
+                signals['new_sl'][entry_idx],
+                signals['new_tp'][entry_idx],
+                signals['sl_percent'][entry_idx],
+                signals['tp_percent'][entry_idx]
+            )
+            if exit_idx is None:
+                # Posição ainda aberta: manter os stops atualizados pelo trailing
+                self.stop_loss_price = stop_loss
+                self.take_profit_price = take_profit
+            elif fill is not None:
+                price, time_ms = fill
+                self.execute_sell(float(price), pd.Timestamp(time_ms, unit='ms'), EXIT_REASONS[reason])
+            else:
+                self.execute_sell(float(close[exit_idx]), timestamps[exit_idx], EXIT_REASONS[reason])
 
-    def calculate_metrics(self):
-        """Calcula métricas do trading"""
-        if not self.orders:
+    @property
+    def orders(self):
+        """Ordens executadas (TradeLedger; cada item é um dict, convertido ao ser acessado)"""
+        return self.ledger
+
+    @property
+    def strategy_params(self):
+        """Parâmetros da estratégia em uso (STRATEGY_PARAMS), incluindo os padrões"""
+        return {name: getattr(self, name) for name in self.STRATEGY_PARAMS}
+
+    @timed('metrics')
+    def calculate_metrics(self, orders=None, initial_balance=None, final_balance=None, prices=None):
+        """Calcula métricas do trading
+        
+        Args:
+            orders (TradeLedger ou list, opcional): Ordens a avaliar. Padrão: self.ledger
+            initial_balance (float, opcional): Saldo inicial. Padrão: self.initial_balance
+            final_balance (float, opcional): Saldo final. Padrão: self.current_balance
+            prices (pd.DataFrame ou tuple, opcional): Candles (timestamp e close) ou tupla
+                (timestamps, fechamentos) do período. Com eles, drawdown, Sharpe, Sortino,
+                exposição e CAGR vêm do patrimônio marcado a mercado em cada candle; sem
+                eles, o drawdown usa só o saldo após cada venda e as demais ficam None
+        """
+        if orders is None:
+            orders = self.ledger
+        elif not isinstance(orders, TradeLedger):
+            orders = TradeLedger.from_orders(orders)
+        if initial_balance is None:
+            initial_balance = self.initial_balance
+        if final_balance is None:
+            final_balance = self.current_balance
+        
+        if not len(orders):
             return None
-            
+        
+        # Contagens e somas calculadas sobre as colunas do ledger
+        summary = orders.summary(initial_balance)
+        
         # Métricas gerais
-        total_trades = len([order for order in self.orders if order['type'] == 'sell'])
-        winning_trades = len([order for order in self.orders if order['type'] == 'sell' and order['profit'] > 0])
-        losing_trades = len([order for order in self.orders if order['type'] == 'sell' and order['profit'] < 0])
+        total_trades = summary['total_trades']
+        winning_trades = summary['winning_trades']
+        losing_trades = summary['losing_trades']
         
         # Métricas de lucro/prejuízo
-        total_profit = sum([order['profit'] for order in self.orders if order['type'] == 'sell' and order['profit'] > 0])
-        total_loss = sum([order['profit'] for order in self.orders if order['type'] == 'sell' and order['profit'] < 0])
+        total_profit = summary['total_profit']
+        total_loss = summary['total_loss']
         net_profit = total_profit + total_loss
         
         # Calcular win rate
@@ -373,21 +522,22 @@ class TradingManager:
         # Calcular profit factor
         profit_factor = abs(total_profit / total_loss) if total_loss != 0 else float('inf')
         
-        # Calcular drawdown
-        balances = [self.initial_balance]
-        for order in self.orders:
-            if order['type'] == 'sell':
-                balances.append(order['balance_after'])
-        
-        running_max = np.maximum.accumulate(balances)
-        drawdowns = (running_max - balances) / running_max * 100
-        max_drawdown = max(drawdowns)
+        # Calcular drawdown e métricas de risco do patrimônio por candle
+        if prices is not None:
+            if isinstance(prices, pd.DataFrame):
+                prices = (prices['timestamp'].to_numpy(), prices['close'].to_numpy(dtype=np.float64))
+            equity, exposed = equity_curve(orders, *prices, initial_balance)
+            risk = equity_metrics(prices[0], equity, exposed)
+        else:
+            balances = summary['balances']
+            running_max = np.maximum.accumulate(balances)
+            drawdowns = (running_max - balances) / running_max * 100
+            risk = dict.fromkeys(('max_drawdown_duration', 'sharpe_ratio', 'sortino_ratio', 'exposure_time', 'cagr', 'final_equity'))
+            risk['max_drawdown'] = float(drawdowns.max())
         
         # Calcular tempo em trades
-        if len(self.orders) >= 2:
-            first_trade = min(order['timestamp'] for order in self.orders)
-            last_trade = max(order['timestamp'] for order in self.orders)
-            trading_time = last_trade - first_trade
+        if len(orders) >= 2:
+            trading_time = pd.Timedelta(summary['last_trade'] - summary['first_trade'])
             trades_per_day = total_trades / (trading_time.days + trading_time.seconds / 86400)
         else:
             trading_time = datetime.now() - datetime.now()
@@ -401,19 +551,25 @@ class TradingManager:
                 'win_rate': win_rate
             },
             'profit_loss': {
-                'initial_balance': self.initial_balance,
-                'final_balance': self.current_balance,
+                'initial_balance': initial_balance,
+                'final_balance': final_balance,
                 'net_profit': net_profit,
-                'net_profit_percentage': (net_profit / self.initial_balance * 100),
+                'net_profit_percentage': (net_profit / initial_balance * 100),
                 'profit_factor': profit_factor,
-                'average_profit_per_trade': net_profit / total_trades if total_trades > 0 else 0
+                'average_profit_per_trade': net_profit / total_trades if total_trades > 0 else 0,
+                'final_equity': risk['final_equity'],
+                'cagr': risk['cagr']
             },
             'risk': {
-                'max_drawdown': max_drawdown,
+                'max_drawdown': risk['max_drawdown'],
+                'max_drawdown_duration': risk['max_drawdown_duration'],
+                'sharpe_ratio': risk['sharpe_ratio'],
+                'sortino_ratio': risk['sortino_ratio'],
                 'risk_reward_ratio': abs(total_profit / total_loss) if total_loss != 0 else float('inf')
             },
             'time': {
                 'trading_time': str(trading_time),
-                'trades_per_day': trades_per_day
+                'trades_per_day': trades_per_day,
+                'exposure_time': risk['exposure_time']
             }
         } 
\ No newline at end of file
@@ -0,0 +1,229 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+import pandas as pd
+from .trading_manager import TradingManager
+from .optimizer import (
+    ParameterOptimizer, PRICE_COLUMNS, _worker_data, _attach_shared, _prepare_configs,
+    _indicator_key, _simulate, _flatten_metrics
+)
+
+# Colunas acrescentadas por TradingManager.calculate_indicators
+INDICATOR_COLUMNS = ['MA_short', 'MA_long', 'TR', 'ATR']
+# Parâmetros que determinam esses indicadores
+PERIOD_PARAMS = ('ma_short_period', 'ma_long_period', 'atr_period')
+
+
+def walk_forward_folds(n, train_size, test_size, step=None, anchored=False):
+    """Divide um histórico em folds de treino/teste consecutivos
+    
+    Args:
+        n (int): Número de candles do histórico
+        train_size (int): Candles da janela de treino
+        test_size (int): Candles da janela de teste (fora da amostra)
+        step (int, opcional): Avanço entre folds, no mínimo test_size para que os testes
+            não se sobreponham. Padrão: test_size
+        anchored (bool): Se True, o treino sempre começa no início do histórico
+    
+    Returns:
+        list: Tuplas (train_start, train_end, test_start, test_end) em posições de candle
+    
+    Raises:
+        ValueError: Se step < test_size (a curva de patrimônio encadeada compõe cada
+            fold sobre o anterior e contaria os candles sobrepostos duas vezes)
+    """
+    step = step or test_size
+    if step < test_size:
+        raise ValueError(f"step ({step}) menor que test_size ({test_size}): os folds de teste se sobrepõem")
+    folds = []
+    test_start = train_size
+    while test_start < n:
+        test_end = min(test_start + test_size, n)
+        train_start = 0 if anchored else test_start - train_size
+        folds.append((train_start, test_start, test_start, test_end))
+        test_start += step
+    return folds
+
+
+def _attach_indicators(names, length, shm_name, keys):
+    """Initializer dos workers: anexa candles e indicadores calculados pelo processo principal"""
+    _attach_shared(names, length)
+    indicators_shm = shared_memory.SharedMemory(name=shm_name)
+    values = np.ndarray((len(keys), len(INDICATOR_COLUMNS), length), dtype=np.float64, buffer=indicators_shm.buf)
+    
+    base = _worker_data['df']
+    frames = {}
+    for key, group in zip(keys, values):
+        columns = {col: base[col].to_numpy() for col in base.columns}
+        columns.update({col: group[i] for i, col in enumerate(INDICATOR_COLUMNS)})
+        frames[key] = pd.DataFrame(columns, copy=False)
+    _worker_data['indicators_shm'] = indicators_shm
+    _worker_data['frames'] = frames
+
+
+def _frame_for(params):
+    """Frame de indicadores do histórico completo para os períodos da config"""
+    return _worker_data['frames'][_indicator_key(TradingManager(is_backtest=True, params=params, enable_chart=False))]
+
+
+def _run_fold(task):
+    """Otimiza no treino do fold e avalia a melhor config no teste"""
+    fold, (train_start, train_end, test_start, test_end), configs, rank_by = task
+    
+    # Os frames de indicadores do histórico completo foram calculados uma vez no
+    # processo principal e estão em memória compartilhada; cada fold só os fatia
+    best_params, best_metrics = None, None
+    for params in configs:
+        train = _frame_for(params).iloc[train_start:train_end]
+        metrics = _flatten_metrics(_simulate(params, train))
+        if best_metrics is None or metrics[rank_by] > best_metrics[rank_by]:
+            best_params, best_metrics = params, metrics
+    
+    history = _frame_for(best_params)
+    test = history.iloc[test_start:test_end]
+    trading_manager = TradingManager(is_backtest=True, params=best_params, enable_chart=False)
+    result = trading_manager.run_simulation(test, precomputed_indicators=True)
+    
+    # Posição aberta no fim do fold é marcada a mercado pelo último fechamento
+    final_equity = trading_manager.current_balance
+    if trading_manager.current_position:
+        final_equity += trading_manager.current_position['amount'] * float(test['close'].iloc[-1])
+    
+    return {
+        'fold': fold,
+        'train_start': history['timestamp'].iloc[train_start],
+        'test_start': test['timestamp'].iloc[0],
+        'test_end': test['timestamp'].iloc[-1],
+        'params': best_params,
+        'train_metrics': best_metrics,
+        'test_metrics': result['metrics'],
+        'orders': result['orders'],
+        'initial_balance': trading_manager.initial_balance,
+        'final_equity': final_equity
+    }
+
+
+class WalkForwardManager(ParameterOptimizer):
+    def __init__(self, data, train_size, test_size, step=None, anchored=False, max_workers=None):
+        """Backtest walk-forward: otimiza em cada janela de treino e avalia fora da amostra
+        
+        Os candles ficam em memória compartilhada (como no ParameterOptimizer) e
+        os indicadores de cada conjunto de períodos são calculados uma vez sobre o
+        histórico completo, no processo principal, e também compartilhados; cada
+        fold usa apenas fatias desses frames. Os folds são
+        executados em paralelo, um por tarefa.
+        
+        Args:
+            data (pd.DataFrame): Candles com timestamp, open, high, low, close e volume
+            train_size (int): Candles da janela de treino
+            test_size (int): Candles da janela de teste
+            step (int, opcional): Avanço entre folds (>= test_size). Padrão: test_size
+            anchored (bool): Se True, o treino sempre começa no início do histórico
+            max_workers (int, opcional): Número de processos. Padrão: número de CPUs
+        """
+        super().__init__(data, max_workers=max_workers)
+        self.folds = walk_forward_folds(len(data), train_size, test_size, step, anchored)
+
+    def run(self, configs, rank_by='net_profit'):
+        """Executa o walk-forward com as configurações candidatas
+        
+        Args:
+            configs (list): Lista de dicionários de parâmetros (ver grid_configs/random_configs)
+            rank_by (str): Métrica de treino usada para escolher a config de cada fold
+        
+        Returns:
+            dict: 'folds' (pd.DataFrame com um resumo por fold), 'reports' (params,
+                métricas de treino, calculate_metrics do teste e ordens de cada fold)
+                e 'equity_curve' (pd.Series com o patrimônio encadeado dos testes)
+        """
+        configs = _prepare_configs(configs)
+        tasks = [(i, fold, configs, rank_by) for i, fold in enumerate(self.folds)]
+        
+        prices_shm, times_shm = self._share_data()
+        keys, indicators_shm = self._share_indicators(configs)
+        try:
+            with ProcessPoolExecutor(
+                max_workers=self.max_workers,
+                initializer=_attach_indicators,
+                initargs=((prices_shm.name, times_shm.name), len(self.data), indicators_shm.name, keys)
+            ) as executor:
+                reports = list(executor.map(_run_fold, tasks))
+        finally:
+            for shm in (prices_shm, times_shm, indicators_shm):
+                shm.close()
+                shm.unlink()
+        
+        return {
+            'folds': self._summary(reports),
+            'reports': reports,
+            'equity_curve': self.equity_curve(reports)
+        }
+
+    def _share_indicators(self, configs):
+        """Calcula uma vez os indicadores de cada conjunto de períodos e os copia para memória compartilhada
+        
+        Returns:
+            tuple: (chaves de período, na ordem dos blocos; SharedMemory com os indicadores)
+        """
+        # Um TradingManager por conjunto de períodos (resolve os padrões dos ausentes)
+        periods = {}
+        for params in configs:
+            period_params = {name: params[name] for name in PERIOD_PARAMS if name in params}
+            periods.setdefault(tuple(sorted(period_params.items())), period_params)
+        managers = {}
+        for period_params in periods.values():
+            trading_manager = TradingManager(is_backtest=True, params=period_params, enable_chart=False)
+            managers.setdefault(_indicator_key(trading_manager), trading_manager)
+        keys = list(managers)
+        
+        length = len(self.data)
+        shm = shared_memory.SharedMemory(create=True, size=max(len(keys) * len(INDICATOR_COLUMNS) * length * 8, 1))
+        values = np.ndarray((len(keys), len(INDICATOR_COLUMNS), length), dtype=np.float64, buffer=shm.buf)
+        prices = self.data[['timestamp'] + PRICE_COLUMNS]
+        for group, key in zip(values, keys):
+            df = managers[key].calculate_indicators(prices.copy(deep=False))
+            for i, col in enumerate(INDICATOR_COLUMNS):
+                group[i] = df[col].to_numpy(dtype=np.float64)
+        return keys, shm
+
+    @staticmethod
+    def equity_curve(reports):
+        """Encadeia o patrimônio dos folds de teste, compondo o retorno de cada um
+        
+        Cada fold começa com o saldo inicial do TradingManager; o patrimônio é
+        reescalado pelo resultado acumulado dos folds anteriores.
+        """
+        times, values = [], []
+        scale = 1.0
+        for report in reports:
+            initial = report['initial_balance']
+            times.append(report['test_start'])
+            values.append(initial * scale)
+            for order in report['orders']:
+                if order['type'] == 'sell':
+                    times.append(order['timestamp'])
+                    values.append(order['balance_after'] * scale)
+            times.append(report['test_end'])
+            values.append(report['final_equity'] * scale)
+            scale *= report['final_equity'] / initial
+        return pd.Series(values, index=pd.DatetimeIndex(times, name='timestamp'), name='equity')
+
+    @staticmethod
+    def _summary(reports):
+        rows = []
+        for report in reports:
+            test = _flatten_metrics(report['test_metrics'])
+            rows.append(dict(
+                report['params'],
+                fold=report['fold'],
+                train_start=report['train_start'],
+                test_start=report['test_start'],
+                test_end=report['test_end'],
+                train_net_profit_percentage=report['train_metrics']['net_profit_percentage'],
+                test_trades=test['total_trades'],
+                test_win_rate=test['win_rate'],
+                test_net_profit_percentage=test['net_profit_percentage'],
+                test_max_drawdown=test['max_drawdown'],
+                test_return_percentage=(report['final_equity'] / report['initial_balance'] - 1) * 100
+            ))
+        return pd.DataFrame(rows)